@@ -0,0 +1,90 @@
+"""
+🔄 ACCOUNT POSITION-ACCOUNTING CACHE (partial-close ticket rotation)
+
+After every partial close worker_loop slept 0.5s inside MT5_GLOBAL_LOCK and
+scanned positions_get(symbol) to see whether the broker re-ticketed the
+remainder. Whether that can happen is a property of the account:
+
+    NETTING / EXCHANGE   one position per symbol, the id never changes -> no check
+    HEDGING              standard MT5 keeps the ticket, some bridges re-ticket
+                         -> learned per login from observed partial closes
+
+    ACCOUNT_MODES.needs_check(login, acct.margin_mode)
+        False -> keep the ticket map, no wait, no scan
+        True  -> one immediate positions_get(ticket) / (symbol); if the broker
+                 has not settled yet the scan is deferred: a worker runs it once due, before its next job
+
+Observations are shared per login in Redis (HASH acct:accounting), so every
+process learns from the first partial close seen anywhere.
+
+    ROTATION_CONFIRMATIONS   Kept-ticket partial closes before a hedging login is trusted (default 3)
+    ROTATION_CHECK_DELAY     Seconds before a deferred rotation scan runs (default 0.5)
+"""
+import os
+import json
+import time
+import threading
+
+ROTATION_CONFIRMATIONS = int(os.getenv("ROTATION_CONFIRMATIONS", "3"))
+ROTATION_CHECK_DELAY = float(os.getenv("ROTATION_CHECK_DELAY", "0.5"))
+REDIS_KEY = "acct:accounting"
+
+# ACCOUNT_MARGIN_MODE_* (MQL5 enum)
+MARGIN_MODE_NETTING, MARGIN_MODE_EXCHANGE, MARGIN_MODE_HEDGING = 0, 1, 2
+MODE_NAMES = {MARGIN_MODE_NETTING: "NETTING", MARGIN_MODE_EXCHANGE: "EXCHANGE", MARGIN_MODE_HEDGING: "HEDGING"}
+
+
+class AccountModes:
+    def __init__(self, redis_client=None, confirmations=ROTATION_CONFIRMATIONS):
+        self.redis = redis_client
+        self.confirmations = confirmations
+        self.accounts = {}  # login -> {"margin_mode", "kept", "rotated", "ts"}
+        self.lock = threading.Lock()
+
+    def get(self, login):
+        login = int(login or 0)
+        entry = self.accounts.get(login)
+        if entry is None and self.redis:
+            try:
+                blob = self.redis.hget(REDIS_KEY, str(login))
+                if blob:
+                    entry = json.loads(blob)
+                    with self.lock:
+                        self.accounts[login] = entry
+            except: pass
+        return entry
+
+    def _save(self, login, entry):
+        with self.lock:
+            self.accounts[login] = entry
+        if self.redis:
+            try: self.redis.hset(REDIS_KEY, str(login), json.dumps(entry))
+            except: pass
+
+    def update_mode(self, login, margin_mode):
+        """Records margin_mode from account_info (only writes when it changes)."""
+        if margin_mode is None: return
+        login = int(login or 0)
+        entry = self.get(login)
+        if entry and entry.get("margin_mode") == margin_mode: return
+        entry = dict(entry or {"kept": 0, "rotated": 0})
+        entry.update({"margin_mode": margin_mode, "ts": time.time()})
+        self._save(login, entry)
+
+    def observe(self, login, rotated):
+        """Feeds the outcome of one checked partial close."""
+        login = int(login or 0)
+        entry = dict(self.get(login) or {"margin_mode": None, "kept": 0, "rotated": 0})
+        entry["rotated" if rotated else "kept"] += 1
+        entry["ts"] = time.time()
+        self._save(login, entry)
+        if rotated and entry["rotated"] == 1:
+            print(f"[ACCOUNTING] 🔄 Login {login} re-tickets partial closes. Rotation checks stay on.")
+
+    def needs_check(self, login, margin_mode=None):
+        """False when a partial close cannot rotate the ticket on this login."""
+        entry = self.get(login)
+        if margin_mode is None and entry: margin_mode = entry.get("margin_mode")
+        if margin_mode in (MARGIN_MODE_NETTING, MARGIN_MODE_EXCHANGE): return False
+        if entry and not entry.get("rotated") and entry.get("kept", 0) >= self.confirmations: return False
+        return True
@@ -0,0 +1,126 @@
+"""
+📇 SHARED ACCOUNT STATE (equity / free margin / leverage per login)
+
+EQUITY mode, margin checks and risk limits need the follower's equity and free
+margin, which used to mean switching the terminal to the follower first (plus
+the margin stabilizer's 5 x 0.2s). Every component that is already logged in
+publishes a compact record instead:
+
+    HASH acct:state  field=login  value={"equity", "balance", "margin", "margin_free",
+                                         "leverage", "server", "currency", "margin_mode",
+                                         "symbols", "ts", "src"}
+
+"symbols" lists the login's open-position symbols (from publishers that read
+positions). open_symbols() unions them for the Market Watch sweep, so a shared
+terminal never hides a symbol some other follower still holds.
+
+Publishers: WorkerPool (after its post-login read), stream_positions_to_redis,
+sync_balance (executor), MonitorWorker and worker_service.
+
+Consumers read with bounded staleness:
+
+    state = ACCOUNT_STATE.get(login)                 # None if older than ACCT_STATE_MAX_AGE
+    ACCOUNT_STATE.has_headroom(state, need_margin)   # False near the limit -> fresh account_info
+    acct = ACCOUNT_STATE.view(state)                 # account_info-shaped (acct.margin_free, ...)
+
+A successful open reserves its margin locally (reserve()) so a burst of
+signals does not reuse the same headroom before the next publish.
+
+    ACCT_STATE_MAX_AGE    default 30s
+    ACCT_STATE_HEADROOM   default 0.2 (keep 20% of free margin unclaimed)
+    ACCT_STATE_THROTTLE   default 1.0s between Redis writes of an unchanged login
+"""
+import os
+import json
+import time
+import threading
+from types import SimpleNamespace
+
+MAX_AGE = float(os.getenv("ACCT_STATE_MAX_AGE", "30"))
+HEADROOM = float(os.getenv("ACCT_STATE_HEADROOM", "0.2"))
+THROTTLE = float(os.getenv("ACCT_STATE_THROTTLE", "1.0"))
+REDIS_KEY = "acct:state"
+
+FIELDS = ("equity", "balance", "margin", "margin_free", "leverage", "server", "currency", "margin_mode")
+
+
+class AccountStateCache:
+    def __init__(self, redis_client=None, max_age=MAX_AGE, headroom=HEADROOM):
+        self.redis = redis_client
+        self.max_age = max_age
+        self.headroom = headroom
+        self.states = {}     # login -> record
+        self.published = {}  # login -> (ts, equity, margin_free) of the last Redis write
+        self.lock = threading.Lock()
+        self.stats = {"memory": 0, "redis": 0, "miss": 0}
+
+    def publish(self, info, source="", symbols=None):
+        """Records an account_info() result (memory always, Redis throttled). symbols: open-position symbols."""
+        if not info or not getattr(info, "login", 0): return None
+        login, now = int(info.login), time.time()
+        state = {f: getattr(info, f, None) for f in FIELDS}
+        state.update({"login": login, "ts": now, "src": source})
+        with self.lock:
+            prev = self.states.get(login) or {}
+            state["symbols"] = sorted(set(symbols)) if symbols is not None else prev.get("symbols", [])
+            self.states[login] = state
+            last = self.published.get(login)
+            due = not last or now - last[0] >= THROTTLE or (last[1], last[2]) != (state["equity"], state["margin_free"]) \
+                or state["symbols"] != prev.get("symbols", [])
+            if due: self.published[login] = (now, state["equity"], state["margin_free"])
+        if due and self.redis:
+            try: self.redis.hset(REDIS_KEY, str(login), json.dumps(state))
+            except: pass
+        return state
+
+    def get(self, login, max_age=None):
+        """Freshest known record for login, or None when nothing is younger than max_age."""
+        login = int(login or 0)
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+        state = self.states.get(login)
+        if state and now - state["ts"] <= max_age:
+            self.stats["memory"] += 1
+            return state
+        if self.redis:
+            try:
+                blob = self.redis.hget(REDIS_KEY, str(login))
+                remote = json.loads(blob) if blob else None
+                if remote and (not state or remote["ts"] > state["ts"]):
+                    with self.lock:
+                        self.states[login] = remote
+                    state = remote
+                    if now - state["ts"] <= max_age:
+                        self.stats["redis"] += 1
+                        return state
+            except: pass
+        self.stats["miss"] += 1
+        return None
+
+    def open_symbols(self, max_age=None):
+        """Symbols with open positions on any login (records younger than max_age), memory + Redis."""
+        cutoff = time.time() - (self.max_age if max_age is None else max_age)
+        with self.lock:
+            records = list(self.states.values())
+        if self.redis:
+            try: records += [json.loads(b) for b in (self.redis.hvals(REDIS_KEY) or [])]
+            except: pass
+        return {s for r in records if r.get("ts", 0) >= cutoff for s in (r.get("symbols") or [])}
+
+    def has_headroom(self, state, need_margin):
+        """True when the cached free margin covers need_margin with HEADROOM to spare."""
+        if not state or need_margin is None: return False
+        return (state.get("margin_free") or 0.0) * (1.0 - self.headroom) >= need_margin
+
+    def reserve(self, login, margin):
+        """Deducts margin used by an order we just sent (local only, until the next publish)."""
+        with self.lock:
+            state = self.states.get(int(login or 0))
+            if state and margin:
+                state = dict(state, margin_free=(state.get("margin_free") or 0.0) - margin)
+                self.states[state["login"]] = state
+
+    @staticmethod
+    def view(state):
+        """account_info()-shaped object for code that reads acct.equity / acct.margin_free."""
+        return SimpleNamespace(**state) if state else None
@@ -0,0 +1,349 @@
+"""
+⏱️ END-TO-END COPY LATENCY BENCHMARK (Master Fill -> Follower Fill)
+
+Drives N masters x M followers through the production chain against a LOCAL Redis
+and the simulated terminal (mt5_sim):
+
+    master fill -> poll/diff (follow_signals) -> send_signal (PUBLISH + XADD)
+    -> pub/sub drain (run_executor) -> hft_executor.process_batch -> order_send
+
+Masters run in child processes (one per master, like one broadcaster per master),
+the executor side runs here and calls the REAL hft_executor WorkerPool.
+
+Stages (ms):
+    detect     master fill            -> poll loop sees the change
+    publish    detection              -> payload handed to Redis
+    dequeue    PUBLISH                -> executor drained the message
+    queue      dequeue                -> worker picked the follower job (trace "pickup")
+    login      trace "login_start"    -> "login_end" (only jobs that switched accounts)
+    order_send order_send round trip
+    report     follower fill          -> batch results available for process_execution_report
+    total      master fill            -> results available
+
+Note: with the stock 0.5 s post-login sync sleep every follower switch is
+serialized under MT5_GLOBAL_LOCK, so 1x500 takes minutes per signal by design.
+
+Usage:
+    python bench_copy_latency.py --shape 1x500
+    python bench_copy_latency.py --shape 50x20 --terminals 8
+    python bench_copy_latency.py --shape storm --out storm.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import multiprocessing
+from datetime import datetime
+
+# 🧪 Force the simulated terminal BEFORE any engine import
+os.environ["MT5_BACKEND"] = "SIM"
+import mt5_sim
+
+# ⚙️ SHAPES
+SHAPES = {
+    "1x500": {"masters": 1, "followers": 500, "kind": "open_close"},
+    "50x20": {"masters": 50, "followers": 20, "kind": "open_close"},
+    "storm": {"masters": 10, "followers": 20, "kind": "storm"},
+}
+STAGES = ["detect", "publish", "dequeue", "queue", "login", "order_send", "report", "total"]
+BENCH_SYMBOLS = ["EURUSD", "GBPUSD", "XAUUSD", "USDJPY"]
+POLL_INTERVAL = 0.05  # Same as broadcaster.POLL_INTERVAL
+MASTER_MAGIC = 0      # Manual trades (broadcaster ignores magic 234000)
+FOLLOWER_LOGIN_BASE = 7000000
+MASTER_LOGIN_BASE = 9000000
+
+
+def parse_shape(shape):
+    if shape in SHAPES: return dict(SHAPES[shape])
+    try:
+        m, f = shape.lower().split("x")
+        return {"masters": int(m), "followers": int(f), "kind": "open_close"}
+    except Exception:
+        raise SystemExit(f"[BENCH] ❌ Unknown shape '{shape}'. Use {list(SHAPES)} or MxF (e.g. 5x100).")
+
+
+def percentiles(values):
+    if not values: return {"count": 0}
+    vals = sorted(values)
+    n = len(vals)
+    def pick(p): return round(vals[min(n - 1, int(round(p / 100.0 * (n - 1))))], 3)
+    return {
+        "count": n, "p50": pick(50), "p95": pick(95), "p99": pick(99),
+        "max": round(vals[-1], 3), "mean": round(sum(vals) / n, 3),
+    }
+
+
+# ==========================================
+# 👑 MASTER SIDE (Child Process per Master)
+# ==========================================
+def _master_send(r, master_id, payload):
+    """Mirror of broadcaster.send_signal (minus the DB webhook)."""
+    if 'timestamp' not in payload:
+        payload['timestamp'] = time.time()
+    payload["bench"]["t_publish"] = time.time()
+    json_payload = json.dumps(payload)
+    r.publish(f"signals:master:{master_id}", json_payload)
+    r.xadd('stream:signals', {'payload': json_payload, 'timestamp': str(time.time())})
+
+
+def _master_actions(kind, rounds, interval, partials):
+    """Yields (delay_before, action, arg) for one master's scripted session."""
+    if kind == "storm":
+        for _ in range(rounds):
+            yield (interval, "OPEN", 1.0)
+            for _ in range(partials):
+                yield (0.03, "PARTIAL", 0.1)  # 🌪️ Burst: 30 ms apart
+            yield (interval, "CLOSE", None)
+    else:
+        for _ in range(rounds):
+            yield (interval, "OPEN", 0.1)
+            yield (interval, "CLOSE", None)
+
+
+def master_process(idx, redis_url, sim_cfg, kind, rounds, interval, partials, start_at):
+    import redis
+    mt5 = mt5_sim
+    mt5.reset()
+    mt5.configure(**sim_cfg)
+    r = redis.from_url(redis_url, decode_responses=True)
+
+    master_id = f"bench-master-{idx:03d}"
+    login = MASTER_LOGIN_BASE + idx
+    mt5.initialize(path=f"/sim/master_{idx:03d}/terminal64.exe")
+    mt5.login(login, password="bench", server=mt5.CONFIG["default_server"])
+    for s in BENCH_SYMBOLS: mt5.symbol_select(s, True)
+
+    fills = {}  # event key -> master fill time
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def trader():
+        """The human master: places trades straight into the terminal."""
+        rng = random.Random(idx)
+        while time.time() < start_at: time.sleep(0.01)
+        time.sleep(rng.uniform(0, interval))  # Stagger masters
+        ticket = None
+        for delay, action, arg in _master_actions(kind, rounds, interval, partials):
+            time.sleep(delay)
+            with lock:
+                if action == "OPEN":
+                    symbol = rng.choice(BENCH_SYMBOLS)
+                    tick = mt5.symbol_info_tick(symbol)
+                    res = mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": symbol, "volume": arg,
+                                          "type": mt5.ORDER_TYPE_BUY, "price": tick.ask, "magic": MASTER_MAGIC,
+                                          "type_filling": mt5.ORDER_FILLING_IOC})
+                    ticket = res.order
+                    fills[("OPEN", ticket)] = time.time()
+                elif ticket:
+                    pos = mt5.positions_get(ticket=ticket)
+                    if not pos: continue
+                    vol = arg if action == "PARTIAL" else pos[0].volume
+                    mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": pos[0].symbol, "volume": vol,
+                                    "type": mt5.ORDER_TYPE_SELL, "position": ticket, "magic": MASTER_MAGIC,
+                                    "type_filling": mt5.ORDER_FILLING_IOC})
+                    remaining = round(pos[0].volume - vol, 2)
+                    fills[("CLOSE", ticket, remaining)] = time.time()
+        time.sleep(interval)
+        done.set()
+
+    threading.Thread(target=trader, daemon=True).start()
+
+    # 📡 POLL LOOP (Mirror of follow_signals diff)
+    known_positions = {}
+    while not done.is_set():
+        with lock:
+            info = mt5.account_info()
+            current = list(mt5.positions_get() or [])
+            t_detect = time.time()
+            current_tickets = {p.ticket for p in current}
+            events = []
+            for pos in current:
+                if pos.magic == 234000: continue
+                if pos.ticket not in known_positions:
+                    known_positions[pos.ticket] = {"volume": pos.volume, "symbol": pos.symbol, "type": "BUY" if pos.type == 0 else "SELL"}
+                    events.append(({
+                        "masterId": master_id, "master_login": login, "ticket": str(pos.ticket),
+                        "symbol": pos.symbol, "type": "BUY" if pos.type == 0 else "SELL", "volume": pos.volume,
+                        "price": pos.price_open, "sl": pos.sl, "tp": pos.tp, "action": "OPEN",
+                        "openTime": int(pos.time), "master_equity": info.equity,
+                    }, fills.get(("OPEN", pos.ticket))))
+                elif pos.volume < known_positions[pos.ticket]["volume"]:
+                    prev_vol = known_positions[pos.ticket]["volume"]
+                    diff = float(round(prev_vol - pos.volume, 2))
+                    known_positions[pos.ticket]["volume"] = pos.volume
+                    events.append(({
+                        "masterId": master_id, "ticket": str(pos.ticket), "symbol": pos.symbol,
+                        "action": "CLOSE", "volume": diff, "pct": diff / prev_vol, "price": pos.price_open,
+                        "type": known_positions[pos.ticket]["type"], "master_login": login,
+                        "closeTime": int(time.time()), "master_equity": info.equity,
+                    }, fills.get(("CLOSE", pos.ticket, pos.volume))))
+            for t in [t for t in known_positions if t not in current_tickets]:
+                prev = known_positions.pop(t)
+                events.append(({
+                    "masterId": master_id, "master_login": login, "ticket": str(t), "action": "CLOSE",
+                    "symbol": prev["symbol"], "type": prev["type"], "volume": prev["volume"], "master_equity": info.equity,
+                }, fills.get(("CLOSE", t, 0.0))))
+        for payload, t_fill in events:
+            payload["bench"] = {"t_fill": t_fill or t_detect, "t_detect": t_detect}
+            _master_send(r, master_id, payload)
+        time.sleep(POLL_INTERVAL)
+
+
+# ==========================================
+# 🏎️ EXECUTOR SIDE (This Process)
+# ==========================================
+def job_stamps(results):
+    """Per-follower stage stamps from the worker trace (tracing.stamp in worker_loop).
+
+    Pool workers stay attached and logged in across jobs, so the sim entry points
+    (initialize/login) no longer mark job boundaries; the trace on each result does.
+    """
+    out = []
+    for res in results:
+        t = (res.get("trace") or {}).get("t", {})
+        if "send_start" in t and "send_end" in t:
+            out.append(t)
+    return out
+
+
+def run_benchmark(args):
+    import redis
+    shape = parse_shape(args.shape)
+    sim_cfg = {"ipc_latency": args.ipc_ms / 1000.0, "login_latency": args.login_ms / 1000.0,
+               "fill_latency": args.fill_ms / 1000.0, "jitter": args.jitter}
+
+    os.environ["REDIS_URL"] = args.redis_url
+    mt5_sim.install()
+    mt5_sim.configure(**sim_cfg)
+    import hft_executor
+
+    hft_executor.TERMINAL_PATHS = [hft_executor.GRID_PATH_TEMPLATE.format(i=i) for i in range(5, 5 + args.terminals)]
+    hft_executor.init_persistent_engine()
+
+    r = redis.from_url(args.redis_url, decode_responses=True)
+    r.ping()
+    pubsub = r.pubsub()
+    master_ids = [f"bench-master-{i:03d}" for i in range(shape["masters"])]
+    for m in master_ids:
+        pubsub.subscribe(f"signals:master:{m}")
+
+    rosters = {}
+    for mi, m in enumerate(master_ids):
+        rosters[m] = [{
+            "login": FOLLOWER_LOGIN_BASE + mi * shape["followers"] + fi, "password": "bench",
+            "server": mt5_sim.CONFIG["default_server"], "terminal_path": None,
+            "follower_id": f"bench-follower-{mi:03d}-{fi:04d}", "invert_copy": False,
+            "copy_mode": "FIXED", "allocation": 0.0, "risk_factor": 100.0,
+        } for fi in range(shape["followers"])]
+
+    print(f"[BENCH] ⏱️ Shape={args.shape} Masters={shape['masters']} Followers/Master={shape['followers']} "
+          f"Terminals={args.terminals} Rounds={args.rounds}")
+
+    start_at = time.time() + 1.0
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=master_process, daemon=True,
+                         args=(i, args.redis_url, sim_cfg, shape["kind"], args.rounds, args.interval, args.partials, start_at))
+             for i in range(shape["masters"])]
+    for p in procs: p.start()
+
+    samples = {s: [] for s in STAGES}
+    signals = fills = failures = 0
+    last_activity = time.time()
+    t_begin = time.time()
+
+    # 🔁 EXECUTOR LOOP (Mirror of run_executor drain -> process_batch)
+    while True:
+        buffer = []
+        for _ in range(50):
+            m = pubsub.get_message(ignore_subscribe_messages=True)
+            if getattr(m, 'get', None) and m.get('type') == 'message':
+                buffer.append(m)
+            elif m is None:
+                break
+
+        for message in buffer:
+            t_dequeue = time.time()
+            signal = json.loads(message['data'])
+            bench = signal.pop("bench", {})
+            slaves = rosters.get(signal.get("masterId"), [])
+            signals += 1
+
+            results = hft_executor.process_batch(slaves, signal)
+            t_report = time.time()
+
+            samples["detect"].append((bench["t_detect"] - bench["t_fill"]) * 1000)
+            samples["publish"].append((bench["t_publish"] - bench["t_detect"]) * 1000)
+            samples["dequeue"].append((t_dequeue - bench["t_publish"]) * 1000)
+            for t in job_stamps(results):
+                if "pickup" in t:
+                    samples["queue"].append((t["pickup"] - t_dequeue) * 1000)
+                if "login_start" in t:
+                    samples["login"].append((t.get("login_end", t["send_start"]) - t["login_start"]) * 1000)
+                samples["order_send"].append((t["send_end"] - t["send_start"]) * 1000)
+                samples["report"].append((t_report - t["send_end"]) * 1000)
+                samples["total"].append((t_report - bench["t_fill"]) * 1000)
+            ok = sum(1 for res in results if res.get("status") == "success")
+            fills += ok
+            failures += len(results) - ok
+            last_activity = time.time()
+
+        if not any(p.is_alive() for p in procs) and time.time() - last_activity > args.drain:
+            break
+        time.sleep(0.01)
+
+    report = {
+        "shape": args.shape,
+        "kind": shape["kind"],
+        "masters": shape["masters"],
+        "followers_per_master": shape["followers"],
+        "terminals": args.terminals,
+        "rounds": args.rounds,
+        "sim": sim_cfg,
+        "started": datetime.fromtimestamp(t_begin).isoformat(),
+        "duration_s": round(time.time() - t_begin, 2),
+        "signals": signals,
+        "fills": fills,
+        "failures": failures,
+        "stages_ms": {s: percentiles(samples[s]) for s in STAGES},
+        "sim_calls": mt5_sim.stats(),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hydra Copy Latency Benchmark (Simulated Terminal)')
+    parser.add_argument('--shape', type=str, default="1x500", help=f"{list(SHAPES)} or MxF")
+    parser.add_argument('--terminals', type=int, default=4, help='Simulated follower terminals (grid 05+)')
+    parser.add_argument('--rounds', type=int, default=2, help='OPEN/CLOSE cycles per master')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between master actions')
+    parser.add_argument('--partials', type=int, default=5, help='Partial closes per storm burst')
+    parser.add_argument('--drain', type=float, default=3.0, help='Idle seconds before finishing')
+    parser.add_argument('--redis-url', type=str, default=os.getenv("BENCH_REDIS_URL", "redis://localhost:6379/15"), help='LOCAL Redis (separate DB)')
+    parser.add_argument('--ipc-ms', type=float, default=0.3)
+    parser.add_argument('--login-ms', type=float, default=250.0)
+    parser.add_argument('--fill-ms', type=float, default=15.0)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--out', type=str, default="", help='JSON output path (default bench_results/...)')
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+
+    out = args.out or os.path.join("bench_results", f"copy_latency_{args.shape}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    if os.path.dirname(out): os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n[BENCH] 📊 {report['signals']} signals | {report['fills']} fills | {report['failures']} failed | {report['duration_s']}s")
+    print(f"{'stage':<12}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for s in STAGES:
+        st = report["stages_ms"][s]
+        if st.get("count"):
+            print(f"{s:<12}{st['p50']:>10}{st['p95']:>10}{st['p99']:>10}{st['max']:>10}")
+    print(f"[BENCH] 💾 Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
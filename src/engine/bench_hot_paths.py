@@ -0,0 +1,290 @@
+"""
+🔬 MICRO-BENCHMARKS: ENGINE HOT FUNCTIONS
+
+Times the functions that run on every signal / every poll and counts the MT5
+calls each one makes (against mt5_sim with zero latency), so BOTH CPU and IPC
+regressions show up.
+
+Covered:
+    executor.normalize_symbol         hft_executor.ensure_symbol   (cached; resolve_symbol / probe_symbol = raw probe)
+    executor.calculate_safe_lot       hft_executor.calculate_safe_lot
+    worker_service.BotWorker.calculate_safe_lot
+    executor.normalize_trade_params   executor.is_within_trading_hours
+    reconcile CPY: comment parse      (mirror of _internal_reconcile_logic)
+    follow_signals known_positions diff (mirror of broadcaster.follow_signals)
+
+Fixtures: broker catalogs and position sets of 10 / 1k / 10k entries.
+
+Usage:
+    python bench_hot_paths.py                          # print table
+    python bench_hot_paths.py --out hot_paths.json     # save baseline
+    python bench_hot_paths.py --check hot_paths.json   # exit 1 on regression
+"""
+import os
+import sys
+import io
+import json
+import time
+import random
+import argparse
+import contextlib
+from datetime import datetime
+
+# 🧪 Stub terminal BEFORE engine imports (zero latency, call counting)
+os.environ["MT5_BACKEND"] = "SIM"
+import mt5_sim
+mt5_sim.install()
+mt5_sim.configure(ipc_latency=0.0, login_latency=0.0, fill_latency=0.0, init_latency=0.0, jitter=0.0)
+
+SIZES = [10, 1000, 10000]
+BENCH_SERVER = "BenchBroker-Live"
+BENCH_SUFFIX = ".pro"  # Forces the suffix probing path (like most ECN brokers)
+
+
+def _load_engine():
+    """executor.py / worker_service.py parse args + build clients at import time."""
+    saved = sys.argv
+    sys.argv = ["executor.py", "--mode", "SINGLE", "--dry-run"]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import hft_executor
+            import executor
+            import worker_service
+    finally:
+        sys.argv = saved
+    return executor, hft_executor, worker_service
+
+
+# ==========================================
+# 🧱 FIXTURES
+# ==========================================
+def build_catalog(size):
+    """Broker catalog: the real bases + filler symbols up to `size`."""
+    symbols = dict(mt5_sim.BASE_SYMBOLS)
+    i = 0
+    while len(symbols) < size:
+        symbols[f"SYN{i:05d}"] = (1.0 + (i % 100) / 100.0, 10, 5, 100000, 0.01, 100.0, 0.01)
+        i += 1
+    mt5_sim.reset()
+    mt5_sim.add_server(BENCH_SERVER, suffix=BENCH_SUFFIX, symbols=symbols)
+    mt5_sim.add_account(8800001, password="bench", server=BENCH_SERVER, balance=10000.0, leverage=500)
+    mt5_sim.initialize(path="/sim/bench/terminal64.exe")
+    mt5_sim.login(8800001, password="bench", server=BENCH_SERVER)
+    for base in ("EURUSD", "XAUUSD"):
+        mt5_sim.symbol_select(f"{base}{BENCH_SUFFIX}", True)
+
+
+def build_positions(size, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for i in range(size):
+        ticket = 60000000 + i
+        session = rng.choice([0, 0, 12, 345])
+        tag = f"CPY:S{session}:{ticket + 1000000}" if session else f"CPY:{ticket + 1000000}"
+        if i % 17 == 0: tag += " [sl 1.0800]"
+        if i % 23 == 0: tag = "manual"
+        out.append(mt5_sim.TradePosition(
+            ticket=ticket, time=1700000000 + i, time_msc=0, time_update=0, time_update_msc=0,
+            type=i % 2, magic=0 if i % 3 else 234000, identifier=ticket, reason=3,
+            volume=round(0.01 * (1 + i % 50), 2), price_open=1.08, sl=1.07, tp=1.09, price_current=1.081,
+            swap=0.0, profit=1.0, symbol="EURUSD" + BENCH_SUFFIX, comment=tag, external_id=""))
+    return out
+
+
+def mutate_positions(positions, seed=11):
+    """Next poll: ~1% opened, ~1% partially closed, ~2% SL moved, ~1% closed."""
+    rng = random.Random(seed)
+    nxt = []
+    for p in positions:
+        roll = rng.random()
+        if roll < 0.01: continue                                   # Closed
+        if roll < 0.02 and p.volume > 0.01:
+            p = p._replace(volume=round(p.volume / 2, 2))          # Partial
+        elif roll < 0.04:
+            p = p._replace(sl=round(p.sl + 0.0005, 5))             # Trailing stop
+        nxt.append(p)
+    base = 70000000
+    for i in range(max(1, len(positions) // 100)):
+        nxt.append(positions[0]._replace(ticket=base + i, identifier=base + i, magic=0))
+    return nxt
+
+
+# ==========================================
+# 🪞 MIRRORED INLINE KERNELS
+# (Kept line-for-line with the inline code; update when the source changes)
+# ==========================================
+def reconcile_parse_comments(local_positions):
+    """Mirror: executor._internal_reconcile_logic CPY: comment parse."""
+    copied_tickets = set()
+    local_map = {}
+    for p in local_positions:
+        if "CPY:" in p.comment:
+            try:
+                comment_clean = p.comment.replace("CPY:", "").strip()
+                if comment_clean.startswith("S") and ":" in comment_clean:
+                    parts = comment_clean.split(':')
+                    if len(parts) >= 2:
+                        m_tid = parts[-1].split(' ')[0]
+                    else:
+                        m_tid = comment_clean.split(' ')[0]
+                else:
+                    m_tid = comment_clean.split(' ')[0]
+                local_map[str(m_tid)] = p
+                copied_tickets.add(str(m_tid))
+            except: pass
+    return local_map
+
+
+def follow_signals_diff(known_positions, current_positions_tuple, mt5):
+    """Mirror: broadcaster.follow_signals A/B/C diff (send_signal -> list append)."""
+    emitted = []
+    current_positions = list(current_positions_tuple)
+    current_tickets = {p.ticket for p in current_positions}
+    for pos in current_positions:
+        if pos.magic == 234000:
+            continue
+        if pos.ticket not in known_positions:
+            known_positions[pos.ticket] = {
+                "sl": pos.sl, "tp": pos.tp, "price": pos.price_open, "volume": pos.volume,
+                "symbol": pos.symbol, "type": "BUY" if pos.type == 0 else "SELL", "open_time": pos.time
+            }
+            tick = mt5.symbol_info_tick(pos.symbol)
+            if tick:
+                known_positions[pos.ticket]["age_seconds"] = tick.time - pos.time
+            else:
+                known_positions[pos.ticket]["age_seconds"] = 0
+            emitted.append(("OPEN", pos.ticket))
+        else:
+            prev_data = known_positions[pos.ticket]
+            if pos.volume < prev_data["volume"]:
+                diff = float(round(prev_data["volume"] - pos.volume, 2))
+                prev_vol = float(prev_data["volume"])
+                pct = diff / prev_vol if prev_vol > 0 else 0.0
+                known_positions[pos.ticket]["volume"] = pos.volume
+                emitted.append(("PARTIAL", pos.ticket, pct))
+            if prev_data["sl"] != pos.sl or prev_data["tp"] != pos.tp:
+                known_positions[pos.ticket]["sl"] = pos.sl
+                known_positions[pos.ticket]["tp"] = pos.tp
+                emitted.append(("MODIFY", pos.ticket))
+    closed_tickets = [t for t in known_positions if t not in current_tickets]
+    for t in closed_tickets:
+        del known_positions[t]
+        emitted.append(("CLOSE", t))
+    return emitted
+
+
+def known_from(positions):
+    return {p.ticket: {"sl": p.sl, "tp": p.tp, "price": p.price_open, "volume": p.volume,
+                       "symbol": p.symbol, "type": "BUY" if p.type == 0 else "SELL"}
+            for p in positions if p.magic != 234000}
+
+
+# ==========================================
+# ⏱️ RUNNER
+# ==========================================
+def run_case(name, size, setup, fn, iterations):
+    """setup() -> args (untimed), fn(*args) timed. Returns per-call stats."""
+    mt5_sim.CALL_COUNTS.clear()
+    elapsed = 0.0
+    with contextlib.redirect_stdout(io.StringIO()) as sink:
+        for _ in range(iterations):
+            args = setup()
+            t0 = time.perf_counter()
+            fn(*args)
+            elapsed += time.perf_counter() - t0
+            sink.seek(0); sink.truncate()
+    calls = sum(mt5_sim.CALL_COUNTS.values())
+    return {
+        "case": name, "size": size, "iterations": iterations,
+        "us_per_call": round(elapsed / iterations * 1e6, 2),
+        "mt5_calls_per_call": round(calls / iterations, 2),
+        "mt5_calls_by_api": {k: round(v / iterations, 2) for k, v in sorted(mt5_sim.CALL_COUNTS.items())},
+    }
+
+
+def run_all(iterations):
+    executor, hft, worker_service = _load_engine()
+    bot = worker_service.BotWorker("/opt/bot_bench/terminal64.exe")
+    results = []
+    no_args = lambda: ()
+
+    for size in SIZES:
+        build_catalog(size)
+        n = iterations
+
+        executor.SYMBOL_CACHE.entries.clear(); hft.SYMBOL_CACHE.entries.clear()
+        for raw in ("EURUSD", "GOLD", "NOPE"):  # suffix hit / synonym hit / full miss
+            it = 3 if raw == "NOPE" else n
+            results.append(run_case(f"resolve_symbol[{raw}]", size, no_args, lambda r=raw: executor.resolve_symbol(r), it))
+            results.append(run_case(f"probe_symbol[{raw}]", size, no_args, lambda r=raw: hft.probe_symbol(r), it))
+            results.append(run_case(f"normalize_symbol[{raw}]", size, no_args, lambda r=raw: executor.normalize_symbol(r), n))
+            results.append(run_case(f"ensure_symbol[{raw}]", size, no_args, lambda r=raw: hft.ensure_symbol(r), n))
+
+        sym = "EURUSD" + BENCH_SUFFIX
+        results.append(run_case("executor.calculate_safe_lot", size, no_args,
+                                lambda: executor.calculate_safe_lot(0.5, 10000.0, 500, 100.0, sym), n))
+        results.append(run_case("hft.calculate_safe_lot[EQUITY]", size, no_args,
+                                lambda: hft.calculate_safe_lot(0.5, 10000.0, 500, 100.0, sym, mode="EQUITY", master_equity=25000.0), n))
+        results.append(run_case("BotWorker.calculate_safe_lot", size, no_args,
+                                lambda: bot.calculate_safe_lot(sym, 0.5, 100.0, mt5_sim.ORDER_TYPE_BUY), n))
+        results.append(run_case("normalize_trade_params", size, no_args,
+                                lambda: executor.normalize_trade_params(sym, 0.123, 1.085432, 1.08, 1.09), n))
+        results.append(run_case("is_within_trading_hours", size, no_args,
+                                lambda: executor.is_within_trading_hours({"mode": "CUSTOM", "start": "22:00", "end": "06:00"}), n * 10))
+
+        positions = build_positions(size)
+        nxt = tuple(mutate_positions(positions))
+        base_known = known_from(positions)
+        pos_it = max(3, 2000 // size)
+        results.append(run_case("reconcile_cpy_parse", size, lambda: (positions,), reconcile_parse_comments, pos_it))
+        results.append(run_case("follow_signals_diff", size,
+                                lambda: ({k: dict(v) for k, v in base_known.items()}, nxt, mt5_sim),
+                                follow_signals_diff, pos_it))
+    return results
+
+
+def check(results, baseline_path, tolerance):
+    with open(baseline_path) as f:
+        base = {(r["case"], r["size"]): r for r in json.load(f)["results"]}
+    failed = 0
+    for r in results:
+        b = base.get((r["case"], r["size"]))
+        if not b: continue
+        if r["mt5_calls_per_call"] > b["mt5_calls_per_call"]:
+            print(f"[REGRESSION] 📞 {r['case']} n={r['size']}: mt5 calls {b['mt5_calls_per_call']} -> {r['mt5_calls_per_call']}")
+            failed += 1
+        if r["us_per_call"] > b["us_per_call"] * (1.0 + tolerance):
+            print(f"[REGRESSION] 🐢 {r['case']} n={r['size']}: {b['us_per_call']}us -> {r['us_per_call']}us")
+            failed += 1
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hydra Hot-Path Micro-Benchmarks')
+    parser.add_argument('--iterations', type=int, default=200, help='Calls per case at small sizes')
+    parser.add_argument('--out', type=str, default="", help='Save results JSON (baseline)')
+    parser.add_argument('--check', type=str, default="", help='Compare against baseline JSON')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed wall-time slowdown (0.25 = +25%%)')
+    args = parser.parse_args()
+
+    results = run_all(args.iterations)
+
+    print(f"{'case':<36}{'size':>7}{'us/call':>12}{'mt5/call':>10}")
+    for r in results:
+        print(f"{r['case']:<36}{r['size']:>7}{r['us_per_call']:>12}{r['mt5_calls_per_call']:>10}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"created": datetime.now().isoformat(), "results": results}, f, indent=2)
+        print(f"[BENCH] 💾 Saved {args.out}")
+
+    if args.check:
+        failed = check(results, args.check, args.tolerance)
+        if failed:
+            print(f"[BENCH] ❌ {failed} regressions vs {args.check}")
+            sys.exit(1)
+        print(f"[BENCH] ✅ No regressions vs {args.check}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+"""
+🔒 SHARED-TERMINAL CONTENTION SIMULATOR (Broadcaster / Executor / Verify)
+
+Single-terminal deployments share ONE terminal (and `lock:terminal:{md5(path)}`)
+between:
+    broadcaster.py   follow_signals poll loop, yields the lock every 4s / after a signal
+    executor.py      TURBO hybrid loop: acquire_terminal_lock(5.0) per burst -> hft WorkerPool
+    verify.py        LOCKED_VERIFY on lock:terminal:global, everyone else mt5.shutdown()s
+
+This runs them as separate processes against mt5_sim in shared mode
+(MT5_SIM_SHARED_DIR): the terminal keeps ONE logged-in account, so every process
+sees the logins of the others, exactly like the real binding.
+
+    broadcaster  REAL follow_signals, master driven by master_activity_gen.MasterActivity
+    executor     REAL acquire/release_terminal_lock, process_batch, stream_positions_to_redis
+                 and stream_master_pnl_to_redis, in a mirror of the run_executor hybrid loop
+    verify       REAL verify.py subprocess every --verify-interval seconds
+
+Sweeps the follower count and reports per level:
+    signal delay (master action -> follower fill), detection delay, executor lock
+    wait, dropped bursts, broadcaster yields / lock pauses, forced shutdowns,
+    login switches, order_sends that landed on a foreign account, verify duration.
+The knee is the first level whose p95 signal delay misses --target-ms.
+
+Needs a LOCAL Redis. verify.py always talks to localhost:6379 db 0, so keep
+--redis-url on db 0 for its LOCKED_VERIFY to be visible to the others.
+
+    python bench_shared_terminal.py --followers 1,5,10,20 --duration 60 --target-ms 1500
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from datetime import datetime
+
+# 🧪 Force the simulated terminal BEFORE any engine import
+os.environ["MT5_BACKEND"] = "SIM"
+import mt5_sim
+
+ENGINE_DIR = os.path.dirname(os.path.abspath(__file__))
+MASTER_ID = "bench-shared-master"
+MASTER_LOGIN = 9200001
+FOLLOWER_LOGIN_BASE = 7200000
+VERIFY_LOGIN_BASE = 9300000
+STALE_SIGNAL_S = 60.0      # Same as run_executor staleness guard
+BURST_WINDOW = 0.1         # Same as run_executor
+STREAM_INTERVAL = 0.5      # Same as run_executor
+MASTER_PNL_INTERVAL = 5.0  # Same as run_executor
+
+
+def percentiles(values):
+    if not values: return {"count": 0}
+    vals = sorted(values)
+    n = len(vals)
+    def pick(p): return round(vals[min(n - 1, int(round(p / 100.0 * (n - 1))))], 3)
+    return {"count": n, "p50": pick(50), "p95": pick(95), "p99": pick(99), "max": round(vals[-1], 3)}
+
+
+def lock_key_for(path):
+    """Same derivation as broadcaster / executor / hft_executor."""
+    seed = os.path.normpath(str(path)).lower().strip()
+    return f"lock:terminal:{hashlib.md5(seed.encode()).hexdigest()}"
+
+
+def sim_env(args, shared_dir):
+    return {
+        "MT5_BACKEND": "SIM", "MT5_SIM_SHARED_DIR": shared_dir, "REDIS_URL": args.redis_url,
+        "MT5_SIM_IPC_MS": str(args.ipc_ms), "MT5_SIM_LOGIN_MS": str(args.login_ms),
+        "MT5_SIM_FILL_MS": str(args.fill_ms), "MT5_SIM_JITTER": str(args.jitter),
+    }
+
+
+def sim_config(args, shared_dir):
+    return {"ipc_latency": args.ipc_ms / 1000.0, "login_latency": args.login_ms / 1000.0,
+            "fill_latency": args.fill_ms / 1000.0, "jitter": args.jitter, "shared_dir": shared_dir}
+
+
+def _save(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+# ==========================================
+# 📡 BROADCASTER PROCESS
+# ==========================================
+def broadcaster_process(args, level_dir, term_path, ready, go):
+    mt5_sim.install()
+    mt5_sim.reset()
+    mt5_sim.configure(**sim_config(args, level_dir))
+    from master_activity_gen import MasterActivity
+    server = mt5_sim.CONFIG["default_server"]
+    mt5_sim.add_account(MASTER_LOGIN, password="sim", server=server, balance=1e7)
+    rng = random.Random(args.seed)
+    gen = MasterActivity(MASTER_LOGIN, rng)
+    for _ in range(args.positions):
+        gen.open(mark=False)
+
+    if args.quiet: sys.stdout = open(os.devnull, "w")
+    sys.argv = ["broadcaster.py", "--user-id", MASTER_ID, "--mt5-path", term_path]
+    import broadcaster
+    broadcaster.fetch_credentials = lambda: (MASTER_LOGIN, "sim", server)
+
+    stats = {"signals": 0, "yields": 0, "lock_pauses": 0, "verify_pauses": 0,
+             "detection_ms": [], "reacquire_wait_ms": []}
+
+    # 🏷️ Stamp the master action time into every signal (popped by the executor)
+    orig_send = broadcaster.send_signal
+    def send_signal(payload):
+        t = time.time()
+        delays = gen.match(payload, t)
+        stats["detection_ms"].extend(delays)
+        payload["bench"] = {"t_action": t - max(delays) / 1000.0 if delays else t, "t_signal": t}
+        stats["signals"] += 1
+        orig_send(payload)
+    broadcaster.send_signal = send_signal
+
+    # 🤝 Yield accounting (release_lock is only called by the cooperative yield)
+    orig_release, orig_acquire = broadcaster.release_lock, broadcaster.acquire_lock
+    wait = {"since": None}
+    def release_lock(user_id):
+        stats["yields"] += 1
+        return orig_release(user_id)
+    def acquire_lock(user_id):
+        ok = orig_acquire(user_id)
+        if not ok and wait["since"] is None: wait["since"] = time.time()
+        if ok and wait["since"] is not None:
+            stats["reacquire_wait_ms"].append((time.time() - wait["since"]) * 1000)
+            wait["since"] = None
+        return ok
+    broadcaster.release_lock, broadcaster.acquire_lock = release_lock, acquire_lock
+
+    # ⏸️ Pauses at the top of the poll loop (lock owned by someone else / LOCKED_VERIFY)
+    lock_key = lock_key_for(term_path)
+    orig_get = broadcaster.r_client.get
+    def get(key, *a, **kw):
+        val = orig_get(key, *a, **kw)
+        if key == "lock:terminal:global" and val == "LOCKED_VERIFY": stats["verify_pauses"] += 1
+        elif key == lock_key and val and val != MASTER_ID: stats["lock_pauses"] += 1
+        return val
+    broadcaster.r_client.get = get
+
+    def loop():
+        broadcaster.initialize_mt5()
+        broadcaster.follow_signals()
+    threading.Thread(target=loop, daemon=True).start()
+
+    ready.set()
+    go.wait()
+    t_go = time.time()
+    time.sleep(args.warmup)
+    for k in ("signals", "yields", "lock_pauses", "verify_pauses"): stats[k] = 0
+    stats["detection_ms"].clear()
+    stats["reacquire_wait_ms"].clear()
+    mt5_sim.CALL_COUNTS.clear()
+    mt5_sim.EVENTS.clear()
+
+    tick = 0.01
+    stop_at = t_go + args.warmup + args.duration
+    while time.time() < stop_at:
+        for rate, fn in ((args.open_rate, gen.open), (args.partial_rate, lambda: gen.close(True)),
+                         (args.modify_rate, gen.modify), (args.close_rate, lambda: gen.close(False))):
+            if rate > 0 and rng.random() < rate * tick:
+                fn()
+        time.sleep(tick)
+
+    stats["undetected"] = sum(len(v) for v in gen.pending.values())
+    stats["sim_calls"] = mt5_sim.stats()
+    stats["sim_events"] = mt5_sim.events()
+    _save(os.path.join(level_dir, "broadcaster.json"), stats)
+    os._exit(0)
+
+
+# ==========================================
+# 🏎️ EXECUTOR PROCESS (Mirror of the run_executor TURBO hybrid loop)
+# ==========================================
+def executor_process(args, level_dir, term_path, followers, ready, go):
+    mt5_sim.install()
+    mt5_sim.reset()
+    mt5_sim.configure(**sim_config(args, level_dir))
+    server = mt5_sim.CONFIG["default_server"]
+
+    fills = []
+    fills_lock = threading.Lock()
+    orig_send = mt5_sim.order_send
+    def order_send(request):
+        res = orig_send(request)
+        with fills_lock:
+            fills.append((time.time(), getattr(res, "retcode", None)))
+        return res
+    mt5_sim.order_send = order_send
+
+    if args.quiet: sys.stdout = open(os.devnull, "w")
+    sys.argv = ["executor.py", "--mode", "TURBO", "--mt5-path", term_path]
+    import executor
+    import hft_executor
+
+    slaves = [{
+        "login": FOLLOWER_LOGIN_BASE + i, "password": "sim", "server": server,
+        "terminal_path": term_path, "follower_id": f"bench-shared-follower-{i:04d}",
+        "invert_copy": False, "copy_mode": "FIXED", "allocation": 0.0, "risk_factor": 100.0,
+    } for i in range(followers)]
+    follower_creds = {"login": slaves[0]["login"], "password": "sim", "server": server}
+    master_creds = {"login": MASTER_LOGIN, "password": "sim", "server": server}
+
+    r = executor.r_client
+    pubsub = r.pubsub()
+    pubsub.subscribe(f"signals:master:{MASTER_ID}")
+
+    stats = {"signals": 0, "stale_dropped": 0, "burst_busy_dropped": 0, "verify_yields": 0,
+             "stream_skipped": 0, "master_pnl_skipped": 0, "fills": 0, "failed": 0,
+             "lock_wait_ms": [], "signal_delay_ms": [], "last_fill_delay_ms": [], "batch_ms": []}
+
+    ready.set()
+    go.wait()
+    t_go = time.time()
+    measure_from = t_go + args.warmup
+    stop_at = measure_from + args.duration
+    terminal_lock_held = False
+    last_activity = last_stream = last_master_pnl = 0.0
+
+    while time.time() < stop_at + args.drain:
+        measuring = time.time() >= measure_from
+        if measuring and not stats.get("_reset"):
+            mt5_sim.CALL_COUNTS.clear()
+            mt5_sim.EVENTS.clear()
+            stats["_reset"] = True
+
+        # 🤝 COOPERATIVE LOCKING: Yield to Verify Script (same check as run_executor)
+        if r.get(executor.LOCK_KEY_GLOBAL) == "LOCKED_VERIFY":
+            if measuring: stats["verify_yields"] += 1
+            mt5_sim.shutdown()
+            time.sleep(1.0)
+            continue
+
+        buffer = []
+        for _ in range(50):
+            m = pubsub.get_message(ignore_subscribe_messages=True)
+            if getattr(m, 'get', None) and m.get('type') == 'message':
+                buffer.append(m)
+            elif m is None:
+                break
+
+        for message in buffer:
+            signal = json.loads(message['data'])
+            bench = signal.pop("bench", {})
+            if time.time() - float(signal.get("timestamp", time.time())) > STALE_SIGNAL_S:
+                if measuring: stats["stale_dropped"] += 1
+                continue
+            if measuring: stats["signals"] += 1
+
+            should_run = terminal_lock_held
+            if not should_run:
+                t0 = time.time()
+                if executor.acquire_terminal_lock(timeout=5.0):
+                    terminal_lock_held = should_run = True
+                if measuring: stats["lock_wait_ms"].append((time.time() - t0) * 1000)
+            if not should_run:
+                if measuring: stats["burst_busy_dropped"] += 1
+                continue
+
+            with fills_lock:
+                mark = len(fills)
+            t_batch = time.time()
+            results = hft_executor.process_batch(slaves, signal)
+            last_activity = time.time()
+            with fills_lock:
+                batch = fills[mark:]
+            if not measuring: continue
+            stats["batch_ms"].append((last_activity - t_batch) * 1000)
+            t_action = bench.get("t_action", t_batch)
+            for t_fill, _ in batch:
+                stats["signal_delay_ms"].append((t_fill - t_action) * 1000)
+            if batch:
+                stats["last_fill_delay_ms"].append((batch[-1][0] - t_action) * 1000)
+            ok = sum(1 for res in results if res.get("status") == "success")
+            stats["fills"] += ok
+            stats["failed"] += len(results) - ok
+
+        now = time.time()
+
+        # 🌊 STREAMING PnL (try-lock, like run_executor)
+        if now - last_stream > STREAM_INTERVAL:
+            if terminal_lock_held:
+                executor.stream_positions_to_redis(executor.MY_FOLLOWER_ID)
+                last_stream = now
+            elif executor.acquire_terminal_lock(timeout=0.01):
+                try:
+                    executor.stream_positions_to_redis(executor.MY_FOLLOWER_ID)
+                    last_stream = now
+                finally:
+                    executor.release_terminal_lock()
+            elif measuring:
+                stats["stream_skipped"] += 1
+
+        # 📡 MASTER PnL TIME-SLICE (switch to master and back)
+        if args.master_pnl and now - last_master_pnl > MASTER_PNL_INTERVAL:
+            lock_acquired = terminal_lock_held or executor.acquire_terminal_lock(timeout=2.0)
+            if lock_acquired:
+                try:
+                    executor.stream_master_pnl_to_redis(MASTER_ID, master_creds, follower_creds)
+                    last_master_pnl = now
+                finally:
+                    if not terminal_lock_held: executor.release_terminal_lock()
+            elif measuring:
+                stats["master_pnl_skipped"] += 1
+
+        # 🛡️ BURST MODE LOCK RELEASE
+        if terminal_lock_held and not buffer and time.time() - last_activity > BURST_WINDOW:
+            executor.release_terminal_lock()
+            terminal_lock_held = False
+
+        time.sleep(0.01)
+
+    stats.pop("_reset", None)
+    stats["sim_calls"] = mt5_sim.stats()
+    stats["sim_events"] = mt5_sim.events()
+    _save(os.path.join(level_dir, "executor.json"), stats)
+    os._exit(0)
+
+
+# ==========================================
+# 🔑 VERIFY RUNS (Real verify.py subprocesses)
+# ==========================================
+def run_verifies(args, level_dir, term_path, start, stop_at, out):
+    env = dict(os.environ, **sim_env(args, level_dir))
+    k = 0
+    next_run = start + args.warmup + args.verify_interval / 2
+    while time.time() < stop_at:
+        if time.time() < next_run:
+            time.sleep(0.05)
+            continue
+        next_run += args.verify_interval
+        cmd = [sys.executable, os.path.join(ENGINE_DIR, "verify.py"), "--login", str(VERIFY_LOGIN_BASE + k),
+               "--password", "sim", "--server", mt5_sim.CONFIG["default_server"], "--mt5-path", term_path]
+        k += 1
+        t0 = time.time()
+        proc = subprocess.run(cmd, env=env, cwd=ENGINE_DIR, capture_output=True, text=True)
+        ok = False
+        for line in reversed(proc.stdout.strip().splitlines()):
+            try:
+                ok = bool(json.loads(line).get("success"))
+                break
+            except: pass
+        out.append({"duration_ms": (time.time() - t0) * 1000, "success": ok})
+
+
+# ==========================================
+# 📈 ONE LEVEL (N followers)
+# ==========================================
+def run_level(args, followers):
+    import redis
+    level_dir = tempfile.mkdtemp(prefix=f"shared_term_{followers}_")
+    term_path = os.path.join(level_dir, "Shared MT5", "terminal64.exe")
+    os.makedirs(os.path.dirname(term_path))
+    open(term_path, "w").close()
+
+    r = redis.from_url(args.redis_url, decode_responses=True)
+    for key in (lock_key_for(term_path), f"state:master:{MASTER_ID}:tickets", f"state:master:{MASTER_ID}:ready"):
+        r.delete(key)
+    if r.get("lock:terminal:global") == "LOCKED_VERIFY": r.delete("lock:terminal:global")
+
+    ctx = multiprocessing.get_context("fork")
+    ready_b, ready_e, go = ctx.Event(), ctx.Event(), ctx.Event()
+    procs = [
+        ctx.Process(target=broadcaster_process, args=(args, level_dir, term_path, ready_b, go), daemon=True),
+        ctx.Process(target=executor_process, args=(args, level_dir, term_path, followers, ready_e, go), daemon=True),
+    ]
+    for p in procs: p.start()
+    ready_b.wait(60)
+    ready_e.wait(60)
+
+    go.set()
+    start = time.time()
+    stop_at = start + args.warmup + args.duration
+    verifies = []
+    if args.verify_interval > 0:
+        run_verifies(args, level_dir, term_path, start, stop_at, verifies)
+    for p in procs: p.join(args.warmup + args.duration + args.drain + 30)
+
+    def load(name):
+        try:
+            with open(os.path.join(level_dir, name)) as f: return json.load(f)
+        except: return {}
+    bc, ex = load("broadcaster.json"), load("executor.json")
+    shutil.rmtree(level_dir, ignore_errors=True)
+
+    delays = ex.get("signal_delay_ms", [])
+    level = {
+        "followers": followers,
+        "signals_emitted": bc.get("signals", 0),
+        "signals_executed": ex.get("signals", 0),
+        "fills": ex.get("fills", 0),
+        "failed": ex.get("failed", 0),
+        "signal_delay_ms": percentiles(delays),
+        "last_fill_delay_ms": percentiles(ex.get("last_fill_delay_ms", [])),
+        "detection_delay_ms": percentiles(bc.get("detection_ms", [])),
+        "batch_ms": percentiles(ex.get("batch_ms", [])),
+        "executor_lock_wait_ms": percentiles(ex.get("lock_wait_ms", [])),
+        "broadcaster_reacquire_wait_ms": percentiles(bc.get("reacquire_wait_ms", [])),
+        "burst_busy_dropped": ex.get("burst_busy_dropped", 0),
+        "stale_dropped": ex.get("stale_dropped", 0),
+        "stream_skipped": ex.get("stream_skipped", 0),
+        "master_pnl_skipped": ex.get("master_pnl_skipped", 0),
+        "broadcaster_yields": bc.get("yields", 0),
+        "broadcaster_lock_pauses": bc.get("lock_pauses", 0),
+        "broadcaster_verify_pauses": bc.get("verify_pauses", 0),
+        "executor_verify_yields": ex.get("verify_yields", 0),
+        "forced_shutdowns": {"broadcaster": bc.get("sim_calls", {}).get("shutdown", 0),
+                             "executor": ex.get("sim_calls", {}).get("shutdown", 0)},
+        "login_switches": {"broadcaster": bc.get("sim_events", {}).get("login_switch", 0),
+                           "executor": ex.get("sim_events", {}).get("login_switch", 0)},
+        "foreign_order_sends": ex.get("sim_events", {}).get("foreign_order_send", 0),
+        "undetected": bc.get("undetected", 0),
+        "verify": {"runs": len(verifies), "ok": sum(1 for v in verifies if v["success"]),
+                   "duration_ms": percentiles([v["duration_ms"] for v in verifies])},
+    }
+    p95 = level["signal_delay_ms"].get("p95")
+    level["meets_target"] = bool(p95 is not None and p95 <= args.target_ms)
+    return level
+
+
+def run(args):
+    import redis
+    if "localhost" not in args.redis_url and "127.0.0.1" not in args.redis_url:
+        print("[BENCH] 🛑 Refusing to run against a non-local Redis.")
+        sys.exit(1)
+    redis.from_url(args.redis_url).ping()
+    os.environ.update(sim_env(args, ""))
+
+    levels = []
+    for n in [int(x) for x in args.followers.split(",") if x.strip()]:
+        print(f"[BENCH] 🔒 Shared terminal: 1 master + {n} followers ({args.duration}s)...")
+        level = run_level(args, n)
+        levels.append(level)
+        d = level["signal_delay_ms"]
+        print(f"[BENCH]    delay p50={d.get('p50')}ms p95={d.get('p95')}ms | lock wait p95="
+              f"{level['executor_lock_wait_ms'].get('p95')}ms | dropped={level['burst_busy_dropped']} "
+              f"| switches={level['login_switches']} | {'✅' if level['meets_target'] else '❌'}")
+
+    knee = next((lv["followers"] for lv in levels if not lv["meets_target"]), None)
+    return {
+        "created": datetime.now().isoformat(),
+        "config": vars(args),
+        "target_ms": args.target_ms,
+        "knee_followers": knee,
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hydra Shared-Terminal Contention Simulator')
+    parser.add_argument('--followers', type=str, default="1,2,5,10,20", help='Comma-separated follower counts to sweep')
+    parser.add_argument('--duration', type=float, default=60.0, help='Measured seconds per level')
+    parser.add_argument('--warmup', type=float, default=10.0, help='Seconds before measuring (initial sync)')
+    parser.add_argument('--drain', type=float, default=10.0, help='Executor seconds after the measured window')
+    parser.add_argument('--target-ms', type=float, default=1500.0, help='p95 master action -> follower fill target')
+    parser.add_argument('--positions', type=int, default=10)
+    parser.add_argument('--open-rate', type=float, default=0.2)
+    parser.add_argument('--partial-rate', type=float, default=0.05)
+    parser.add_argument('--modify-rate', type=float, default=0.1)
+    parser.add_argument('--close-rate', type=float, default=0.2)
+    parser.add_argument('--verify-interval', type=float, default=30.0, help='Seconds between verify.py runs (0 = off)')
+    parser.add_argument('--no-master-pnl', dest='master_pnl', action='store_false', help='Skip the master PnL time-slice')
+    parser.add_argument('--redis-url', type=str, default=os.getenv("BENCH_REDIS_URL", "redis://localhost:6379"), help='LOCAL Redis (verify.py uses db 0)')
+    parser.add_argument('--ipc-ms', type=float, default=0.3)
+    parser.add_argument('--login-ms', type=float, default=250.0)
+    parser.add_argument('--fill-ms', type=float, default=15.0)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--quiet', action='store_true', help='Swallow engine console output')
+    parser.add_argument('--out', type=str, default="", help='JSON output path (default bench_results/...)')
+    args = parser.parse_args()
+
+    report = run(args)
+
+    out = args.out or os.path.join("bench_results", f"shared_terminal_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    if os.path.dirname(out): os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'followers':>10}{'p50':>10}{'p95':>10}{'lock p95':>10}{'dropped':>9}{'yields':>8}{'shutdn':>8}{'foreign':>9}")
+    for lv in report["levels"]:
+        d, w = lv["signal_delay_ms"], lv["executor_lock_wait_ms"]
+        shut = sum(lv["forced_shutdowns"].values())
+        print(f"{lv['followers']:>10}{str(d.get('p50', '-')):>10}{str(d.get('p95', '-')):>10}{str(w.get('p95', '-')):>10}"
+              f"{lv['burst_busy_dropped']:>9}{lv['broadcaster_yields']:>8}{shut:>8}{lv['foreign_order_sends']:>9}")
+    knee = report["knee_followers"]
+    print(f"[BENCH] 🎯 Knee ({args.target_ms}ms p95): {knee if knee is not None else 'not reached'} followers")
+    print(f"[BENCH] 💾 Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
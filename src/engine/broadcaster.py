@@ -1,5 +1,6 @@
 
-import MetaTrader5 as mt5
+import mt5_backend
+mt5 = mt5_backend.load() # 🔌 MetaTrader5 / mt5_sim (MT5_BACKEND), opt-in profiler (MT5_PROFILE)
 import time
 import requests
 import json
@@ -7,12 +8,16 @@ import os
 from dotenv import load_dotenv
 load_dotenv() # 📥 Load .env file
 from datetime import datetime, timedelta
+import metrics # 📈 Prometheus-style telemetry
+import tracing # 🧵 Signal trace ids + stage timestamps
+from market_watch import MarketWatch # 🧹 Keep master symbols in Market Watch
 # ⚙️ GLOBAL REDIS
 import redis
 
 # 🔒 STRICT POOLING
 pool = redis.ConnectionPool.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), max_connections=5, decode_responses=True)
 r_client = redis.Redis(connection_pool=pool)
+MARKET_WATCH = MarketWatch(r_client) # 🧹 Master symbols stay selected (touched every 60s)
 
 import atexit
 def cleanup():
@@ -29,6 +34,8 @@ parser.add_argument('--secret', type=str, default=os.getenv("API_SECRET"), help=
 
 parser.add_argument('--sync-history', type=int, default=0, help='Days of history to sync on startup (0 to disable)')
 parser.add_argument('--exit-after-sync', action='store_true', help='Exit process after history sync complete')
+parser.add_argument('--profile', action='store_true', help='Sampling profiler (all threads, .folded output) + loop stall detector')
+parser.add_argument('--stall-budget-ms', type=float, default=750, help='Poll iteration budget before a stall is logged (--profile). Includes the 0.5s yield pause.')
 
 args = parser.parse_args()
 
@@ -201,6 +208,7 @@ BASE_URL = find_server()
 WEBHOOK_URL = f"{BASE_URL}/api/webhook/signal" 
 BROKER_API_URL = f"{BASE_URL}/api/user/broker"
 POLL_INTERVAL = 0.05 
+LAST_SCAN_TS = [0.0] # 🧵 Wall time of the last valid positions scan (trace "scan" stage)
 
 # USER IDENTITY
 USER_ID = args.user_id
@@ -320,6 +328,11 @@ def initialize_mt5():
 
 def follow_signals():
     print(f"[START] Broadcaster Started. Watching Trades for Master {MASTER_ID}...")
+    metrics.serve("broadcaster")
+    loop_beat = lambda: None
+    if args.profile:
+        import loop_profiler
+        loop_beat = loop_profiler.start("broadcaster", "follow_signals", args.stall_budget_ms) # 🩺 Profile Mode
     
     # 🧹 ZOMBIE CLEANUP: Clear any stale state from previous (crashed) sessions
     # This prevents Followers from seeing "Ghost" trades if we restart with 0 positions.
@@ -371,13 +384,16 @@ def follow_signals():
                      "timestamp": time.time(),
                      "count": len(known_positions)
                 }
-                r_client.set(state_key_pos, json.dumps(state_payload, default=str))
+                with metrics.REDIS_CALL.time(op="flush_state"):
+                    r_client.set(state_key_pos, json.dumps(state_payload, default=str))
                 # print(f"   [SYNC] 💾 Flushed State ({len(known_positions)} positions, PnL: {unrealized_pnl:.2f})")
             except Exception as e:
                 print(f"   [WARN] Failed to flush state: {e}")
 
 
     while True:
+        loop_beat()
+        t_iter = time.perf_counter()
         try:
             # 🛡️ TERMINAL MUTEX CHECK
             # Before accessing MT5 or checking login, ensure we are not interrupting an Executor
@@ -526,6 +542,7 @@ def follow_signals():
 
             # Convert struct tuple to list for easier handling
             current_positions = list(current_positions_tuple)
+            LAST_SCAN_TS[0] = time.time()
             current_tickets = {p.ticket for p in current_positions}
             
             # --- 0. INITIAL SYNC (Guarded) ---
@@ -929,6 +946,8 @@ def follow_signals():
 
             # 📊 ANALYTICS: Report Equity Snapshot (Every 60s)
             if time.time() - last_equity_report > 60:
+                # 🧹 Master's traded symbols stay selected on this terminal (executor sweeps the rest)
+                MARKET_WATCH.touch(mt5_path, *{p.symbol for p in current_positions})
                 acct = mt5.account_info()
                 if acct:
                     # Send Snapshot
@@ -945,6 +964,8 @@ def follow_signals():
                     except Exception as e:
                         print(f"   [WARN] Failed to report snapshot: {e}")
 
+            metrics.POLL_SECONDS.observe(time.perf_counter() - t_iter)
+
             # 5. Sleep
             # 5. Sleep & HEARTBEAT
             if r_client:
@@ -1029,7 +1050,8 @@ def push_to_queue(payload):
         target_queue = QUEUE_PRIORITY
         
         # 3. Push to Redis List (Right Push)
-        r_client.rpush(target_queue, json.dumps(payload))
+        with metrics.REDIS_CALL.time(op="rpush_queue"):
+            r_client.rpush(target_queue, json.dumps(payload))
         # print(f"    -> Queued to {target_queue}")
         
     except Exception as e:
@@ -1041,20 +1063,31 @@ def send_signal(payload):
         if 'timestamp' not in payload:
             payload['timestamp'] = time.time()
 
+        # 🧵 TRACE: id + scan/detect/publish stamps travel with the payload
+        trace = tracing.start(payload, LAST_SCAN_TS[0])
+        tracing.stamp(trace, "publish")
+
         # 1. ⚡ REDIS PUB/SUB (Real-Time for UI/WebSockets)
         json_payload = json.dumps(payload)
+        metrics.SIGNALS_EMITTED.inc(action=payload.get('action', 'OPEN'))
         if r_client:
-            r_client.publish(f"signals:master:{MASTER_ID}", json_payload)
+            with metrics.REDIS_CALL.time(op="publish"):
+                r_client.publish(f"signals:master:{MASTER_ID}", json_payload)
         
         # 2. 🧱 HYDRA QUEUE (Reliable Execution)
         push_to_queue(payload)
         
         # 3. 📝 AUDIT LOG
         if r_client:
-            r_client.xadd('stream:signals', { 'payload': json_payload, 'timestamp': str(time.time()) })
+            with metrics.REDIS_CALL.time(op="xadd"):
+                r_client.xadd('stream:signals', { 'payload': json_payload, 'timestamp': str(time.time()) })
+        tracing.emit(trace, "detect", component="broadcaster", master_id=MASTER_ID,
+                     ticket=payload.get('ticket'), action=payload.get('action', 'OPEN'))
         
         # 4. 🕸️ SYNC TO DATABASE (Critical for History/UI)
-        requests.post(WEBHOOK_URL, json=payload, headers={"x-bridge-secret": API_SECRET}, timeout=1)
+        t_http = time.perf_counter()
+        resp = requests.post(WEBHOOK_URL, json=payload, headers={"x-bridge-secret": API_SECRET}, timeout=1)
+        metrics.HTTP_CALL.observe(time.perf_counter() - t_http, endpoint="webhook_signal", status=resp.status_code)
 
         print(f"   [🚀] Signal Pushed to System (Ticket: {payload['ticket']})")
 
@@ -7,6 +7,8 @@ import threading
 import psycopg2
 from collections import defaultdict
 from datetime import datetime
+import metrics # 📈 Prometheus-style telemetry
+import tracing # 🧵 Signal trace ids + stage timestamps
 
 # ⚙️ CONFIGURATION
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
@@ -46,8 +48,9 @@ def fetch_followers_for_master(master_id):
               AND s."isActive" = true
               AND b."status" = 'CONNECTED'
         """
-        cur.execute(query, (master_id,))
-        rows = cur.fetchall()
+        with metrics.DB_CALL.time(op="fetch_followers"):
+            cur.execute(query, (master_id,))
+            rows = cur.fetchall()
         
         followers = []
         for r in rows:
@@ -69,6 +72,7 @@ def fetch_followers_for_master(master_id):
 
 def dispatch_loop():
     print(f"[DISPATCHER] 🚦 Started. Listening on {QUEUE_PRIORITY}, {QUEUE_NORMAL}...")
+    metrics.serve("dispatcher")
     
     while True:
         try:
@@ -81,6 +85,8 @@ def dispatch_loop():
                 
             queue_name, payload_json = result
             task = json.loads(payload_json)
+            metrics.SIGNALS_RECEIVED.inc(action=task.get('action', 'OPEN'))
+            tracing.stamp(task.get('trace'), "dispatch")
             
             print(f"[DISPATCHER] 📨 Received Task from {queue_name}: {task.get('action')} {task.get('ticket')}")
 
@@ -88,6 +94,7 @@ def dispatch_loop():
             # Timestamp should be in Payload
             job_ts = task.get("timestamp", 0)
             if time.time() - job_ts > 5.0:
+                metrics.SIGNALS_STALE.inc()
                 print(f"[DISPATCHER] 🗑️ Dropped Stale Task (Lag: {time.time() - job_ts:.2f}s)")
                 continue
 
@@ -120,13 +127,17 @@ def dispatch_loop():
                 # 🔍 ROUTING LOOKUP: Where is this user hosted?
                 # We expect a Redis Hash "hydra:routing:map" where Key=UserID, Value=ContainerID
                 # Default to "node-default" if not found
-                container_id = r_client.hget("hydra:routing:map", f_id) or "node-default"
+                with metrics.REDIS_CALL.time(op="routing_lookup"):
+                    container_id = r_client.hget("hydra:routing:map", f_id) or "node-default"
                 
                 # Group Key: (Container, Bot)
                 batch_key = (container_id, bot_key)
                 batch_map[batch_key].append(f)
 
             # 5. 🚀 ROUTE TO WORKERS
+            tracing.stamp(task.get('trace'), "route")
+            tracing.emit(task.get('trace'), "dispatch", component="dispatcher", master_id=master_id,
+                         ticket=task.get('ticket'), action=task.get('action'), followers=len(followers))
             for (node_id, bot_key), follower_batch in batch_map.items():
                 worker_payload = {
                     "master_task": task,
@@ -138,7 +149,8 @@ def dispatch_loop():
                 # Format: queue:worker:{NODE_ID}:{BOT_ID}
                 queue_key = f"{QUEUE_WORKER_PREFIX}{node_id}:{bot_key}"
                 
-                r_client.rpush(queue_key, json.dumps(worker_payload))
+                with metrics.REDIS_CALL.time(op="rpush_worker"):
+                    r_client.rpush(queue_key, json.dumps(worker_payload))
                 print(f"[DISPATCHER] ➡️ Routed Batch ({len(follower_batch)} users) to {node_id}::{bot_key}")
 
         except Exception as e:
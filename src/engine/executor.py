@@ -1,5 +1,6 @@
 
-import MetaTrader5 as mt5
+import mt5_backend
+mt5 = mt5_backend.load() # 🔌 MetaTrader5 / mt5_sim (MT5_BACKEND), opt-in profiler (MT5_PROFILE)
 import time
 import requests
 import json
@@ -15,8 +16,13 @@ import hashlib
 import threading
 import traceback
 import sys
+import metrics # 📈 Prometheus-style telemetry
+import tracing # 🧵 Signal trace ids + stage timestamps
+from symbol_cache import SymbolCache # 🗂️ Per-server symbol resolution cache
+from symbol_catalog import CatalogRegistry # 📚 symbols_get() index
 import atexit
-from hft_executor import process_batch, MT5_GLOBAL_LOCK
+from hft_executor import process_batch, stream_sessions, MT5_GLOBAL_LOCK, MARKET_WATCH, SPECS, MARGIN_MODEL, SUBMITTER, ACCOUNT_STATE
+import market_watch # 🧹 Market Watch hygiene
 
 def cleanup_resources():
     print("[CLEANUP] Closing Redis & DB resources...")
@@ -79,6 +85,8 @@ parser.add_argument('--secret', type=str, help='Bridge API Secret', default=os.g
 DEFAULT_VANTAGE_PATH = r"C:\Program Files\Vantage International MT5\terminal64.exe"
 parser.add_argument('--mt5-path', type=str, help='Specific MT5 Terminal Path', default=os.getenv("MT5_PATH", DEFAULT_VANTAGE_PATH))
 parser.add_argument('--dry-run', action='store_true', help='Disable trade execution')
+parser.add_argument('--profile', action='store_true', help='Sampling profiler (all threads, .folded output) + loop stall detector')
+parser.add_argument('--stall-budget-ms', type=float, default=250, help='Main loop iteration budget before a stall is logged (--profile)')
 
 args = parser.parse_args()
 
@@ -150,21 +158,34 @@ def acquire_terminal_lock(timeout=0.1, ttl=30):
         try:
             # NX=True (Only set if not exists), EX=ttl (Expire in ttl seconds)
             if r_client.set(LOCK_KEY_GLOBAL, "LOCKED_EXECUTOR", nx=True, ex=ttl):
+                metrics.LOCK_WAIT.observe(time.time() - start_time, acquired="true")
                 return True
         except:
             return True # Fail open if Redis dies?
 
         # If timeout is 0 or negative, return result of first attempt immediately
         if timeout <= 0:
+            metrics.LOCK_WAIT.observe(time.time() - start_time, acquired="false")
             return False
             
         # Check timeout
         if (time.time() - start_time) > timeout:
+            metrics.LOCK_WAIT.observe(time.time() - start_time, acquired="false")
             return False
             
         # Wait a bit before retrying (Busy Wait Prevention)
         time.sleep(0.1)
 
+def refresh_terminal_lock(ttl=30):
+    """Extends our terminal lock (long runs such as reconcile sessions). False if we no longer hold it."""
+    if not r_client: return True
+    try:
+        if r_client.get(LOCK_KEY_GLOBAL) == "LOCKED_EXECUTOR":
+            return bool(r_client.expire(LOCK_KEY_GLOBAL, ttl))
+        return False
+    except:
+        return True
+
 def release_terminal_lock():
     if r_client:
         try:
@@ -196,7 +217,47 @@ SYNONYM_GROUPS = [
     ["XBRUSD", "UKOIL", "BRENT", "CO"]
 ]
 
-def normalize_symbol(input_symbol):
+SYMBOL_SUFFIXES = ["", "m", "c", "b", "z", ".m", ".c", ".s", ".std", ".pro", ".r", "_i", ".p", ".ecn", "#", "ft", "ft.r", ".t"]
+SYMBOL_PREFIXES = ["m", "M", "i", "pro.", ".", "#", "b"]
+
+# 🔗 FUTURES ROOTS MAP
+# If Input is Spot (XAUUSD), try these Futures Roots
+FUTURES_ROOTS = {
+    "XAUUSD": ["GC", "MGC", "QO", "GOLD"],
+    "GOLD": ["GC", "MGC", "QO"],
+    "US500": ["ES", "MES"],
+    "US100": ["NQ", "MNQ"],
+    "US30": ["YM", "MYM"],
+    "XTIUSD": ["CL", "QM", "MCL"],
+    "USOIL": ["CL", "QM", "MCL"],
+    # Add TFEX/Others
+    "SET50": ["S50"] 
+}
+
+SYMBOL_CACHE = SymbolCache("executor", r_client)
+SYMBOL_CATALOG = CatalogRegistry(SYMBOL_SUFFIXES, SYMBOL_PREFIXES, SYNONYM_GROUPS, FUTURES_ROOTS)
+
+def normalize_symbol(input_symbol, server=None):
+    """
+    Cached front for symbol resolution, keyed by (broker server, symbol).
+    Misses resolve against the symbols_get() catalog (dict lookups + one symbol_select).
+    Falls back to the resolve_symbol() probe only if the catalog cannot be loaded.
+    """
+    if not input_symbol: return None
+    if server is None:
+        info = mt5.account_info()
+        server = info.server if info else ""
+
+    def from_catalog(raw):
+        found, loaded = SYMBOL_CATALOG.resolve(server, raw, mt5.symbols_get)
+        if not loaded: return resolve_symbol(raw)
+        return found if found and mt5.symbol_select(found, True) else None
+
+    symbol = SYMBOL_CACHE.resolve(server, input_symbol.upper().strip(), from_catalog, mt5.symbol_select)
+    if symbol: MARKET_WATCH.touch(MT5_PATH_ARG, symbol)
+    return symbol
+
+def resolve_symbol(input_symbol):
     """
     Robustly finds the correct tradable symbol on the current terminal.
     1. Direct Check (Fastest).
@@ -211,7 +272,7 @@ def normalize_symbol(input_symbol):
         return clean_input
         
     # Helpers
-    suffixes = ["", "m", "c", "b", "z", ".m", ".c", ".s", ".std", ".pro", ".r", "_i", ".p", ".ecn", "#", "ft", "ft.r", ".t"]
+    suffixes = SYMBOL_SUFFIXES
     
     def try_suffixes(base):
         for s in suffixes:
@@ -249,20 +310,6 @@ def normalize_symbol(input_symbol):
                     if found: return found
         return None
 
-    # 🔗 FUTURES ROOTS MAP
-    # If Input is Spot (XAUUSD), try these Futures Roots
-    FUTURES_ROOTS = {
-        "XAUUSD": ["GC", "MGC", "QO", "GOLD"],
-        "GOLD": ["GC", "MGC", "QO"],
-        "US500": ["ES", "MES"],
-        "US100": ["NQ", "MNQ"],
-        "US30": ["YM", "MYM"],
-        "XTIUSD": ["CL", "QM", "MCL"],
-        "USOIL": ["CL", "QM", "MCL"],
-        # Add TFEX/Others
-        "SET50": ["S50"] 
-    }
-
     # 2. Try Suffixes on Input (e.g. Input "GOLD" -> Found "GOLD.std")
     found = try_suffixes(clean_input)
     if found: return found
@@ -292,7 +339,7 @@ def normalize_symbol(input_symbol):
             if future_found: return future_found
 
     # 4. Fallback: Prefix/Suffix Strip
-    prefixes = ["m", "M", "i", "pro.", ".", "#", "b"]
+    prefixes = SYMBOL_PREFIXES
     base_candidates = [clean_input]
     
     for s in suffixes:
@@ -323,12 +370,12 @@ def normalize_symbol(input_symbol):
 
     return None # Not found
 
-def normalize_trade_params(symbol, volume, price=0.0, sl=0.0, tp=0.0):
+def normalize_trade_params(symbol, volume, price=0.0, sl=0.0, tp=0.0, server=None):
     """
     Auto-calculates correct Volume and Rounds Price/SL/TP to broker precision.
     Returns: (vol, price, sl, tp)
     """
-    info = mt5.symbol_info(symbol)
+    info = SPECS.get(server, symbol, mt5.symbol_info)
     if not info: return volume, price, sl, tp
     
     # 1. Volume Normalization
@@ -361,7 +408,7 @@ def normalize_trade_params(symbol, volume, price=0.0, sl=0.0, tp=0.0):
 def get_broker_url(host):
     return f"http://{host}:{PORT}/api/user/broker"
 
-def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, symbol="EURUSD"):
+def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, symbol="EURUSD", server=None):
     """
     🧮 PRO-RATA + RISK GUARD CALCULATION
     Uses MT5 Native Margin Calculation for precision.
@@ -371,7 +418,7 @@ def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, s
     raw_lot = master_lot_size * multiplier
     
     # 2. Broker Limits (Min/Max/Step)
-    sym_info = mt5.symbol_info(symbol)
+    sym_info = SPECS.get(server, symbol, mt5.symbol_info)
     if not sym_info:
         return round(raw_lot, 2)
         
@@ -388,11 +435,13 @@ def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, s
     
     # 3. Margin Safety Check (Native MT5)
     needed_margin = 0.0
-    price = sym_info.ask
+    tick = mt5.symbol_info_tick(symbol)
+    price = tick.ask if tick else 0.0
     
-    # Try Native Calc first (Best Limit)
+    # Try Native Calc first (Best Limit) - served by the learned margin model when it is warm
+    calc_margin = lambda lots: mt5.order_calc_margin(mt5.ORDER_TYPE_BUY, symbol, lots, price)
     try:
-        margin_native = mt5.order_calc_margin(mt5.ORDER_TYPE_BUY, symbol, final_lot, price)
+        margin_native = MARGIN_MODEL.margin(server, symbol, leverage, final_lot, price, calc_margin)
         if margin_native:
             needed_margin = margin_native
         else:
@@ -423,7 +472,7 @@ def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, s
             # 🛑 FORCE MIN LOT?
             min_margin = 0.0
             try:
-                min_margin = mt5.order_calc_margin(mt5.ORDER_TYPE_BUY, symbol, min_lot, price)
+                min_margin = MARGIN_MODEL.margin(server, symbol, leverage, min_lot, price, calc_margin)
             except: 
                 min_margin = (min_lot * (100 if "XAU" in symbol else 100000) * price) / 500
 
@@ -491,8 +540,9 @@ def fetch_subscriptions(follower_id=None):
                   AND cs."executionLane" = 'STANDARD'
                   AND u."role" != 'MASTER'
             """
-            cur.execute(query)
-            rows = cur.fetchall()
+            with metrics.DB_CALL.time(op="fetch_subscriptions"):
+                cur.execute(query)
+                rows = cur.fetchall()
             
             batch_subs = {} 
             for row in rows:
@@ -539,8 +589,9 @@ def fetch_subscriptions(follower_id=None):
                 WHERE cs."isActive" = true
                   AND u."role" != 'MASTER' -- 🛑 RULE: Master cannot follow
             """
-            cur.execute(query)
-            rows = cur.fetchall()
+            with metrics.DB_CALL.time(op="fetch_subscriptions"):
+                cur.execute(query)
+                rows = cur.fetchall()
             
             batch_subs = {} 
             for row in rows:
@@ -595,8 +646,9 @@ def fetch_subscriptions(follower_id=None):
                   AND "isActive" = true
                   AND ("expiry" IS NULL OR "expiry" > NOW() - INTERVAL '1 DAY') 
             """
-            cur.execute(query, (follower_id,))
-            rows = cur.fetchall()
+            with metrics.DB_CALL.time(op="fetch_subscriptions"):
+                cur.execute(query, (follower_id,))
+                rows = cur.fetchall()
             # print(f"[DEBUG] DB Query Result for {follower_id}: {rows}")
             # row: 0=mid, 1=cfg, 2=expiry, 3=riskFactor, 4=invertCopy, 5=createdAt, 6=allocation
             return {
@@ -618,6 +670,39 @@ def fetch_subscriptions(follower_id=None):
     finally:
         close_db_connection(conn)
 
+def fetch_master_symbol_universe(master_id, limit=25):
+    """
+    Symbols a master actually trades (most traded first):
+    TradeHistory (last 90 days) + open positions in the state:master snapshot.
+    """
+    symbols = []
+    conn = get_db_connection()
+    if conn:
+        try:
+            cur = conn.cursor()
+            with metrics.DB_CALL.time(op="master_symbols"):
+                cur.execute("""
+                    SELECT "symbol", COUNT(*) FROM "TradeHistory"
+                    WHERE "masterId" = %s AND "closeTime" > NOW() - INTERVAL '90 days'
+                    GROUP BY "symbol" ORDER BY COUNT(*) DESC LIMIT %s
+                """, (master_id, limit))
+                symbols = [row[0] for row in cur.fetchall() if row[0]]
+            cur.close()
+        except Exception as e:
+            print(f"[WARN] Master symbol history failed: {e}")
+        finally:
+            close_db_connection(conn)
+
+    if r_client:
+        try:
+            blob = r_client.get(f"state:master:{master_id}:tickets")
+            if blob:
+                positions = json.loads(blob).get("positions", {}) or {}
+                live = [p.get("symbol") for p in positions.values() if isinstance(p, dict)]
+                symbols = [s for s in live if s] + symbols
+        except: pass
+    return list(dict.fromkeys(symbols))[:limit]
+
 # 🧠 CREDENTIAL CACHE (TTL)
 CRED_CACHE = {} # { user_id: { "data": {}, "expiry": datetime } }
 CRED_CACHE_TTL = 60 # Seconds
@@ -642,7 +727,9 @@ def fetch_credentials(target_user_id=None):
     for host in HOSTS:
         url = get_broker_url(host)
         try:
+            t_http = time.perf_counter()
             res = requests.get(url, headers={"x-bridge-secret": BRIDGE_SECRET, "x-user-id": use_id}, timeout=3)
+            metrics.HTTP_CALL.observe(time.perf_counter() - t_http, endpoint="broker", status=res.status_code)
             if res.status_code == 200:
                 print(f"   [OK] Found credentials at {host}")
                 data = res.json()
@@ -920,10 +1007,12 @@ def is_within_trading_hours(time_config):
 RESET_HOUR = 4 # 04:00 AM UTC (NY Close)
 
 
-def close_session_trades(master_id, reason="Session Expired"):
+def close_session_trades(master_id, reason="Session Expired", followers=None):
     """
     🛑 FORCE CLOSE logic for Expired Sessions.
     Closes all open positions associated with the given Master ID.
+    followers (BATCH/TURBO): follower IDs to close for, one HFT session (one login) per follower.
+    Without it, only the account the terminal is logged into is closed.
     """
     print(f"[🛑] Force Closing trades for Master {master_id} (Reason: {reason})...")
     
@@ -948,6 +1037,42 @@ def close_session_trades(master_id, reason="Session Expired"):
              print(f"   [ℹ️] No active signals known for Master {master_id}.")
              return
 
+        # 🧩 MASS EXPIRY: every ticket of a follower closed in one session (not one switch per trade)
+        if followers and EXECUTION_MODE in ['BATCH', 'TURBO']:
+            positions = state.get("positions") if isinstance(state.get("positions"), dict) else {}
+            sessions = {}
+            for fid in followers:
+                creds = fetch_credentials(fid)
+                if not creds: continue
+                slave = {
+                    "follower_id": fid,
+                    "login": creds['login'],
+                    "password": creds['password'],
+                    "server": creds['server'],
+                    "terminal_path": MT5_PATH_ARG,
+                    "target_ticket": 0 # Worker resolves map:ticket:{master}:{follower}
+                }
+                for t_id in sorted(master_tickets):
+                    add_session_action(sessions, slave, {
+                        "action": "CLOSE",
+                        "masterId": master_id,
+                        "ticket": t_id,
+                        "symbol": (positions.get(t_id) or {}).get('symbol', '*'),
+                        "pct": 1.0,
+                        "id": f"EXP-CLOSE-{t_id}-{int(time.time())}"
+                    })
+
+            by_signal = {}
+            for sig, r in run_sessions(sessions):
+                if sig: by_signal.setdefault(sig['id'], (sig, []))[1].append(r)
+            closed_count = 0
+            l_map = session_login_map(sessions)
+            for sig, results in by_signal.values():
+                closed_count += sum(1 for r in results if r.get('status') == 'success')
+                process_execution_report(results, sig, l_map)
+            print(f"   [✅] Closed {closed_count} positions for Master {master_id} ({len(sessions)} followers).")
+            return
+
         # 2. Scan Local Positions
         local_positions = mt5.positions_get()
         if not local_positions: return
@@ -961,6 +1086,7 @@ def close_session_trades(master_id, reason="Session Expired"):
                     if t_id in master_tickets:
                         # MATCH! Close it.
                         print(f"   [CLOSING] Expired Trade: {pos.symbol} (Ticket: {t_id})")
+                        mt5.symbol_select(pos.symbol, True) # 🧹 Market Watch sweeps may have hidden it
                         
                         req = {
                             "action": mt5.TRADE_ACTION_DEAL,
@@ -1527,7 +1653,7 @@ def execute_trade(signal, api_url, follower_id=None):
                 "magic": 234000,
                 "comment": f"Close {target_master_ticket}",
             }
-            res = mt5.order_send(req)
+            res = SUBMITTER.send(mt5, req, creds.get('server') if creds else None)
             if res.retcode == mt5.TRADE_RETCODE_DONE:
                 print(f"   [OK] Closed {target_pos.symbol} (Ticket: {res.order}) matched to Master {target_master_ticket}")
                 send_ack(api_url, signal_id, "EXECUTED", res.order, "Closed")
@@ -1645,7 +1771,7 @@ def execute_trade(signal, api_url, follower_id=None):
     # Calculate Safe Lot
     acct = mt5.account_info()
     if acct:
-        safe_vol = calculate_safe_lot(float(volume), acct.equity, acct.leverage, risk_factor, symbol)
+        safe_vol = calculate_safe_lot(float(volume), acct.equity, acct.leverage, risk_factor, symbol, server=acct.server)
         if safe_vol <= 0:
             print(f"   [SKIP] Safe Lot is 0.0 (Margin/Risk). Skipping.")
             send_ack(api_url, signal_id, "FAILED", 0, "Risk Limit")
@@ -1711,7 +1837,7 @@ def execute_trade(signal, api_url, follower_id=None):
                 return
 
     if master_price:
-        point = mt5.symbol_info(symbol).point
+        point = SPECS.get(acct.server if acct else None, symbol, mt5.symbol_info).point
         diff_points = abs(market_price - float(master_price)) / point
         
         # ⚠️ SLIPPAGE WARNING (Non-blocking for now due to data mismatch potentially)
@@ -1727,7 +1853,8 @@ def execute_trade(signal, api_url, follower_id=None):
     # 🧠 AUTO-RISK: Normalize Volume & Price Precision
     # Enforces 0.01 min lots, steps, and correct digits
     volume, market_price, sl_val, tp_val = normalize_trade_params(
-        symbol, float(volume), market_price, float(signal.get('sl', 0.0)), float(signal.get('tp', 0.0))
+        symbol, float(volume), market_price, float(signal.get('sl', 0.0)), float(signal.get('tp', 0.0)),
+        server=acct.server if acct else None
     )
 
     # Prepare Order
@@ -1748,8 +1875,8 @@ def execute_trade(signal, api_url, follower_id=None):
         "type_filling": mt5.ORDER_FILLING_IOC,
     }
     
-    # Send
-    result = mt5.order_send(request)
+    # Send (filling mode from symbol, fail-fast if closed, one requote retry)
+    result = SUBMITTER.send(mt5, request, acct.server if acct else None)
     
     if result is None:
         error_code, description = mt5.last_error()
@@ -1962,6 +2089,7 @@ def sync_balance(api_url):
             
             account = mt5.account_info()
             if not account: return
+            ACCOUNT_STATE.publish(account, "sync_balance")
     
             # Construct Base URL (strip /api/engine/poll)
             base_url = api_url.replace("/api/engine/poll", "/api/user/broker")
@@ -2195,7 +2323,8 @@ def verify_master_history_closure(master_id, master_ticket, from_ts=None):
 
 def reconcile_initial_state(api_url, cached_subs=None):
     # 🔒 GLOBAL LOCK REMOVED: Granular locking moved to _internal_reconcile_logic
-    return _internal_reconcile_logic(api_url, cached_subs)
+    with metrics.RECONCILE.time():
+        return _internal_reconcile_logic(api_url, cached_subs)
 
 def _internal_reconcile_logic(api_url, cached_subs=None):
     global MY_FOLLOWER_ID, PROCESSED_CATCHUP_TICKETS
@@ -2214,6 +2343,10 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
     subs = cached_subs if cached_subs else fetch_subscriptions(MY_FOLLOWER_ID)
     if not subs: return
 
+    # 🧩 Actions found for every master are queued per follower and run after the loop (one login per account)
+    recon_sessions = {}
+    catchup_queued = set()
+
     for sub_master_id in subs: # sub_master_id is just the master ID string
         state_key = f"state:master:{sub_master_id}:tickets"
         # ⏳ WAIT FOR BROADCASTER (Race Condition Fix)
@@ -2677,30 +2810,10 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
                                  })
                          
                          if batch_jobs:
-                             # 🔒 Check Lock
-                             locked = False
-                             if MT5_PATH_ARG: locked = acquire_terminal_lock(ttl=60)
-                             try:
-                                 # print(f"   [CATCH-UP] Dispatching {m_ticket} to {len(batch_jobs)} followers...")
-                                 results = process_batch(batch_jobs, catchup_signal)
-                                 
-                                 # ✅ MARK AS PROCESSED (Prevents infinite loop in TURBO mode)
-                                 if results:
-                                     PROCESSED_CATCHUP_TICKETS.add(str(m_ticket))
-                                 else:
-                                     print(f"   [RETRY] Catch-Up for {m_ticket} returned no results. Retrying next cycle...")
-                                 
-                                 # 🩹 IMMEDIATE MAP SAVE (Prevent Duplicates)
-                                 if results:
-                                     # Let's rebuild login_map locally
-                                     l_map = {}
-                                     for bj in batch_jobs:
-                                         l_map[int(bj['login'])] = bj['follower_id']
-                                     
-                                     process_execution_report(results, catchup_signal, l_map)
-
-                             finally:
-                                 if locked: release_terminal_lock()
+                             # 🧩 Queue on each follower's session (dispatched once, after every master is scanned)
+                             for bj in batch_jobs:
+                                 add_session_action(recon_sessions, bj, catchup_signal, ("OPEN", sub_master_id, str(m_ticket)))
+                             catchup_queued.add(str(m_ticket))
 
                 # ------------------------------------------------------------------
                 # B. EXISTING TRADE -> CHECK SL/TP DRIFT (MODIFY)
@@ -2817,9 +2930,8 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
                                 "invert_copy": invert # ✅ Pass Config
                             }
                             
-                            # Use existing process_batch helper (requires list)
-                            # Passing 'mod_signal' as global catchup signal argument is efficient.
-                            process_batch([target_job], mod_signal)
+                            # 🧩 Same session as this follower's catch-ups / closes
+                            add_session_action(recon_sessions, target_job, mod_signal, ("MODIFY", local_p.ticket))
                         else:
                              # print(f"   [SYNC] ✅ Tick {m_ticket} In Sync (Diff: {diff_sl:.5f} / {diff_tp:.5f})")
                              pass
@@ -2883,6 +2995,7 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
                                                      "symbol": p.symbol,
                                                      "masterId": sub_master_id,
                                                      "masterTicket": m_ticket_str,
+                                                     "pct": 1.0, # Full close (never the legacy volume * risk path)
                                                      "id": f"ORPHAN-CLOSE-{p.ticket}-{int(time.time())}"
                                                  }
                                                  target_job = {
@@ -2894,7 +3007,7 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
                                                      "target_ticket": p.ticket,
                                                      "invert_copy": False 
                                                  }
-                                                 process_batch([target_job], close_signal)
+                                                 add_session_action(recon_sessions, target_job, close_signal, ("CLOSE", p.ticket))
 
                                      except Exception as orphan_err:
                                          print(f"   [WARN] Orphan Check Failed for {p.ticket}: {orphan_err}")
@@ -2971,6 +3084,7 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
                                         "type": p.type, 
                                         "volume": p.volume,
                                         "price": p.price_current,
+                                        "pct": 1.0, # Full close (never the legacy volume * risk path)
                                         "id": f"GHOST-CLOSE-{m_ticket_str}-{int(time.time())}"
                                     }
                                     
@@ -3005,13 +3119,9 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
                                                       "target_ticket": p.ticket # FORCE TARGET TICKET (We know it!)
                                                   })
                                          
-                                         if slave_list_close:
-                                             print(f"   [GHOST] Dispatching FORCE CLOSE for {p.ticket}...")
-                                             g_results = process_batch(slave_list_close, close_signal)
-                                             if g_results:
-                                                for r in g_results:
-                                                    icon = "✅" if r.get('status') == 'success' else "❌"
-                                                    print(f"       -> Slave {r.get('accountId')}: {icon} {r.get('message')} (Deal: {r.get('dealId')})")
+                                         for sl in slave_list_close:
+                                             if add_session_action(recon_sessions, sl, close_signal, ("CLOSE", p.ticket)):
+                                                 print(f"   [GHOST] Queued FORCE CLOSE for {p.ticket}...")
                                              
                                     else:
                                          # Single Mode
@@ -3029,6 +3139,38 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
             traceback.print_exc()
             continue
 
+    # ==================================================================================
+    # 🧩 DISPATCH: one session per follower across all masters (catch-up + drift + ghost closes)
+    # ==================================================================================
+    if recon_sessions:
+        try:
+            locked = False
+            if MT5_PATH_ARG: locked = acquire_terminal_lock(ttl=60)
+            try:
+                done = run_sessions(recon_sessions, lock_ttl=60 if locked else None)
+            finally:
+                if locked: release_terminal_lock()
+
+            l_map = session_login_map(recon_sessions)
+            opened = {} # catch-up signal id -> (signal, results)
+            for sig, r in done:
+                if not sig: continue
+                if sig.get('action') == 'OPEN':
+                    opened.setdefault(sig['id'], (sig, []))[1].append(r)
+                elif sig.get('action') == 'CLOSE':
+                    icon = "✅" if r.get('status') == 'success' else "❌"
+                    print(f"       -> Slave {r.get('accountId')}: {icon} {r.get('message')} (Deal: {r.get('dealId')})")
+
+            # ✅ MARK AS PROCESSED (Prevents infinite loop in TURBO mode) + 🩹 IMMEDIATE MAP SAVE
+            for sig, results in opened.values():
+                PROCESSED_CATCHUP_TICKETS.add(sig['ticket'])
+                process_execution_report(results, sig, l_map)
+            for t in catchup_queued - PROCESSED_CATCHUP_TICKETS:
+                print(f"   [RETRY] Catch-Up for {t} returned no results. Retrying next cycle...")
+        except Exception as e:
+            print(f"   [ERROR] Reconcile Session Dispatch Failed: {e}")
+            traceback.print_exc()
+
                         # Legacy code removed (Cleanup)
 
 
@@ -3036,6 +3178,50 @@ def _internal_reconcile_logic(api_url, cached_subs=None):
 
     return reconnected
 
+# -------------------------------------------------------------------------
+# 🧩 PER-FOLLOWER SESSIONS (one account switch per follower)
+# -------------------------------------------------------------------------
+def add_session_action(sessions, slave_cfg, signal, key=None):
+    """
+    Queues one action on the follower's session (sessions: login -> entry).
+    key dedups repeats within the session, e.g. ("CLOSE", local_ticket). Returns False if dropped.
+    """
+    login = int(slave_cfg.get('login', 0) or 0)
+    entry = sessions.setdefault(login, {"slave": dict(slave_cfg), "actions": [], "keys": set()})
+    if key is not None:
+        if key in entry["keys"]: return False
+        entry["keys"].add(key)
+    if slave_cfg.get('follower_id') and not entry["slave"].get('follower_id'):
+        entry["slave"]['follower_id'] = slave_cfg['follower_id'] # Same account -> same follower (report mapping)
+    entry["actions"].append((signal, dict(slave_cfg))) # Full config: nothing leaks between actions
+    return True
+
+def run_sessions(sessions, lock_ttl=None):
+    """
+    Runs the queued sessions on the HFT pool (blocking). Returns [(signal, result)], one per action.
+    lock_ttl: caller holds the terminal lock; it is re-armed for lock_ttl after every result,
+    so a long run (many followers x login sync) never outlives it.
+    """
+    if not sessions: return []
+    n_actions = sum(len(e["actions"]) for e in sessions.values())
+    print(f"   [SESSION] 🧩 {n_actions} actions for {len(sessions)} followers (one login each)")
+    results = []
+    for r in stream_sessions([(e["slave"], e["actions"]) for e in sessions.values()]):
+        results.append(r)
+        if lock_ttl and not refresh_terminal_lock(lock_ttl):
+            print(f"   [SESSION] ⚠️ Terminal lock lost mid-run ({len(results)}/{n_actions} actions done)")
+            lock_ttl = None
+    out = []
+    for r in results:
+        entry, idx = sessions.get(r.get('sessionLogin')), r.get('actionIndex')
+        signal = entry["actions"][idx][0] if entry and idx is not None and idx < len(entry["actions"]) else None
+        out.append((signal, r))
+    return out
+
+def session_login_map(sessions):
+    """login -> follower_id for process_execution_report."""
+    return {login: e["slave"].get('follower_id') for login, e in sessions.items()}
+
 # -------------------------------------------------------------------------
 # 🔧 TICKET MAPPING HELPERS (Redis)
 # -------------------------------------------------------------------------
@@ -3070,11 +3256,12 @@ class SubscriptionManager:
         self.lock = threading.Lock()
         self.thread = None
         self.first_load = threading.Event() # Wait for first load
+        self.known_sessions = set() # (master_id, follower_id) seen so far (warm-up trigger)
 
     def start(self):
         if self.running: return
         self.running = True
-        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.thread = threading.Thread(target=self.loop, name="SubscriptionManager", daemon=True)
         self.thread.start()
         
     def get_subs(self):
@@ -3117,6 +3304,13 @@ class SubscriptionManager:
                          removed = old_keys - new_keys
                          if added or removed:
                              print(f"[BG] 🔄 Active Subs Updated. +{len(added)} / -{len(removed)}")
+
+                     # 🔥 PREDICTIVE WARM-UP: New sessions get the master's symbols ready before the first signal
+                     sessions = self.session_keys(new_subs)
+                     new_sessions = sessions - self.known_sessions
+                     self.known_sessions = sessions
+                     if new_sessions and EXECUTION_MODE in ['BATCH', 'TURBO']:
+                         threading.Thread(target=self.warm_sessions, args=(new_sessions,), name="Warmup", daemon=True).start()
                 else: 
                      print(f"[WARN] Fetch failed. Preserving {len(self.active_subscriptions)} active subscriptions.")
 
@@ -3127,6 +3321,37 @@ class SubscriptionManager:
                 print(f"[WARN] Subscription Manager Error: {e}")
                 time.sleep(5.0) # Backoff
 
+    def session_keys(self, subs):
+        keys = set()
+        for mid, entry in (subs or {}).items():
+            if isinstance(entry, list):
+                keys.update((str(mid), str(f.get('follower_id'))) for f in entry if f.get('follower_id'))
+            elif self.follower_id:
+                keys.add((str(mid), str(self.follower_id)))
+        return keys
+
+    def warm_sessions(self, sessions):
+        """Resolves master symbol universes + follower servers and queues HFT warm-ups."""
+        from hft_executor import queue_warmup
+        universes, servers_done = {}, set()
+        queued = 0
+        for mid, fid in sessions:
+            try:
+                if mid not in universes:
+                    universes[mid] = fetch_master_symbol_universe(mid)
+                symbols = universes[mid]
+                if not symbols: continue
+                creds = fetch_credentials(fid)
+                if not creds or not isinstance(creds, dict) or 'login' not in creds: continue
+                key = (creds['server'], tuple(symbols))
+                if key in servers_done: continue # Warm-up is per server, not per follower
+                servers_done.add(key)
+                queued += queue_warmup({"login": creds['login'], "password": creds['password'], "server": creds['server']}, symbols)
+            except Exception as e:
+                print(f"[BG] ⚠️ Warm-up prep failed for {mid}/{fid}: {e}")
+        if queued:
+            print(f"[BG] 🔥 Queued warm-up: {queued} symbols for {len(sessions)} new session(s)")
+
     def sync_sentinel(self, subs):
         """Resolves config and pushes to HFT Engine"""
         try:
@@ -3166,16 +3391,17 @@ class SubscriptionManager:
 # -------------------------------------------------------------------------
 # 🚀 EXECUTION & REPORTING
 # -------------------------------------------------------------------------
-def process_execution_report(report, signal, login_map):
+def process_execution_report(report, signal, login_map, summary=True):
     """
     Handles the result from the HFT Swarm.
     1. Reports to API (DB).
     2. Saves Ticket Mapping (Redis).
+    summary=False: streaming (one result at a time), caller prints the batch summary.
     """
     if not report: return
 
     # DEBUG: Trace Execution Report
-    print(f"   [DEBUG_REPORT] Processing {len(report)} items. LoginMap Keys: {list(login_map.keys())}")
+    if summary: print(f"   [DEBUG_REPORT] Processing {len(report)} items. LoginMap Keys: {list(login_map.keys())}")
 
     # We reuse the EXECUTION_WEBHOOK_URL to save to DB
     # Ensure this URL handles 'POST' to update/create TradeHistory
@@ -3229,12 +3455,26 @@ def process_execution_report(report, signal, login_map):
         
         # Alias profit to pnl just in case API expects that
         payload["pnl"] = payload["profit"]
+
+        # 🧵 TRACE: join key + stage timestamps (master scan -> this report)
+        trace = res.get('trace') or tracing.child(signal.get('trace'))
+        tracing.stamp(trace, "report")
+        payload["traceId"] = trace.get("id")
+        payload["traceStages"] = trace.get("t", {})
         
         # ⚡ ASYNC REPORTING: Don't block the HFT Engine waiting for API
-        def _report_bg():
+        # (Bind loop variables now: the thread may start after the next iteration)
+        def _report_bg(payload=payload, f_id=f_id, acc_id=acc_id, trace=trace):
             try:
                  # We use a header secret if needed (Increased Timeout since background)
+                 t_http = time.perf_counter()
                  resp = requests.post(EXECUTION_WEBHOOK_URL, json=payload, headers={"x-bridge-secret": "AlphaBravoCharlieDeltaEchoFoxtro"}, timeout=5)
+                 metrics.HTTP_CALL.observe(time.perf_counter() - t_http, endpoint="webhook_execution", status=resp.status_code)
+                 
+                 tracing.stamp(trace, "ack")
+                 tracing.emit(trace, "dequeue", component="executor", follower=f_id, login=acc_id,
+                              master_id=payload.get("masterId"), ticket=payload.get("masterTicket"),
+                              action=payload.get("action"), status=payload.get("status"), http=resp.status_code)
                  
                  if resp.status_code != 200 and resp.status_code != 201:
                      print(f"   [WARN] DB Report Failed ({resp.status_code}): {resp.text} | Payload: {payload}")
@@ -3245,7 +3485,7 @@ def process_execution_report(report, signal, login_map):
 
         threading.Thread(target=_report_bg, daemon=True).start()
               
-    print(f"   [HFT] Batch Complete: {len(report)} processed.")
+    if summary: print(f"   [HFT] Batch Complete: {len(report)} processed.")
 
 def stream_positions_to_redis(user_id=None):
     """
@@ -3257,12 +3497,14 @@ def stream_positions_to_redis(user_id=None):
     # ⚠️ MT5 Lock MUST be held by caller!
     # If user_id is None (Turbo Mode), we use the Login ID.
     try:
-        current_login = mt5.account_info().login
+        info = mt5.account_info()
+        current_login = info.login
     except:
         return 
-        
     positions = mt5.positions_get()
     if positions is None: positions = [] # Use empty list instead of None to allow "Zero PnL" update
+    # 📇 Shared account state (pre-login lot sizing + open symbols kept in Market Watch)
+    ACCOUNT_STATE.publish(info, "stream", symbols=[p.symbol for p in positions])
     
     payload = []
     for p in positions:
@@ -3407,6 +3649,11 @@ def stream_master_pnl_to_redis(master_id, master_creds, current_follower_creds):
                                 
 def run_executor():
     global MY_FOLLOWER_ID
+    metrics.serve("executor")
+    loop_beat = lambda: None
+    if args.profile:
+        import loop_profiler
+        loop_beat = loop_profiler.start("executor", "run_executor", args.stall_budget_ms) # 🩺 Profile Mode
     
     # 🧠 AUTO-RESOLVE USER ID
     if RESOLVE_USER_ID:
@@ -3563,6 +3810,7 @@ def run_executor():
     last_subs_refresh_time = 0
     
     RECON_INTERVAL = 15.0 # Check for ghosts/misses every 15 seconds (Balanced)
+    last_mw_sweep = time.time() # 🧹 First sweep after one interval (let broadcasters touch their symbols)
     SYNC_INTERVAL = 3.0
     RESET_CHECK_INTERVAL = 60.0 # ⚡ Check renew/expiry every minute
     last_reset_check_time = 0
@@ -3624,6 +3872,7 @@ def run_executor():
     loop_counter = 0
     try:
         while True:
+            loop_beat()
             loop_counter += 1
              # with open("executor_debug.log", "a") as f:
              #    f.write(f"Loop Pulse. ManagerID: {manager_id_for_yield}\n")
@@ -3716,7 +3965,8 @@ def run_executor():
             # 🤝 COOPERATIVE LOCKING: Yield to Verify Script
             # Must check BEFORE any MT5 calls to prevent blocking verify.py
             if r_client:
-                lock_owner = r_client.get(LOCK_KEY_GLOBAL)
+                with metrics.REDIS_CALL.time(op="lock_check"):
+                    lock_owner = r_client.get(LOCK_KEY_GLOBAL)
                 # If Verify holds it, WE MUST YIELD.
                 # If WE hold it (LOCKED_EXECUTOR), we proceed.
                 if lock_owner == "LOCKED_VERIFY":
@@ -3825,11 +4075,14 @@ def run_executor():
                 except:
                     print(f"[ERROR] Bad JSON in Signal")
                     continue
+                metrics.SIGNALS_RECEIVED.inc(action=signal.get('action', 'OPEN'))
+                tracing.stamp(signal.get('trace'), "dequeue")
                 
                 # Deduplication / Staleness
                 sig_time = float(signal.get('timestamp') or 0)
                 age = time.time() - sig_time
                 if age > 60: 
+                     metrics.SIGNALS_STALE.inc()
                      print(f"[WARN] 🗑️ Dropped Stale Signal {signal.get('ticket')} (Age: {age:.1f}s)")
                      continue
 
@@ -3849,7 +4102,7 @@ def run_executor():
                 # 🚀 EXECUTION LOGIC
                 if EXECUTION_MODE in ['BATCH', 'TURBO']:
                      # HFT / BATCH LOGIC
-                     from hft_executor import process_batch
+                     from hft_executor import stream_jobs
                      slave_list = []
                      login_map = {}
                      
@@ -3885,15 +4138,14 @@ def run_executor():
                           
                           if should_run:
                                try:
-                                   results = process_batch(slave_list, signal)
+                                   # 🌊 STREAMING: Report (DB + ticket map) each fill as it lands
+                                   with metrics.BATCH_SECONDS.time():
+                                       handle = stream_jobs(slave_list, signal)
+                                       for res in handle:
+                                           process_execution_report([res], signal, login_map, summary=False)
+                                           print(f"       -> Slave {res.get('accountId')}: {res.get('status')} {res.get('message')}")
                                    last_activity_time_burst = time.time()
-                                   
-                                   # Report to DB
-                                   process_execution_report(results, signal, login_map)
-                                   
-                                   # Print for Console
-                                   for res in results:
-                                        print(f"       -> Slave {res.get('accountId')}: {res.get('status')} {res.get('message')}")
+                                   print(f"   [HFT] Batch Complete: {len(handle.collected)} processed.")
                                except Exception as e:
                                    print(f"[ERROR] Batch Exec Failed: {e}")
                           else:
@@ -4002,6 +4254,20 @@ def run_executor():
                      pass
                      
             last_recon_time = current_time # Update timer even if skipped to avoid spamming lock checks
+
+            # 2b. 🧹 MARKET WATCH HYGIENE
+            # Deselect symbols nobody trades anymore (only when the terminal is free right now)
+            if current_time - last_mw_sweep > market_watch.SWEEP_INTERVAL:
+                 last_mw_sweep = current_time
+                 if terminal_lock_held:
+                      with MT5_GLOBAL_LOCK:
+                          MARKET_WATCH.sweep(MT5_PATH_ARG, mt5)
+                 elif acquire_terminal_lock(timeout=0.1):
+                      try:
+                          with MT5_GLOBAL_LOCK:
+                              MARKET_WATCH.sweep(MT5_PATH_ARG, mt5)
+                      finally:
+                          release_terminal_lock()
             
             # 3. Sync Balance (Timestamp based)
             # 🛡️ Guard: Only sync if we have a valid Follower ID (Single Mode or Hybrid with ID)
@@ -1,10 +1,14 @@
 
-import MetaTrader5 as mt5
+import mt5_backend
+mt5 = mt5_backend.load() # 🔌 MetaTrader5 / mt5_sim (MT5_BACKEND), opt-in profiler (MT5_PROFILE)
 import time
 import queue
+import heapq
+import itertools
 import threading
 import os
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 
@@ -12,6 +16,18 @@ import json
 # Global Pool Singleton
 _HFT_POOL = None
 
+# 📈 TELEMETRY
+import metrics
+import tracing
+_CURRENT_JOB = threading.local() # 🧵 Job being processed by this worker thread (trace attach)
+QUEUE_DEPTH = metrics.gauge("hydra_workerpool_queue_depth", "TradeJobs waiting in the WorkerPool queue",
+                            fn=lambda: _HFT_POOL.queue.qsize() if _HFT_POOL else 0)
+POOL_JOBS = metrics.counter("hydra_workerpool_jobs_total", "TradeJobs picked up by WorkerPool workers")
+POOL_SWITCHES = metrics.counter("hydra_workerpool_login_switches_total", "Account switches (mt5.login) by WorkerPool workers")
+POOL_AFFINITY = metrics.counter("hydra_workerpool_affinity_picks_total", "Jobs taken ahead of the queue head to stay on the logged-in account")
+SWITCHES_PER_JOB = metrics.gauge("hydra_workerpool_switches_per_job", "Login switches / jobs since start (1.0 = every job switched)",
+                                 fn=lambda: POOL_SWITCHES.values.get((), 0) / max(1, POOL_JOBS.values.get((), 0)))
+
 # ⚙️ REDIS FOR HFT MAPPING
 import redis
 r_client_hft = None
@@ -22,10 +38,20 @@ try:
 except Exception as e:
     print(f"[HFT] ⚠️ Redis Connection Failed: {e}")
 
+# 🗂️ SYMBOL RESOLUTION CACHE (Shared by all workers + Redis)
+from symbol_cache import SymbolCache
+SYMBOL_CACHE = SymbolCache("hft", r_client_hft)
+
 # 🔒 GLOBAL MT5 MUTEX (Single Terminal Safety)
 # Essential when 20 threads share 1 terminal (Single Machine HFT)
 MT5_GLOBAL_LOCK = threading.RLock()
 
+# 🧬 PROCESS-PER-TERMINAL MODE (HFT_PROCESSES=1)
+# The MT5 binding is process-global: threads serialize on MT5_GLOBAL_LOCK and re-initialize per job.
+# In process mode every grid terminal is owned by its own long-lived process (TerminalProcessPool).
+HFT_PROCESSES = os.getenv("HFT_PROCESSES", "0") == "1"
+_OWNED_TERMINAL = [None] # Set inside a terminal-owner process: initialize once, never per job
+
 # 🚀 HFT CONFIGURATION
 # Auto-Switch: Use Grid (Instances 05-20) for Followers. 01-04 Reserved for Masters.
 MAX_TERMINALS = 20  
@@ -81,7 +107,62 @@ def resolve_dynamic_future(base_root):
             if mt5.symbol_select(candidate, True): return candidate
     return None
 
-def ensure_symbol(raw_symbol):
+from symbol_catalog import CatalogRegistry
+SYMBOL_CATALOG = CatalogRegistry(SUFFIXES, PREFIXES, SYNONYM_GROUPS, FUTURES_ROOTS)
+
+# 📐 SYMBOL SPEC REGISTRY (Static symbol_info fields, shared via Redis)
+from symbol_specs import SpecRegistry
+SPECS = SpecRegistry(r_client_hft)
+
+# ⚖️ MARGIN MODEL (Learned margin-per-lot, replaces per-follower order_calc_margin)
+from margin_model import MarginModel
+MARGIN_MODEL = MarginModel()
+
+# 🧮 BATCH ORDER PLANNING (Lot / SL-TP / comment math before terminal time)
+import order_plan
+
+# 📇 SHARED ACCOUNT STATE (Equity / free margin per login, published by whoever is logged in)
+from account_state import AccountStateCache
+ACCOUNT_STATE = AccountStateCache(r_client_hft)
+
+# 🧹 MARKET WATCH HYGIENE (Track symbols we trade + every follower's open positions, sweep the rest)
+import market_watch
+from market_watch import MarketWatch
+MARKET_WATCH = MarketWatch(r_client_hft, account_state=ACCOUNT_STATE)
+
+# 📮 ORDER SUBMISSION (Filling mode / session cache, requote retry, retcode stats)
+from order_submit import OrderSubmitter
+SUBMITTER = OrderSubmitter()
+
+# 🔄 POSITION ACCOUNTING (Margin mode / observed partial-close rotation per login)
+from account_modes import AccountModes, MODE_NAMES, ROTATION_CHECK_DELAY
+ACCOUNT_MODES = AccountModes(r_client_hft)
+ROTATION_MAX_ATTEMPTS = 3 # Deferred scans before a missing remainder is reported
+ROTATION_CHECKS_PER_PASS = int(os.getenv("ROTATION_CHECKS_PER_PASS", "2")) # Due scans a worker runs before its next job
+
+# 🔥 PREDICTIVE WARM-UP (New CopySession -> pre-resolve the master's symbols on the follower's server)
+WARMED = set() # (server, raw symbol) already warmed in this process
+WARMUP_TICK_WAIT = 1.0 # Max seconds to wait for the first tick after selecting
+
+def ensure_symbol(raw_symbol, server=None):
+    """
+    Cached front for symbol resolution, keyed by (broker server, symbol).
+    Misses resolve against the symbols_get() catalog (dict lookups + one symbol_select).
+    Falls back to the probe_symbol() probe only if the catalog cannot be loaded.
+    """
+    if not raw_symbol: return None
+    if server is None:
+        info = mt5.account_info()
+        server = info.server if info else ""
+
+    def from_catalog(raw):
+        found, loaded = SYMBOL_CATALOG.resolve(server, raw, mt5.symbols_get, fuzzy=True)
+        if not loaded: return probe_symbol(raw)
+        return found if found and mt5.symbol_select(found, True) else None
+
+    return SYMBOL_CACHE.resolve(server, raw_symbol.strip(), from_catalog, mt5.symbol_select)
+
+def probe_symbol(raw_symbol):
     """
     Robustly attempts to select the symbol, handling suffix/prefix mismatches, synonyms, and fuzzy matches.
     """
@@ -167,7 +248,7 @@ def ensure_symbol(raw_symbol):
 
     return None
 # ---------------------------------------------------------
-def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, symbol="EURUSD", mode="FIXED", master_equity=0.0, allocation=0.0):
+def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, symbol="EURUSD", mode="FIXED", master_equity=0.0, allocation=0.0, server=None):
     """
     🧮 PRO-RATA + EQUITY RATIO CALCULATION (HFT Port)
     Uses MT5 Native Margin Calculation for precision.
@@ -191,7 +272,7 @@ def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, s
         raw_lot = master_lot_size * multiplier 
     
     # 2. Broker Limits (Min/Max/Step)
-    sym_info = mt5.symbol_info(symbol)
+    sym_info = SPECS.get(server, symbol, mt5.symbol_info)
     if not sym_info:
         return round(raw_lot, 2)
         
@@ -208,11 +289,13 @@ def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, s
     
     # 3. Margin Safety Check (Native MT5)
     needed_margin = 0.0
-    price = sym_info.ask
+    tick = mt5.symbol_info_tick(symbol)
+    price = tick.ask if tick else 0.0
     
-    # Try Native Calc first (Best Limit)
+    # Try Native Calc first (Best Limit) - served by the learned margin model when it is warm
+    calc_margin = lambda lots: mt5.order_calc_margin(mt5.ORDER_TYPE_BUY, symbol, lots, price)
     try:
-        margin_native = mt5.order_calc_margin(mt5.ORDER_TYPE_BUY, symbol, final_lot, price)
+        margin_native = MARGIN_MODEL.margin(server, symbol, leverage, final_lot, price, calc_margin)
         if margin_native:
             needed_margin = margin_native
         else:
@@ -244,7 +327,7 @@ def calculate_safe_lot(master_lot_size, equity, leverage, risk_factor_percent, s
             # Calculate Margin for Min Lot
             min_margin = 0.0
             try:
-                min_margin = mt5.order_calc_margin(mt5.ORDER_TYPE_BUY, symbol, min_lot, price)
+                min_margin = MARGIN_MODEL.margin(server, symbol, leverage, min_lot, price, calc_margin)
             except: 
                 min_margin = (min_lot * (100 if "XAU" in symbol else 100000) * price) / 500
 
@@ -278,10 +361,41 @@ class TradeJob:
         self.priority = priority # 0 = High (Paid), 1 = Low (Free)
         self.slave_config = slave_config
         self.signal = signal
+        self.trace = tracing.stamp(tracing.child(signal.get('trace')), "enqueue") # 🧵 Per-follower trace
+        self.batch = None # BatchHandle of the submit_jobs() call (None = pool-wide results list)
+        self.login = int(slave_config.get('login', 0) or 0)
+        self.enqueued_at = time.time()
+        self.actions = None # Composite session: [(signal, slave_config)] run in ONE login session
+        self.parent = None # Composite this action belongs to
+        self.index = None # Position in the parent's actions (tagged on its result)
+        self.pending = 0 # Actions of this composite not finished yet
+        self.prep = None # Prepare stage output (outside MT5_GLOBAL_LOCK): tag, loopback verdict, mapped ticket
+        self.plan = None # 🧮 order_plan for an OPEN (submit_jobs), never stored in the caller's slave_config
+        self.post = [] # Post stage: Redis writes deferred until the terminal is released
         
     def __lt__(self, other):
         return self.priority < other.priority
 
+    @classmethod
+    def session(cls, priority: int, slave_config: Dict, actions: List):
+        """
+        Composite job: ordered actions (OPEN / CLOSE / MODIFY, any master) for ONE account.
+        A worker logs in once and runs them back to back; every action reports its own result.
+        """
+        job = cls(priority, slave_config, {"action": "SESSION", "actions": len(actions)})
+        job.actions = list(actions)
+        return job
+
+    def expand(self) -> List["TradeJob"]:
+        """One TradeJob per action with that action's own slave_config (session's if None), in order."""
+        subs = []
+        for i, (signal, cfg) in enumerate(self.actions or []):
+            sub = TradeJob(self.priority, dict(cfg if cfg is not None else self.slave_config), signal)
+            sub.batch, sub.parent, sub.index = self.batch, self, i
+            subs.append(sub)
+        self.pending = len(subs)
+        return subs
+
 class TradeResult:
     """Standardized Trade Output"""
     def __init__(self, account_id: int, success: bool, execution_time: float, deal_id: int = 0, message: str = "", price: float = 0.0, volume: float = 0.0, profit: float = 0.0, type: str = "", deal_data: Dict = None):
@@ -295,6 +409,7 @@ class TradeResult:
         self.profit = profit
         self.type = type
         self.deal_data = deal_data or {}
+        self.trace = None # 🧵 Set by WorkerPool._add_result from the job
 
     def to_dict(self):
         base = {
@@ -316,43 +431,190 @@ class TradeResult:
         # We want to report the POSITION TICKET (self.deal_id) as the main identifier for the DB.
         # This fixes the "Modify Fail" caused by DB storing Deal ID.
         base['ticket'] = self.deal_id 
+        if self.trace: base['trace'] = self.trace
 
         return base
 
+# 🧲 LOGIN AFFINITY (Drain the logged-in account's jobs before switching away)
+AFFINITY_MAX_WAIT = float(os.getenv("AFFINITY_MAX_WAIT", "0.25")) # Max seconds the queue head may be jumped
+AFFINITY_MAX_STREAK = int(os.getenv("AFFINITY_MAX_STREAK", "8")) # Max consecutive out-of-order picks per terminal
+
+class AffinityQueue(queue.PriorityQueue):
+    """
+    PriorityQueue whose workers can ask for the next job of the account their terminal is
+    already logged into (saves an mt5.login + 0.5s sync per job). Fairness window:
+      - never jumps a higher-priority (premium) head
+      - the head job is jumped only while it is younger than AFFINITY_MAX_WAIT
+      - at most AFFINITY_MAX_STREAK consecutive out-of-order picks per terminal
+    get() / task_done() / join() behave exactly like PriorityQueue.
+    """
+    def get_affine(self, login: int, streak: int = 0, timeout: Optional[float] = None):
+        """(job, jumped_the_head). Raises queue.Empty after `timeout` like get()."""
+        with self.not_empty:
+            deadline = None if timeout is None else time.time() + timeout
+            while not self._qsize():
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0: raise queue.Empty
+                self.not_empty.wait(remaining)
+            head, picked = self.queue[0], None
+            if login and head.login != login and streak < AFFINITY_MAX_STREAK and time.time() - head.enqueued_at < AFFINITY_MAX_WAIT:
+                mine = [i for i, j in enumerate(self.queue) if j.login == login and j.priority <= head.priority]
+                if mine:
+                    i = min(mine, key=lambda k: (self.queue[k].priority, self.queue[k].enqueued_at))
+                    picked = self.queue[i]
+                    self.queue[i] = self.queue[-1]
+                    self.queue.pop()
+                    heapq.heapify(self.queue)
+            job = picked if picked is not None else self._get()
+            self.not_full.notify()
+            return job, picked is not None
+
+
+class BatchHandle:
+    """
+    Per-batch view of one submit_jobs() call. Results stream in as followers finish,
+    so overlapping signals never share a results list and the first fills can be
+    reported while slower followers are still executing.
+
+        handle = pool.submit_jobs(slaves, signal)
+        for res in handle.results(timeout=10): ...   # TradeResult dicts, completion order
+        handle.cancel()                              # jobs not picked up yet report "Cancelled"
+        handle.wait()                                # everything (blocking), like dispatch_jobs
+    """
+    def __init__(self, total: int):
+        self.total = total
+        self.done_jobs = 0
+        self.cancelled = False
+        self.collected = []
+        self.events = queue.Queue() # result dicts + None (batch finished marker)
+        self.lock = threading.Lock()
+        if total == 0: self.events.put(None)
+
+    def _deliver(self, res: Dict):
+        with self.lock:
+            self.collected.append(res)
+        self.events.put(res)
+
+    def _job_done(self):
+        with self.lock:
+            self.done_jobs += 1
+            finished = self.done_jobs == self.total
+        if finished: self.events.put(None)
+
+    def done(self) -> bool:
+        return self.done_jobs >= self.total
+
+    def cancel(self):
+        """Jobs still queued are reported as cancelled instead of executed. Running jobs finish."""
+        self.cancelled = True
+
+    def results(self, timeout: Optional[float] = None):
+        """Yields result dicts as they complete. Stops when the batch is done or `timeout` passes."""
+        deadline = None if timeout is None else time.time() + timeout
+        while not (self.done() and self.events.empty()):
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0: return
+            try:
+                item = self.events.get(timeout=remaining)
+            except queue.Empty:
+                return
+            if item is not None: yield item
+
+    def __iter__(self):
+        return self.results()
+
+    def wait(self, timeout: Optional[float] = None) -> List[Dict]:
+        for _ in self.results(timeout): pass
+        with self.lock:
+            return list(self.collected)
+
+
 class WorkerPool:
     """
     Manages a pool of 'Warm' threads, each bound to a specific Terminal Path.
     """
     def __init__(self, paths: List[str]):
         self.paths = paths
-        self.queue = queue.PriorityQueue()
+        self.queue = AffinityQueue()
         self.results = []
         self.active_workers = []
         self.shutdown_event = threading.Event()
         self.lock = threading.Lock()
+        self.warmup_queue = queue.Queue() # (slave_config, [raw symbols]) - only served when idle
+        self.rotation_queue = queue.PriorityQueue() # (due, seq, attempt, check args) - deferred partial-close scans
+        self.rotation_seq = itertools.count() # Tie-breaker (check args are not comparable)
+        self.busy_keys = {} # terminal path -> lock:terminal:{md5} key (Broadcaster visibility)
+        self.terminal_login = {} # terminal path -> login it is on (last job), for login affinity
+        self.affinity_streak = {} # terminal path -> consecutive head-jumping picks
         
     def worker_loop(self, terminal_path: str, worker_id: int):
         """
         Continuous loop for a single Thread/Terminal.
         Waits for jobs from the Queue.
         """
+        pending = [] # 🧩 Remaining actions of the composite session being run
+        session = None # Composite holding MT5_GLOBAL_LOCK across its actions (RLock: per-action `with` re-enters)
+        t_session = 0.0
         while not self.shutdown_event.is_set():
-            try:
-                # 2. 📥 GET JOB
-                job: TradeJob = self.queue.get(timeout=1.0) 
-            except queue.Empty:
-                continue 
+            if pending:
+                job = pending.pop(0)
+            else:
+                if session is not None:
+                    self._end_session(session, t_session)
+                    session = None
+                # 🔄 Due partial-close scans go first (bounded), so a busy queue never starves them
+                self._run_rotation_checks(terminal_path, ROTATION_CHECKS_PER_PASS)
+                try:
+                    # 2. 📥 GET JOB (Prefer the account this terminal is already logged into)
+                    job, jumped = self._next_job(terminal_path)
+                except queue.Empty:
+                    self._run_warmup(terminal_path) # 🔥 Idle: warm one pending CopySession
+                    self._run_market_sweep(terminal_path) # 🧹 Idle: deselect symbols nobody needs
+                    continue 
+
+                if job.actions is not None:
+                    # 🧩 COMPOSITE: keep the terminal (and its login) until every action ran
+                    pending = job.expand()
+                    if not pending:
+                        self._finish(job)
+                        continue
+                    self._prepare_all(pending) # Before the session takes the terminal
+                    MT5_GLOBAL_LOCK.acquire()
+                    session, t_session = job, time.time()
+                    print(f"[HFT] 🧩 Session for {job.login}: {len(pending)} actions, one login")
+                    continue
 
             # 3. ⚙️ PROCESS JOB
             start_time = time.time()
             login_id = 0
+            redis_lock_key = None
+            _CURRENT_JOB.job = job
+            tracing.stamp(job.trace, "pickup", start_time)
+            if job.batch is not None and job.batch.cancelled:
+                self._fail(job, "Cancelled before start")
+                self._finish(job)
+                continue
             # DEBUG: Trace Job Pickup
             # print(f"[DEBUG-WORKER] Picked up Job for {job.slave_config.get('login')}")
 
             try:
                 login_id = int(job.slave_config.get('login', 0))
 
-                with MT5_GLOBAL_LOCK:
+                # A. 🧰 PREPARE (No terminal needed): loopback guard, comment tag, ticket map
+                prep = job.prep if job.prep is not None else self._prepare(job)
+                if prep['map_key'] and prep['mapped_ticket'] is None:
+                    prep['mapped_ticket'] = self._get_map(prep['map_key'])
+                if prep['skip'] and terminal_path != "MOCK":
+                    self._add_result(TradeResult(login_id, False, 0, message=prep['skip']))
+                    print(f"       -> Slave {login_id}: 🛑 {prep['skip']}")
+                    continue
+
+                # 🔒 REDIS LOCK (Broadcast Visibility): same key as Broadcaster, signals "Worker Busy"
+                if terminal_path != "MOCK":
+                    redis_lock_key = self._mark_busy(terminal_path, login_id)
+
+                # B. 🔐 EXECUTE (Terminal): login, account read, ticks, order_send
+                with self._hold(job):
                     # CRITICAL SECTION: SWITCH CONTEXT
                     
                     if terminal_path == "MOCK":
@@ -364,82 +626,61 @@ class WorkerPool:
                         self._add_result(TradeResult(login_id, True, time.time()-start_time, fake_deal, f"Virtual {action}", 999.99, 0.01, 0.0, action))
                         continue # FINALLY block will call task_done()
 
-                    if not mt5.initialize(path=terminal_path):
+                    if _OWNED_TERMINAL[0] != terminal_path and not mt5.initialize(path=terminal_path):
                         self._add_result(TradeResult(0, False, 0, message=f"Init Failed: {terminal_path}"))
                         continue
                         
                     
-                    # 3. 🔒 REDIS LOCK (Broadcast Visibility)
-                    # Use same key derivation as Broadcaster to signal "Worker Busy"
-                    redis_lock_key = None
-                    if r_client_hft:
-                        try:
-                            lock_seed = terminal_path if terminal_path else "default"
-                            lock_seed = os.path.normpath(str(lock_seed)).lower().strip()
-                            import hashlib
-                            path_hash = hashlib.md5(lock_seed.encode()).hexdigest()
-                            redis_lock_key = f"lock:terminal:{path_hash}"
-                            r_client_hft.set(redis_lock_key, f"HFT_WORKER_{login_id}", ex=10)
-                        except: pass
-
                     # AUTHENTICATION
                     creds = job.slave_config
-                    login_id = int(creds.get('login', 0))
-                    
-                    # 🛡️ SAFETY GUARD: Prevent Master Self-Copy
-                    # Ensure we never place a copy trade ON the Master account itself.
-                    sig_master_id_str = str(job.signal.get('masterId', ''))
-                    follower_uuid = str(job.slave_config.get('follower_id', ''))
-                    
-                    # 1. Check UUID Match (User Level Loopback)
-                    if sig_master_id_str and follower_uuid and sig_master_id_str == follower_uuid:
-                         msg = f"Skipped: Loopback Protection (Slave UUID {follower_uuid} == Master UUID)"
-                         self._add_result(TradeResult(login_id, False, 0, message=msg))
-                         print(f"       -> Slave {login_id}: 🛑 {msg}")
-                         if redis_lock_key and r_client_hft: r_client_hft.delete(redis_lock_key)
-                         continue
-
-                    # 2. Check MT5 Login Match (Account Level Loopback)
-                    # Handle case where masterId in signal IS the MT5 Login (Numeric String)
-                    sig_master_login = int(job.signal.get('master_login', 0))
-                    
-                    if (sig_master_id_str.isdigit() and int(sig_master_id_str) == login_id) or (sig_master_login != 0 and sig_master_login == login_id):
-                         msg = f"Skipped: Loopback Protection (Slave {login_id} == Master {sig_master_id_str}/{sig_master_login})"
-                         self._add_result(TradeResult(login_id, False, 0, message=msg))
-                         print(f"       -> Slave {login_id}: 🛑 {msg}")
-                         if redis_lock_key and r_client_hft: r_client_hft.delete(redis_lock_key)
-                         continue
                     
                     # Login Check (Optimization: Don't re-login if same)
                     current_info = mt5.account_info()
                     if not current_info or current_info.login != login_id:
+                        t_switch = time.time()
+                        tracing.stamp(job.trace, "login_start", t_switch)
+                        POOL_SWITCHES.inc()
                         if not mt5.login(login=login_id, password=creds.get('password'), server=creds.get('server')):
+                             metrics.LOGIN_SWITCH.observe(time.time() - t_switch, result="failed")
                              msg = f"Login Failed: {mt5.last_error()}"
                              self._add_result(TradeResult(login_id, False, 0, message=msg))
                              print(f"       -> Slave {login_id}: ❌ {msg}")
-                             if redis_lock_key and r_client_hft: r_client_hft.delete(redis_lock_key)
                              continue
                         
                         # 🛡️ SYNC GUARD: Wait for MT5 state to stabilize after switch
                         # Prevents "Positions=0" race condition immediately after login
                         time.sleep(0.5)
+                        metrics.LOGIN_SWITCH.observe(time.time() - t_switch, result="ok")
+                        tracing.stamp(job.trace, "login_end")
+
+                    # 📇 SHARED ACCOUNT STATE: A planned OPEN whose margin fits the cached free margin
+                    # (fresh + headroom) needs no re-read. Otherwise read (and publish) as before.
+                    acct_chk = None
+                    plan = job.plan if job.signal.get('action', 'OPEN') == 'OPEN' else None
+                    cached = ACCOUNT_STATE.get(login_id) if plan and plan['feasible'] else None
+                    if cached:
+                        need = MARGIN_MODEL.estimate(cached['server'], plan['symbol'], cached['leverage'], plan['volume'],
+                                                     float(job.signal.get('price', 0.0) or 0.0))
+                        if ACCOUNT_STATE.has_headroom(cached, need): acct_chk = ACCOUNT_STATE.view(cached)
 
                     # 🧐 MARGIN STABILIZER (Fixes False Positive "Insufficient Margin: 0.00")
-                    for _ in range(5):
-                        acct_chk = mt5.account_info()
-                        if acct_chk and acct_chk.margin_free > 0: break
-                        if acct_chk and acct_chk.balance > 0 and acct_chk.margin_free == 0.0:
-                             time.sleep(0.2) # Wait for hydration
-                        else:
-                             break 
+                    if acct_chk is None:
+                        for _ in range(5):
+                            acct_chk = mt5.account_info()
+                            if acct_chk and acct_chk.margin_free > 0: break
+                            if acct_chk and acct_chk.balance > 0 and acct_chk.margin_free == 0.0:
+                                 time.sleep(0.2) # Wait for hydration
+                            else:
+                                 break 
+                        if acct_chk:
+                            self._defer(ACCOUNT_STATE.publish, acct_chk, "hft")
+                            self._defer(ACCOUNT_MODES.update_mode, login_id, getattr(acct_chk, 'margin_mode', None))
                     
                     # EXECUTION ROUTER (Pure Logic)
                     action = job.signal.get('action', 'OPEN')
                     symbol = job.signal.get('symbol')
                     master_ticket = job.signal.get('ticket') # This is MASTER ticket
-                    session_id = job.slave_config.get('session_id', 0)
-                    
-                    comment_tag = f"CPY:S{session_id}:{master_ticket}" if session_id > 0 else f"CPY:{master_ticket}"
+                    comment_tag = prep['comment_tag']
                     
                     request = {
                         "action": mt5.TRADE_ACTION_DEAL,
@@ -455,7 +696,7 @@ class WorkerPool:
                     if action == 'OPEN':
                         # 0. 🛡️ ROBUST SYMBOL SELECTION (First!)
                         # Must ensure symbol exists to get correct Step/Min Lot for Safe Calc
-                        clean_symbol = ensure_symbol(symbol)
+                        clean_symbol = ensure_symbol(symbol, creds.get('server'))
                         if not clean_symbol:
                              msg = f"Symbol Not Found: {symbol}"
                              self._add_result(TradeResult(login_id, False, 0, message=msg))
@@ -463,6 +704,16 @@ class WorkerPool:
                              continue
                         
                         symbol = clean_symbol # Update to actual available symbol
+                        MARKET_WATCH.touch(terminal_path, symbol)
+
+                        # 🧮 PRE-COMPILED PLAN (submit_jobs). Re-check margin locally against fresh free margin.
+                        plan = job.plan
+                        if plan and (plan.get('symbol') != symbol or not acct_chk):
+                            plan = None
+                        if plan:
+                            need = MARGIN_MODEL.estimate(acct_chk.server, symbol, acct_chk.leverage, plan['volume'],
+                                                         float(job.signal.get('price', 0.0) or 0.0))
+                            if need is None or acct_chk.margin_free < need: plan = None
 
                         # 1. ⚖️ PRO-RATA / EQUITY RATIO CALCULATION
                         # We are already logged in context.
@@ -477,10 +728,14 @@ class WorkerPool:
                         # [DEBUG]
                         # print(f"       -> [DEBUG-JOB] Keys: {list(job.slave_config.keys())} | AllocRaw: {job.slave_config.get('allocation')}")
 
-                        acct = mt5.account_info()
+                        acct = None if plan else mt5.account_info()
+                        if plan:
+                            request['volume'] = plan['volume']
+                            request['comment'] = plan['comment']
+                            print(f"       -> Slave {login_id}: ⚖️ {copy_mode} {m_lot} -> {plan['volume']} (Risk: {risk_val}%, planned)")
                         if acct:
                             print(f"       -> [DEBUG-CALC] Slave {login_id}: Mode={copy_mode}, Alloc={allocation}, MasterEq={master_eq}, SlaveEq={acct.equity}")
-                            safe_vol = calculate_safe_lot(m_lot, acct.equity, acct.leverage, risk_val, symbol, mode=copy_mode, master_equity=master_eq, allocation=allocation)
+                            safe_vol = calculate_safe_lot(m_lot, acct.equity, acct.leverage, risk_val, symbol, mode=copy_mode, master_equity=master_eq, allocation=allocation, server=acct.server)
                             if safe_vol <= 0:
                                 msg = "SKIPPED: Margin/Risk Limit Reached"
                                 self._add_result(TradeResult(login_id, False, 0, message=msg))
@@ -555,7 +810,10 @@ class WorkerPool:
                         final_sl = sl_raw
                         final_tp = tp_raw
                         
-                        if invert:
+                        if plan:
+                            final_sl, final_tp = order_plan.finalize(plan, trade_type == mt5.ORDER_TYPE_BUY, price, sl_raw, tp_raw)
+                            if invert: print(f"       -> Slave {login_id}: 🔄 Final SL {final_sl}, TP {final_tp} (planned)")
+                        elif invert:
                             # 🧠 INVERTED RANGE LOGIC (User Request):
                             # Master SL Range -> Follower TP Range (Profit from Master Loss)
                             # Master TP Range -> Follower SL Range (Loss from Master Profit)
@@ -608,17 +866,9 @@ class WorkerPool:
                         local_ticket = injected_ticket
                         
                         if local_ticket == 0:
-                            # 🗺️ MAP LOOKUP (HFT Redis)
+                            # 🗺️ MAP LOOKUP (HFT Redis, resolved in the prepare stage)
                             # If Executor didn't inject it, try to resolve it ourselves.
-                            f_uuid = job.slave_config.get('follower_id')
-                            if r_client_hft and f_uuid:
-                                map_key = f"map:ticket:{master_ticket}:{f_uuid}"
-                                try:
-                                    mapped_str = r_client_hft.get(map_key)
-                                    if mapped_str:
-                                        local_ticket = int(mapped_str)
-                                        # print(f"[DEBUG-WORKER] Resolved Map: {master_ticket} -> {local_ticket}")
-                                except: pass
+                            local_ticket = prep['mapped_ticket'] or 0
 
                         if local_ticket == 0:
                             # 🩹 FALLBACK SCAN: Look for CPY:{master}
@@ -652,6 +902,7 @@ class WorkerPool:
                         
                         p_obj = pos_info[0]
                         local_symbol = p_obj.symbol # ✅ Use explicit symbol
+                        mt5.symbol_select(local_symbol, True) # 🧹 Market Watch sweeps may have hidden it
                         
                         # Apply Invert Logic if needed
                         if job.slave_config.get('invert_copy', False):
@@ -697,18 +948,10 @@ class WorkerPool:
                         local_ticket = injected_ticket 
                         
                         if local_ticket == 0:
-                            # 🗺️ MAP LOOKUP (HFT Redis)
-                            f_uuid = job.slave_config.get('follower_id')
-                            if r_client_hft and f_uuid:
-                                map_key = f"map:ticket:{master_ticket}:{f_uuid}"
-                                try:
-                                    mapped_str = r_client_hft.get(map_key)
-                                    if mapped_str:
-                                        local_ticket = int(mapped_str)
-                                        # print(f"      [DEBUG-WORKER] Resolved Map via Redis: {master_ticket} -> {local_ticket}")
-                                    else:
-                                        print(f"      [DEBUG-WORKER] Map Lookup Failed (Key: {map_key}). Trying Scan...")
-                                except: pass 
+                            # 🗺️ MAP LOOKUP (HFT Redis, resolved in the prepare stage)
+                            local_ticket = prep['mapped_ticket'] or 0
+                            if not local_ticket:
+                                print(f"      [DEBUG-WORKER] Map Lookup Failed ({master_ticket}). Trying Scan...")
                         
                         # 4. VERIFY EXISTENCE
                         pos_info = mt5.positions_get(ticket=local_ticket)
@@ -774,13 +1017,11 @@ class WorkerPool:
                                         volume=final_vol,
                                         message=f"Synced History Close ({history_deal.price})"
                                     ))
-                                    if redis_lock_key and r_client_hft: r_client_hft.delete(redis_lock_key)
                                     continue
                                 else:
                                     # Truly missing
                                     self._add_result(TradeResult(login_id, True, 0, message="Close: Already Closed / Not Found"))
                                     print(f"       -> Slave {login_id}: ⚠️ Close: Position not found (Map:{injected_ticket} -> Scan Failed -> History Failed)")
-                                    if redis_lock_key and r_client_hft: r_client_hft.delete(redis_lock_key)
                                     continue
                             
                             # RE-FETCH Info for the found ticket
@@ -794,6 +1035,7 @@ class WorkerPool:
                         
                         # 🛡️ USE ACTUAL SYMBOL from Position (Handle Suffixes)
                         actual_symbol = p_obj.symbol
+                        mt5.symbol_select(actual_symbol, True) # 🧹 Market Watch sweeps may have hidden it
                         tick = mt5.symbol_info_tick(actual_symbol)
                         if not tick:
                              self._add_result(TradeResult(login_id, False, 0, message=f"Close Fail: Symbol {actual_symbol}"))
@@ -821,7 +1063,7 @@ class WorkerPool:
                             calc_method = f"Vol {signal_vol} * {risk_val}%"
                         
                         # 2. Broker Step/Min Logic
-                        sym_info = mt5.symbol_info(actual_symbol)
+                        sym_info = SPECS.get(creds.get('server'), actual_symbol, mt5.symbol_info)
                         final_vol = p_obj.volume # Default to Full
                         
                         if sym_info:
@@ -871,12 +1113,20 @@ class WorkerPool:
                              continue
                     
                     # Trusted Critical Section (Verified).
-                    res = mt5.order_send(request)
+                    t_send = time.time()
+                    res = SUBMITTER.send(mt5, request, creds.get('server'))
                     end_time = time.time()
+                    metrics.ORDER_SEND.observe(end_time - t_send, retcode=getattr(res, "retcode", "none"))
+                    tracing.stamp(job.trace, "send_start", t_send)
+                    tracing.stamp(job.trace, "send_end", end_time)
                     duration = end_time - start_time
                     
                     if res.retcode == mt5.TRADE_RETCODE_DONE:
                         # SUCCESS
+                        if action == 'OPEN' and acct_chk:
+                            # 📇 Claim the margin locally until the next publish (bursts on one login)
+                            ACCOUNT_STATE.reserve(login_id, MARGIN_MODEL.estimate(acct_chk.server, symbol, acct_chk.leverage,
+                                                                                  request['volume'], request.get('price', 0.0)))
                         deal_id = res.deal # ✅ Use DEAL ticket, not ORDER
                         if deal_id == 0: deal_id = res.order # Fallback
 
@@ -1058,57 +1308,20 @@ class WorkerPool:
                                     }
                                     mt5.order_send(emer_req)
                         
-                        # 🔄 PARTIAL CLOSE ROTATION FIX (Robust Enchanced)
-                        # The Broker might take 50-500ms to rotate the ticket (Close Old -> Open New).
-                        # If we check too fast, we might see the Old Ticket (Stale) or Nothing.
-                        
+                        # 🔄 PARTIAL CLOSE ROTATION FIX (Account-aware)
+                        # Only some HEDGING brokers move the remainder to a new ticket. Known-stable accounts
+                        # skip the check; the rest get one immediate look and, if the broker has not settled
+                        # yet, a deferred scan a worker runs once due, before its next job (no sleep while holding the terminal).
                         if action == 'CLOSE' and final_vol < p_obj.volume:
-                            print(f"       -> Slave {login_id}: 📉 Partial Close {final_vol} / {p_obj.volume}. Checking for Rotation...")
-                            
-                            # 1. Wait for Broker Latency (Critical for Rotation)
-                            time.sleep(0.5) # 500ms should be enough for most brokers
-                            
-                            # 2. We expect a position to exist with the REMAINING volume
                             expected_rem = float(round(p_obj.volume - final_vol, 2))
-                            
-                            # 3. Scan ALL positions for this Symbol/Magic
-                            candidates = mt5.positions_get(symbol=actual_symbol)
-                            found_rem_ticket = 0
-                            
-                            if candidates:
-                                for c in candidates:
-                                    if c.magic == p_obj.magic:
-                                        # Match Volume? (Allow small float drift)
-                                        if abs(c.volume - expected_rem) < 0.01:
-                                            found_rem_ticket = c.ticket
-                                            break
-                            
-                            # 4. Analyze Result
-                            if found_rem_ticket > 0:
-                                if found_rem_ticket != local_ticket:
-                                    # ✅ ROTATION CONFIRMED (Ticket Changed)
-                                    print(f"       -> Slave {login_id}: 🔄 ROTATION DETECTED: {local_ticket} -> {found_rem_ticket} (Vol: {expected_rem})")
-                                    
-                                    if f_uuid:
-                                        self._save_ticket_map(master_ticket, found_rem_ticket, f_uuid)
-                                    else:
-                                        print(f"       -> Slave {login_id}: ⚠️ Helper: Missing follower_id for Map Update!")
-                                else:
-                                    # ✅ NETTING CONFIRMED (Same Ticket, Volume Dropped)
-                                    print(f"       -> Slave {login_id}: 📉 Netting Confirmed (Ticket {local_ticket} kept). Vol -> {expected_rem}")
-                                    
-                                    # 🛡️ HEALING: Force Update Map anyway
-                                    # If the original Open Map was lost/missing, this restores it so Ghost Buster doesn't panic.
-                                    f_uuid = job.slave_config.get('follower_id')
-                                    if f_uuid:
-                                        self._save_ticket_map(master_ticket, local_ticket, f_uuid)
-                                    else:
-                                        print(f"       -> Slave {login_id}: ⚠️ Helper: Missing follower_id for Healing Map!")
+                            margin_mode = getattr(acct_chk, 'margin_mode', None) if acct_chk else None
+                            if not ACCOUNT_MODES.needs_check(login_id, margin_mode):
+                                print(f"       -> Slave {login_id}: 📉 Partial Close {final_vol} / {p_obj.volume}. Ticket {local_ticket} kept ({MODE_NAMES.get(margin_mode, 'learned')}).")
                             else:
-                                # ⚠️ LOST?
-                                print(f"       -> Slave {login_id}: ⚠️ Post-Close Scan: Could not find ANY pos with Vol {expected_rem}. Latency?")
-                                # Fallback: If Old Ticket is GONE, and we assumed rotation but couldn't find new one...
-                                # We might have a problem. But typically we find it.
+                                print(f"       -> Slave {login_id}: 📉 Partial Close {final_vol} / {p_obj.volume}. Checking for Rotation...")
+                                check = (dict(job.slave_config), master_ticket, local_ticket, actual_symbol, p_obj.magic, expected_rem)
+                                if not self._check_rotation(*check):
+                                    self._defer_rotation(time.time() + ROTATION_CHECK_DELAY, 1, check)
                         
                     else:
                         # FAIL
@@ -1123,15 +1336,294 @@ class WorkerPool:
                 traceback.print_exc()
                 self._add_result(TradeResult(login_id, False, 0, message=str(e)))
             finally:
+                # C. 📮 POST (Terminal released): deferred Redis writes
+                self._run_post(job)
+
                 # 🔓 RELEASE REDIS LOCK
-                if 'redis_lock_key' in locals() and redis_lock_key and r_client_hft:
-                     try: r_client_hft.delete(redis_lock_key)
-                     except: pass
+                self._unlock_if_owner(redis_lock_key, f"HFT_WORKER_{login_id}")
 
                 # 🛑 CRITICAL: Ensure task_done is called ONCE per job
-                self.queue.task_done()
+                self._finish(job)
+
+        if session is not None: self._end_session(session, t_session)
+
+    def _run_warmup(self, terminal_path):
+        """
+        Pre-resolves + selects symbols on a follower's server and warms the symbol cache,
+        spec registry, tick stream and margin model. Runs only when the trade queue is idle
+        and only if the terminal lock is free (never overrides a busy Executor/Broadcaster).
+        """
+        try:
+            slave, symbols = self.warmup_queue.get_nowait()
+        except queue.Empty:
+            return
+        if terminal_path == "MOCK": return
+        server = slave.get('server')
+        todo = [s for s in symbols if (server, s) not in WARMED]
+        if not todo: return
+
+        lock_key = self._idle_lock(terminal_path, "HFT_WARMUP")
+        if lock_key is False:
+            self.warmup_queue.put((slave, todo)) # Busy terminal: retry on a later idle tick
+            return
+
+        t0 = time.time()
+        warmed = []
+        try:
+            with MT5_GLOBAL_LOCK:
+                if _OWNED_TERMINAL[0] != terminal_path and not mt5.initialize(path=terminal_path): return
+                info = mt5.account_info()
+                # Market Watch / catalog / specs are per SERVER: any account on it will do
+                if not info or info.server != server:
+                    if not mt5.login(login=int(slave.get('login', 0)), password=slave.get('password'), server=server):
+                        print(f"[WARMUP] ⚠️ Login {slave.get('login')}@{server} failed: {mt5.last_error()}")
+                        return
+                    time.sleep(0.5) # Same post-login sync as worker_loop
+                    info = mt5.account_info()
+                for raw in todo:
+                    WARMED.add((server, raw)) # Mark even on failure (negative cache covers it)
+                    sym = ensure_symbol(raw, server)
+                    if not sym: continue
+                    MARKET_WATCH.touch(terminal_path, sym)
+                    SPECS.get(server, sym, mt5.symbol_info)
+                    tick, deadline = mt5.symbol_info_tick(sym), time.time() + WARMUP_TICK_WAIT
+                    while not tick and time.time() < deadline:
+                        time.sleep(0.05)
+                        tick = mt5.symbol_info_tick(sym)
+                    if tick and info:
+                        calc = lambda lots, px=tick.ask, s=sym: mt5.order_calc_margin(mt5.ORDER_TYPE_BUY, s, lots, px)
+                        MARGIN_MODEL.margin(server, sym, info.leverage, 1.0, tick.ask, calc)
+                    warmed.append(sym)
+        except Exception as e:
+            print(f"[WARMUP] ⚠️ {server}: {e}")
+        finally:
+            self._unlock_if_owner(lock_key, "HFT_WARMUP")
+        if warmed:
+            print(f"[WARMUP] 🔥 {server}: {len(warmed)}/{len(todo)} symbols ready ({', '.join(warmed)}) in {(time.time() - t0) * 1000:.0f}ms")
+
+    def _run_market_sweep(self, terminal_path):
+        """Market Watch sweep of this grid terminal (every MW_SWEEP_INTERVAL, idle + terminal lock free)."""
+        if terminal_path == "MOCK" or not MARKET_WATCH.due(terminal_path): return
+        lock_key = self._idle_lock(terminal_path, "HFT_MW_SWEEP")
+        if lock_key is False:
+            MARKET_WATCH.swept.pop(market_watch.terminal_key(terminal_path), None) # Busy: retry next idle tick
+            return
+        try:
+            with MT5_GLOBAL_LOCK:
+                if _OWNED_TERMINAL[0] != terminal_path and not mt5.initialize(path=terminal_path): return
+                MARKET_WATCH.sweep(terminal_path, mt5)
+        except Exception as e:
+            print(f"[MW] ⚠️ Sweep failed on {terminal_path}: {e}")
+        finally:
+            self._unlock_if_owner(lock_key, "HFT_MW_SWEEP")
+
+    def _idle_lock(self, terminal_path, owner):
+        """Takes the terminal lock only if nobody holds it. Key, None (no Redis) or False (busy)."""
+        if not r_client_hft: return None
+        import hashlib
+        seed = os.path.normpath(str(terminal_path or "default")).lower().strip()
+        lock_key = f"lock:terminal:{hashlib.md5(seed.encode()).hexdigest()}"
+        try:
+            return lock_key if r_client_hft.set(lock_key, owner, nx=True, ex=10) else False
+        except: return None
+
+    def _unlock_if_owner(self, lock_key, owner):
+        """Deletes lock_key only while it still holds owner (never another process's lock)."""
+        if lock_key and r_client_hft:
+            try:
+                if r_client_hft.get(lock_key) == owner: r_client_hft.delete(lock_key)
+            except: pass
+
+    def _check_rotation(self, slave, master_ticket, local_ticket, symbol, magic, expected_rem):
+        """
+        One look (no sleep) at where the remainder of a partial close lives.
+        True when settled (kept or rotated, map updated), False if the broker has not updated yet.
+        Caller holds MT5_GLOBAL_LOCK with the follower logged in.
+        """
+        login_id = int(slave.get('login', 0))
+        f_uuid = slave.get('follower_id')
+        mt5.symbol_select(symbol, True) # 🧹 Market Watch sweeps may have hidden it
+        kept = mt5.positions_get(ticket=local_ticket)
+        if kept and abs(kept[0].volume - expected_rem) < 0.01:
+            # ✅ NETTING CONFIRMED (Same Ticket, Volume Dropped)
+            ACCOUNT_MODES.observe(login_id, False)
+            print(f"       -> Slave {login_id}: 📉 Netting Confirmed (Ticket {local_ticket} kept). Vol -> {expected_rem}")
+            # 🛡️ HEALING: Force Update Map anyway (restores a lost Open Map so Ghost Buster doesn't panic)
+            if f_uuid: self._save_ticket_map(master_ticket, local_ticket, f_uuid)
+            return True
+
+        for c in (mt5.positions_get(symbol=symbol) or []):
+            if c.magic == magic and c.ticket != local_ticket and abs(c.volume - expected_rem) < 0.01:
+                # ✅ ROTATION CONFIRMED (Ticket Changed)
+                ACCOUNT_MODES.observe(login_id, True)
+                print(f"       -> Slave {login_id}: 🔄 ROTATION DETECTED: {local_ticket} -> {c.ticket} (Vol: {expected_rem})")
+                if f_uuid:
+                    self._save_ticket_map(master_ticket, c.ticket, f_uuid)
+                else:
+                    print(f"       -> Slave {login_id}: ⚠️ Helper: Missing follower_id for Map Update!")
+                return True
+        return False
+
+    def _defer_rotation(self, due, attempt, check):
+        self.rotation_queue.put((due, next(self.rotation_seq), attempt, check))
+
+    def _run_rotation_checks(self, terminal_path, limit):
+        """Runs up to `limit` due deferred scans (earliest first). Called before every new job and when idle."""
+        for _ in range(limit):
+            if not self._run_rotation_check(terminal_path): return
+
+    def _run_rotation_check(self, terminal_path):
+        """Deferred partial-close scan for the earliest due entry. False when nothing was due (or busy)."""
+        try:
+            due, _, attempt, check = self.rotation_queue.get_nowait()
+        except queue.Empty:
+            return False
+        if terminal_path == "MOCK": return False
+        if time.time() < due:
+            self._defer_rotation(due, attempt, check)
+            return False
+        lock_key = self._idle_lock(terminal_path, "HFT_ROTATION")
+        if lock_key is False:
+            self._defer_rotation(due, attempt, check) # Busy terminal: retry on the next pass
+            return False
+
+        slave, expected_rem = check[0], check[-1]
+        login_id = int(slave.get('login', 0))
+        try:
+            with MT5_GLOBAL_LOCK:
+                if _OWNED_TERMINAL[0] != terminal_path and not mt5.initialize(path=terminal_path): return False
+                info = mt5.account_info()
+                if not info or info.login != login_id:
+                    POOL_SWITCHES.inc()
+                    if not mt5.login(login=login_id, password=slave.get('password'), server=slave.get('server')):
+                        print(f"[ROTATION] ⚠️ Login {login_id} failed: {mt5.last_error()}")
+                        return False
+                    self.terminal_login[terminal_path] = login_id # Affinity follows the actual login
+                    time.sleep(0.5) # Same post-login sync as worker_loop
+                if self._check_rotation(*check): return True
+            if attempt < ROTATION_MAX_ATTEMPTS:
+                self._defer_rotation(time.time() + ROTATION_CHECK_DELAY * attempt, attempt + 1, check)
+            else:
+                print(f"       -> Slave {login_id}: ⚠️ Post-Close Scan: Could not find ANY pos with Vol {expected_rem} after {attempt} checks.")
+        except Exception as e:
+            print(f"[ROTATION] ⚠️ {login_id}: {e}")
+        finally:
+            self._unlock_if_owner(lock_key, "HFT_ROTATION")
+        return True
+
+    # ------------------------------------------------------------------
+    # 🧰 JOB STAGES: prepare (no terminal) -> execute (MT5_GLOBAL_LOCK) -> post
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _map_key(job):
+        """map:ticket key a CLOSE / MODIFY must resolve (None when the executor injected the ticket)."""
+        f_uuid = job.slave_config.get('follower_id')
+        if job.signal.get('action') not in ('CLOSE', 'MODIFY') or job.slave_config.get('target_ticket', 0) or not f_uuid:
+            return None
+        return f"map:ticket:{job.signal.get('ticket')}:{f_uuid}"
+
+    def _prepare(self, job, mapped=None):
+        """Prepare stage: loopback verdict, comment tag and ticket-map key. Needs no terminal."""
+        cfg, signal = job.slave_config, job.signal
+        login_id = int(cfg.get('login', 0) or 0)
+        master_ticket = signal.get('ticket') # This is MASTER ticket
+
+        # 🛡️ SAFETY GUARD: Prevent Master Self-Copy
+        # Ensure we never place a copy trade ON the Master account itself.
+        skip = None
+        sig_master_id_str = str(signal.get('masterId', ''))
+        follower_uuid = str(cfg.get('follower_id', ''))
+        # Handle case where masterId in signal IS the MT5 Login (Numeric String)
+        sig_master_login = int(signal.get('master_login', 0))
+        if sig_master_id_str and follower_uuid and sig_master_id_str == follower_uuid:
+            skip = f"Skipped: Loopback Protection (Slave UUID {follower_uuid} == Master UUID)" # User Level
+        elif (sig_master_id_str.isdigit() and int(sig_master_id_str) == login_id) or (sig_master_login != 0 and sig_master_login == login_id):
+            skip = f"Skipped: Loopback Protection (Slave {login_id} == Master {sig_master_id_str}/{sig_master_login})" # Account Level
+
+        job.prep = {
+            "skip": skip,
+            "comment_tag": order_plan.comment_tag(cfg.get('session_id', 0), master_ticket),
+            "map_key": self._map_key(job),
+            "mapped_ticket": mapped, # None = not fetched yet (worker GETs it before taking the lock)
+            "plan": job.plan, # Travels with prep to a terminal process
+        }
+        return job.prep
+
+    def _prepare_all(self, jobs):
+        """Prepare stage for a whole fan-out: every ticket map in one pipelined Redis round trip."""
+        need = [j for j in jobs if self._map_key(j)]
+        mapped = {}
+        if need and r_client_hft:
+            try:
+                pipe = r_client_hft.pipeline(transaction=False)
+                for j in need: pipe.get(self._map_key(j))
+                mapped = {id(j): int(v) for j, v in zip(need, pipe.execute()) if v}
+            except Exception as e:
+                print(f"[HFT] ⚠️ Ticket map prefetch failed ({e}). Workers will look up.")
+        for j in jobs:
+            self._prepare(j, mapped.get(id(j)))
+
+    def _get_map(self, key):
+        if not r_client_hft: return 0
+        try: return int(r_client_hft.get(key) or 0)
+        except: return 0
+
+    def _mark_busy(self, terminal_path, login_id):
+        """
+        Sets the Broadcaster's lock:terminal:{md5(path)} key so it sees the terminal busy. Returns the key,
+        or None when another owner holds it (e.g. executor's LOCKED_EXECUTOR on a single terminal):
+        that lock already covers this job and is neither overwritten nor deleted.
+        """
+        if not r_client_hft: return None
+        key = self.busy_keys.get(terminal_path)
+        if key is None:
+            import hashlib
+            lock_seed = terminal_path if terminal_path else "default"
+            lock_seed = os.path.normpath(str(lock_seed)).lower().strip()
+            key = self.busy_keys[terminal_path] = f"lock:terminal:{hashlib.md5(lock_seed.encode()).hexdigest()}"
+        try:
+            if r_client_hft.set(key, f"HFT_WORKER_{login_id}", nx=True, ex=10): return key
+            held = r_client_hft.get(key)
+            if held and str(held).startswith("HFT_WORKER_"): # Our own mark (previous job): take it over
+                r_client_hft.set(key, f"HFT_WORKER_{login_id}", ex=10)
+                return key
+        except: pass
+        return None
+
+    @contextmanager
+    def _hold(self, job):
+        """Execute stage: MT5_GLOBAL_LOCK, hold time observed per job (hydra_mt5_lock_hold_seconds)."""
+        with MT5_GLOBAL_LOCK:
+            t_lock = time.time()
+            tracing.stamp(job.trace, "lock_acquired", t_lock)
+            try:
+                yield
+            finally:
+                t_free = time.time()
+                tracing.stamp(job.trace, "lock_released", t_free)
+                metrics.MT5_LOCK_HOLD.observe(t_free - t_lock, action=job.signal.get('action', 'OPEN'))
+
+    def _defer(self, fn, *args):
+        """Post stage: runs fn once the current job released the terminal (immediately outside a job)."""
+        job = getattr(_CURRENT_JOB, 'job', None)
+        if job is None: return fn(*args)
+        job.post.append((fn, args))
+
+    def _run_post(self, job):
+        if job.parent is not None:
+            job.parent.post.extend(job.post) # 🧩 Session action: runs once the session releases the terminal
+            job.post = []
+            return
+        post, job.post = job.post, []
+        for fn, args in post:
+            try: fn(*args)
+            except Exception as e: print(f"[HFT] ⚠️ Post step {getattr(fn, '__name__', fn)} failed: {e}")
 
     def _save_ticket_map(self, master_ticket, follower_ticket, follower_id):
+        """Ticket map write, deferred to the post stage when called while a job holds the terminal."""
+        self._defer(self._write_ticket_map, master_ticket, follower_ticket, follower_id)
+
+    def _write_ticket_map(self, master_ticket, follower_ticket, follower_id):
         """
         Maps Master Ticket -> Follower Ticket (HFT Redis Access).
         Must match executor.py's key format: map:ticket:{master}:{follower_id}
@@ -1145,28 +1637,112 @@ class WorkerPool:
             print(f"       [DEBUG] Saved Ticket Map: {key} -> {follower_ticket}")
         except: pass
 
-    def _add_result(self, res: TradeResult):
+    def _add_result(self, res: TradeResult, job: Optional[TradeJob] = None):
+        job = job or getattr(_CURRENT_JOB, 'job', None)
+        if job is not None and res.trace is None:
+            res.trace = tracing.stamp(job.trace, "result")
+        out = res.to_dict()
+        if job is not None and job.parent is not None:
+            out['actionIndex'] = job.index # 🧩 Which action of the session this result belongs to
+            out['sessionLogin'] = job.parent.login
+        if job is not None and job.batch is not None:
+            job.batch._deliver(out)
+            return
         with self.lock:
-            self.results.append(res.to_dict())
+            self.results.append(out)
+
+    def _fail(self, job: TradeJob, message: str):
+        """Reports a job that never ran (one failed result per action of a session)."""
+        for sub in (job.expand() if job.actions is not None else [job]):
+            self._add_result(TradeResult(sub.login, False, 0, message=message), sub)
+
+    def _next_job(self, terminal_path):
+        """Next job for a worker, with login affinity (raises queue.Empty after 1s idle)."""
+        job, jumped = self.queue.get_affine(self.terminal_login.get(terminal_path, 0),
+                                            self.affinity_streak.get(terminal_path, 0), timeout=1.0)
+        self.affinity_streak[terminal_path] = self.affinity_streak.get(terminal_path, 0) + 1 if jumped else 0
+        self.terminal_login[terminal_path] = job.login
+        POOL_JOBS.inc()
+        if jumped: POOL_AFFINITY.inc()
+        return job, jumped
+
+    def _finish(self, job: TradeJob):
+        """Marks a job done (exactly once): batch accounting + queue.join() bookkeeping."""
+        _CURRENT_JOB.job = None
+        if job.parent is not None:
+            # 🧩 Session action: the composite itself is finished by _end_session (after its post work)
+            job.parent.pending -= 1
+            return
+        if job.batch is not None: job.batch._job_done()
+        self.queue.task_done()
+
+    def _end_session(self, job: TradeJob, t_lock: float):
+        """Releases a composite's terminal hold, then runs its actions' post work and finishes it."""
+        t_free = time.time()
+        MT5_GLOBAL_LOCK.release()
+        metrics.MT5_LOCK_HOLD.observe(t_free - t_lock, action="SESSION")
+        self._run_post(job)
+        self._finish(job)
 
     def start_pool(self):
         """Spawns the workers"""
         print(f"🔥 Starting Worker Pool with {len(self.paths)} Terminals...")
         for i, path in enumerate(self.paths):
-            t = threading.Thread(target=self.worker_loop, args=(path, i+1), daemon=True)
+            t = threading.Thread(target=self.worker_loop, args=(path, i+1), name=f"HFTWorker-{i+1}", daemon=True)
             self.active_workers.append(t)
             t.start()
             time.sleep(0.05) 
 
-    def submit_jobs(self, slaves: List[Dict], signal: Dict):
+    def submit_jobs(self, slaves: List[Dict], signal: Dict) -> BatchHandle:
         """
         Takes a list of slave configs and a signal.
-        Distributes them to the Queue.
+        Distributes them to the Queue. Returns the batch's BatchHandle (streams results).
         """
+        # 🧮 Plan every follower's order from cache before any terminal time is spent
+        plans = {}
+        try:
+            plans = order_plan.compile_open(
+                signal, slaves,
+                lambda server, raw: SYMBOL_CACHE.get(server, raw.strip())[1],
+                lambda server, sym: SPECS.get(server, sym),
+                ACCOUNT_STATE.get,
+                MARGIN_MODEL)
+            if plans:
+                infeasible = sum(1 for p in plans.values() if not p['feasible'])
+                print(f"[HFT] 🧮 Planned {len(plans)}/{len(slaves)} orders ({infeasible} infeasible)")
+        except Exception as e:
+            print(f"[HFT] ⚠️ Order planning failed ({e}). Workers will compute orders.")
+
+        handle = BatchHandle(len(slaves))
+        jobs = []
         for s in slaves:
             prio = 0 if s.get('is_premium') else 1
             job = TradeJob(prio, s, signal)
+            job.batch = handle
+            job.plan = plans.get(job.login)
+            if job.plan and not job.plan['feasible']:
+                res = TradeResult(job.login, False, 0, message=job.plan['reason'])
+                res.trace = tracing.stamp(job.trace, "result")
+                self._add_result(res, job)
+                handle._job_done()
+                continue
+            jobs.append(job)
+        self._prepare_all(jobs) # 🧰 Loopback / tags / ticket maps for the fan-out, before any worker locks
+        for job in jobs:
+            self.queue.put(job)
+        return handle
+
+    def submit_sessions(self, sessions: List[Tuple[Dict, List]]) -> BatchHandle:
+        """
+        One composite job per (slave_config, [(signal, action slave_config), ...]): each follower
+        costs one account switch however many actions it has. Results carry sessionLogin / actionIndex.
+        """
+        handle = BatchHandle(len(sessions))
+        for slave, actions in sessions:
+            job = TradeJob.session(0 if slave.get('is_premium') else 1, slave, actions)
+            job.batch = handle
             self.queue.put(job)
+        return handle
             
     def wait_completion(self):
         """Blocking wait until queue empty"""
@@ -1176,10 +1752,139 @@ class WorkerPool:
         return self.results
 
 
+class TerminalProcessPool(WorkerPool):
+    """
+    WorkerPool with one long-lived PROCESS per terminal instead of one thread.
+    Same interface (queue / submit_jobs / wait_completion / results), so priorities, planning
+    and queue.join() semantics are unchanged. A feeder thread per terminal moves each job to
+    its process over a multiprocessing.connection Pipe and waits for the results.
+
+    Children are started as `python hft_executor.py --terminal-process PATH` (not
+    multiprocessing.spawn, which would re-run executor.py's module-level startup).
+    """
+    def start_pool(self):
+        import secrets
+        self.authkey = secrets.token_bytes(16)
+        self.procs = {}
+        print(f"🔥 Starting Process Pool with {len(self.paths)} Terminals...")
+        for i, path in enumerate(self.paths):
+            t = threading.Thread(target=self.feeder_loop, args=(path, i+1), name=f"HFTFeeder-{i+1}", daemon=True)
+            self.active_workers.append(t)
+            t.start()
+        import atexit
+        atexit.register(self.stop_processes)
+
+    def _spawn(self, terminal_path, worker_id):
+        import sys
+        import subprocess
+        from multiprocessing.connection import Listener
+        with Listener(("127.0.0.1", 0), authkey=self.authkey) as listener:
+            host, port = listener.address
+            env = dict(os.environ, HFT_POOL_AUTHKEY=self.authkey.hex(), HFT_PROCESSES="0")
+            proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--terminal-process", terminal_path,
+                                     "--worker-id", str(worker_id), "--connect", f"{host}:{port}"], env=env)
+            self.procs[worker_id] = proc
+            conn = listener.accept()
+        print(f"[HFT] 🧬 Terminal #{worker_id} owned by PID {proc.pid} ({terminal_path})")
+        return conn
+
+    def feeder_loop(self, terminal_path: str, worker_id: int):
+        conn = None
+        while not self.shutdown_event.is_set():
+            if conn is None:
+                try:
+                    conn = self._spawn(terminal_path, worker_id)
+                except Exception as e:
+                    print(f"[HFT] ⚠️ Terminal #{worker_id} process failed to start: {e}")
+                    time.sleep(5)
+                    continue
+            try:
+                last_login = self.terminal_login.get(terminal_path, 0)
+                job, _ = self._next_job(terminal_path)
+                if job.login != last_login: POOL_SWITCHES.inc() # The child switches (its metrics are not served)
+            except queue.Empty:
+                try: conn.send(("warmup",) + self.warmup_queue.get_nowait()) # 🔥 Idle: hand over a warm-up
+                except queue.Empty: pass
+                except (EOFError, OSError): conn = None
+                continue
+
+            _CURRENT_JOB.job = job
+            if job.batch is not None and job.batch.cancelled:
+                self._fail(job, "Cancelled before start")
+                self._finish(job)
+                continue
+            try:
+                if job.actions is not None:
+                    conn.send(("session", job.slave_config, job.actions, job.trace, None)) # 🧩 Child runs it as one session
+                else:
+                    conn.send(("job", job.slave_config, job.signal, job.trace, job.prep))
+                _, results, margin = conn.recv()
+                MARGIN_MODEL.merge(margin) # Planner in this process learns from the child's terminal calls
+                if job.batch is not None:
+                    for r in results: job.batch._deliver(r)
+                else:
+                    with self.lock:
+                        self.results.extend(results)
+            except (EOFError, OSError) as e:
+                self._fail(job, f"Terminal process #{worker_id} lost: {e}")
+                print(f"[HFT] ⚠️ Terminal #{worker_id} process lost ({e}). Respawning...")
+                conn = None
+            finally:
+                self._finish(job)
+
+    def stop_processes(self):
+        self.shutdown_event.set()
+        for proc in getattr(self, 'procs', {}).values():
+            try: proc.terminate()
+            except: pass
+
+
+def serve_terminal(terminal_path: str, worker_id: int, address: str):
+    """
+    Terminal-owner process: attaches to ONE terminal for its lifetime and runs a single
+    worker_loop over jobs received from the parent TerminalProcessPool.
+    """
+    from multiprocessing.connection import Client
+    host, port = address.rsplit(":", 1)
+    conn = Client((host, int(port)), authkey=bytes.fromhex(os.environ["HFT_POOL_AUTHKEY"]))
+    if terminal_path != "MOCK" and mt5.initialize(path=terminal_path):
+        _OWNED_TERMINAL[0] = terminal_path
+
+    pool = WorkerPool([terminal_path])
+    threading.Thread(target=pool.worker_loop, args=(terminal_path, worker_id), name=f"HFTWorker-{worker_id}", daemon=True).start()
+    synced = 0.0
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break # Parent gone
+        if msg[0] == "warmup":
+            pool.warmup_queue.put(msg[1:])
+            continue
+        kind, slave, payload, trace, prep = msg
+        job = TradeJob.session(0, slave, payload) if kind == "session" else TradeJob(0, slave, payload)
+        job.trace, job.prep = trace, prep # Prepared (and ticket maps prefetched) by the parent
+        job.plan = prep.get('plan') if prep else None
+        pool.results = []
+        pool.queue.put(job)
+        pool.queue.join()
+        t_sync = time.time()
+        conn.send(("done", pool.results, MARGIN_MODEL.export(synced)))
+        synced = t_sync
+    pool.shutdown_event.set()
+
+
 def init_persistent_engine():
     """Starts the HFT Pool and keeps it alive"""
     global _HFT_POOL
     if not _HFT_POOL:
+        if HFT_PROCESSES and len(TERMINAL_PATHS) > 1:
+            _HFT_POOL = TerminalProcessPool(TERMINAL_PATHS)
+            _HFT_POOL.start_pool()
+            print(f"[HFT] 🔥 Persistent High-Speed Pool Started ({len(TERMINAL_PATHS)} Terminal Processes)")
+            return
+        if HFT_PROCESSES:
+            print(f"[HFT] ⚠️ HFT_PROCESSES=1 needs a terminal grid (found {len(TERMINAL_PATHS)}). Using threads.")
         _HFT_POOL = WorkerPool(TERMINAL_PATHS)
         _HFT_POOL.start_pool()
         print(f"[HFT] 🔥 Persistent High-Speed Pool Started ({len(TERMINAL_PATHS)} Threads)")
@@ -1188,19 +1893,34 @@ def dispatch_jobs(slaves: List[Dict], signal: Dict) -> List[Dict]:
     """
     Dispatches jobs to the LIVE pool.
     """
+    # Wait for this batch only (Blocking). Overlapping batches keep separate results.
+    return stream_jobs(slaves, signal).wait()
+
+def stream_jobs(slaves: List[Dict], signal: Dict) -> BatchHandle:
+    """Dispatches jobs to the LIVE pool without waiting. Iterate the handle for results as they land."""
     global _HFT_POOL
     if not _HFT_POOL: init_persistent_engine()
-    
-    # Reset Results for this batch 
-    _HFT_POOL.results = [] 
-    
-    # print(f"🚀 Dispatching {len(slaves)} Jobs to Swarm...")
-    _HFT_POOL.submit_jobs(slaves, signal)
+    return _HFT_POOL.submit_jobs(slaves, signal)
 
-    # Wait for completion (Blocking)
-    _HFT_POOL.wait_completion()
-    
-    return _HFT_POOL.get_results()
+def stream_sessions(sessions: List[Tuple[Dict, List]]) -> BatchHandle:
+    """Dispatches per-account composite sessions [(slave_config, [(signal, slave_config)])] without waiting."""
+    global _HFT_POOL
+    if not _HFT_POOL: init_persistent_engine()
+    return _HFT_POOL.submit_sessions(sessions)
+
+def process_sessions(sessions: List[Tuple[Dict, List]]) -> List[Dict]:
+    """Blocking stream_sessions(): one result dict per action (sessionLogin / actionIndex tagged)."""
+    return stream_sessions(sessions).wait()
+
+def queue_warmup(slave: Dict, symbols: List[str]) -> int:
+    """Queues a warm-up for a newly active follower (served by idle workers). Returns symbols queued."""
+    global _HFT_POOL
+    server = slave.get('server')
+    todo = [s for s in dict.fromkeys(symbols) if s and (server, s) not in WARMED]
+    if not server or not todo: return 0
+    if not _HFT_POOL: init_persistent_engine()
+    _HFT_POOL.warmup_queue.put((slave, todo))
+    return len(todo)
 
 def get_global_lock():
     """
@@ -1220,4 +1940,11 @@ def process_batch(slaves: List[Dict], signal: Dict) -> List[Dict]:
 # 🧪 TEST HARNESS
 # ==========================================
 if __name__ == "__main__":
-    pass
+    import argparse
+    parser = argparse.ArgumentParser(description='HFT terminal-owner process (started by TerminalProcessPool)')
+    parser.add_argument('--terminal-process', type=str, help='Terminal path owned by this process')
+    parser.add_argument('--worker-id', type=int, default=1, help='Worker number (logs / thread names)')
+    parser.add_argument('--connect', type=str, help='host:port of the parent pool')
+    cli = parser.parse_args()
+    if cli.terminal_process and cli.connect:
+        serve_terminal(cli.terminal_process, cli.worker_id, cli.connect)
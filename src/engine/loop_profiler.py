@@ -0,0 +1,188 @@
+"""
+🩺 SAMPLING PROFILER + LOOP STALL DETECTOR (--profile)
+
+run_executor / follow_signals are tight polling loops doing a lot of work on
+timers. When one iteration stalls, signals sit in the pub/sub buffer. This gives
+both processes a `--profile` mode:
+
+  • Sampler: a daemon thread snapshots every thread's stack (sys._current_frames)
+    at PROFILE_HZ and aggregates them as collapsed stacks, rewritten every
+    PROFILE_FLUSH seconds (cumulative). Feed straight to flamegraph.pl / speedscope:
+        flamegraph.pl profiles/executor_1234.folded > executor.svg
+  • Stall detector: the loop calls beat() once per iteration. A watchdog captures
+    the loop thread's stack WHILE it is over budget (where it is stuck, not where
+    it ended up) and logs one JSONL record per stalled iteration.
+
+    python executor.py --mode TURBO --profile --stall-budget-ms 250
+    python broadcaster.py --user-id <id> --profile
+
+Options (env):
+    PROFILE_DIR     Output directory (default ./profiles)
+    PROFILE_HZ      Samples per second (default 100)
+    PROFILE_FLUSH   Seconds between .folded rewrites (default 30)
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+import traceback
+from datetime import datetime
+
+import metrics # 📈 Prometheus-style telemetry
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+LOOP_STALLS = metrics.counter("hydra_loop_stalls_total", "Loop iterations that exceeded the stall budget", ["loop"])
+LOOP_SECONDS = metrics.histogram("hydra_loop_iteration_seconds", "Main loop iteration time (incl. idle sleep)", ["loop"])
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(thread_name, frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.append(thread_name)
+    return ";".join(reversed(names))
+
+
+# ==========================================
+# 🔥 SAMPLER (collapsed stacks)
+# ==========================================
+class SamplingProfiler:
+    def __init__(self, component, hz=None, flush_every=None):
+        self.component = component
+        self.interval = 1.0 / max(1.0, float(hz or os.getenv("PROFILE_HZ", "100")))
+        self.flush_every = float(flush_every or os.getenv("PROFILE_FLUSH", "30"))
+        self.path = os.path.join(PROFILE_DIR, f"{component}_{os.getpid()}.folded")
+        self.stacks = {}  # collapsed stack -> samples
+        self.samples = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if self.thread: return self
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        self.thread = threading.Thread(target=self.loop, name="Profiler", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush)
+        print(f"[PROFILE] 🔥 Sampling all threads at {1 / self.interval:.0f} Hz -> {self.path}")
+        return self
+
+    def sample(self):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        with self.lock:
+            for ident, frame in frames.items():
+                if ident == me or names.get(ident) == "StallWatchdog": continue
+                key = _collapse(names.get(ident, f"thread-{ident}"), frame)
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def loop(self):
+        next_flush = time.time() + self.flush_every
+        while True:
+            time.sleep(self.interval)
+            try: self.sample()
+            except: pass
+            if time.time() >= next_flush:
+                next_flush = time.time() + self.flush_every
+                try: self.flush()
+                except: pass
+
+    def flush(self):
+        with self.lock:
+            lines = [f"{k} {v}" for k, v in sorted(self.stacks.items(), key=lambda x: -x[1])]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+        os.replace(tmp, self.path)
+        return self.path
+
+
+# ==========================================
+# 🐢 STALL DETECTOR
+# ==========================================
+class StallDetector:
+    """Call beat() at the top of every loop iteration (from the loop's own thread)."""
+    def __init__(self, component, loop_name, budget_ms=250):
+        self.component = component
+        self.loop_name = loop_name
+        self.budget = budget_ms / 1000.0
+        self.path = os.path.join(PROFILE_DIR, f"{component}_{os.getpid()}.stalls.jsonl")
+        self.ident = None
+        self.last_beat = None
+        self.iteration = 0
+        self.captured = None   # (iteration, stack) grabbed by the watchdog mid-stall
+        self.lock = threading.Lock()
+        self.watchdog = None
+
+    def start(self):
+        if self.watchdog: return self
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        self.watchdog = threading.Thread(target=self.watch, name="StallWatchdog", daemon=True)
+        self.watchdog.start()
+        print(f"[PROFILE] 🐢 Stall detector on '{self.loop_name}' (budget {self.budget * 1000:.0f}ms) -> {self.path}")
+        return self
+
+    def beat(self):
+        now = time.perf_counter()
+        with self.lock:
+            if self.ident is None: self.ident = threading.get_ident()
+            prev, it, captured = self.last_beat, self.iteration, self.captured
+            self.last_beat = now
+            self.iteration += 1
+            self.captured = None
+        if prev is None: return
+        elapsed = now - prev
+        LOOP_SECONDS.observe(elapsed, loop=self.loop_name)
+        if elapsed <= self.budget: return
+
+        LOOP_STALLS.inc(loop=self.loop_name)
+        stack = captured[1] if captured and captured[0] == it else None
+        print(f"[STALL] 🐢 {self.loop_name} iteration took {elapsed * 1000:.0f}ms (budget {self.budget * 1000:.0f}ms)"
+              + (f" | stuck in {stack[-1].strip().splitlines()[0]}" if stack else ""))
+        rec = {
+            "ts": datetime.now().isoformat(),
+            "loop": self.loop_name,
+            "iteration": it,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "budget_ms": round(self.budget * 1000, 2),
+            "stack": stack,
+        }
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec) + "\n")
+        except: pass
+
+    def watch(self):
+        tick = max(0.005, self.budget / 4)
+        while True:
+            time.sleep(tick)
+            with self.lock:
+                prev, it, ident, captured = self.last_beat, self.iteration, self.ident, self.captured
+            if prev is None or ident is None: continue
+            if captured and captured[0] == it: continue  # Already have this iteration's stack
+            if time.perf_counter() - prev <= self.budget: continue
+            frame = sys._current_frames().get(ident)
+            if frame is None: continue
+            stack = traceback.format_stack(frame)
+            with self.lock:
+                if self.iteration == it: self.captured = (it, stack)
+
+
+# ==========================================
+# 🚀 ENTRY POINT
+# ==========================================
+def start(component, loop_name, budget_ms=250):
+    """Starts sampler + stall detector. Returns the loop's beat() callable."""
+    SamplingProfiler(component).start()
+    return StallDetector(component, loop_name, budget_ms).start().beat
+
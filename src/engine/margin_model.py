@@ -0,0 +1,106 @@
+"""
+⚖️ MARGIN MODEL (learned order_calc_margin)
+
+calculate_safe_lot used to call mt5.order_calc_margin for the target lot and
+again for the min lot, per follower, inside MT5_GLOBAL_LOCK. Margin is linear
+in lots, so one observation per (server, symbol, leverage) gives a
+margin-per-lot rate that serves every follower on that key:
+
+    margin(lots, price) ~= lots * rate * (price / ref_price) ** elasticity
+
+elasticity is 1 for CFDs / base-currency margin and 0 when the margin currency
+is the account currency (e.g. USDJPY on a USD account). It starts at 1 and is
+fitted from two observations at different prices.
+
+An estimate is only served while it is fresh (MARGIN_MODEL_TTL) and the price
+is within MARGIN_MODEL_DRIFT of the price it was learned at. Otherwise the
+terminal is consulted once and the model is refreshed.
+
+    MARGIN_MODEL_TTL     default 900s
+    MARGIN_MODEL_DRIFT   default 0.02 (2%)
+"""
+import os
+import math
+import time
+import threading
+
+MARGIN_MODEL_TTL = float(os.getenv("MARGIN_MODEL_TTL", "900"))
+MARGIN_MODEL_DRIFT = float(os.getenv("MARGIN_MODEL_DRIFT", "0.02"))
+
+
+class MarginModel:
+    def __init__(self, ttl=MARGIN_MODEL_TTL, max_drift=MARGIN_MODEL_DRIFT):
+        self.ttl = ttl
+        self.max_drift = max_drift
+        self.coeffs = {}  # (server, symbol, leverage) -> [rate, ref_price, elasticity, learned_at, samples]
+        self.lock = threading.Lock()
+        self.stats = {"local": 0, "terminal": 0}
+
+    @staticmethod
+    def _key(server, symbol, leverage):
+        return (server or "", symbol, int(leverage or 0))
+
+    def observe(self, server, symbol, leverage, lots, price, margin):
+        """Feeds one order_calc_margin result into the model."""
+        if not lots or lots <= 0 or not price or price <= 0 or not margin or margin <= 0: return
+        key = self._key(server, symbol, leverage)
+        rate = margin / lots
+        with self.lock:
+            c = self.coeffs.get(key)
+            elasticity = c[2] if c else 1.0
+            if c and abs(price / c[1] - 1.0) > 0.002:
+                # Two prices -> fit how margin moves with price (0 = flat, 1 = proportional)
+                fitted = math.log(rate / c[0]) / math.log(price / c[1])
+                elasticity = min(1.0, max(0.0, fitted))
+            self.coeffs[key] = [rate, price, elasticity, time.time(), (c[4] + 1) if c else 1]
+
+    def estimate(self, server, symbol, leverage, lots, price):
+        """Local margin for `lots` at `price`, or None when the model has nothing fresh."""
+        if not price or price <= 0: return None
+        c = self.coeffs.get(self._key(server, symbol, leverage))
+        if not c: return None
+        rate, ref_price, elasticity, learned_at, _ = c
+        if time.time() - learned_at > self.ttl: return None
+        if abs(price / ref_price - 1.0) > self.max_drift: return None
+        return lots * rate * (price / ref_price) ** elasticity
+
+    def margin(self, server, symbol, leverage, lots, price, calc):
+        """estimate() if possible, otherwise calc(lots) on the terminal (and learn from it)."""
+        est = self.estimate(server, symbol, leverage, lots, price)
+        if est is not None:
+            self.stats["local"] += 1
+            return est
+        margin = calc(lots)
+        self.stats["terminal"] += 1
+        if margin: self.observe(server, symbol, leverage, lots, price, margin)
+        return margin
+
+    def export(self, since=0.0):
+        """Coefficients learned after `since` (shipped from terminal-owner processes to the planner)."""
+        with self.lock:
+            return {k: list(c) for k, c in self.coeffs.items() if c[3] > since}
+
+    def merge(self, coeffs):
+        """Adopts exported coefficients that are newer than ours."""
+        if not coeffs: return
+        with self.lock:
+            for k, c in coeffs.items():
+                mine = self.coeffs.get(k)
+                if not mine or c[3] > mine[3]: self.coeffs[k] = list(c)
+
+    def affordable(self, server, symbol, price, followers):
+        """
+        Batch feasibility without IPC. followers: [(leverage, free_margin, target_lot, min_lot)].
+        Returns per follower: target_lot, min_lot (downgrade), 0.0 (skip) or None (model cold).
+        """
+        out = []
+        for leverage, free_margin, target_lot, min_lot in followers:
+            need = self.estimate(server, symbol, leverage, target_lot, price)
+            if need is None:
+                out.append(None)
+            elif free_margin >= need:
+                out.append(target_lot)
+            else:
+                need_min = self.estimate(server, symbol, leverage, min_lot, price)
+                out.append(min_lot if need_min is not None and free_margin > need_min else 0.0)
+        return out
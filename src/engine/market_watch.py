@@ -0,0 +1,104 @@
+"""
+🧹 MARKET WATCH HYGIENE (per terminal)
+
+symbol_select(name, True) adds the symbol to Market Watch and the terminal
+streams its ticks forever. On a shared terminal that accumulates every symbol
+any master ever traded, which costs terminal CPU/memory and slows
+positions_get / symbol_info_tick for everyone.
+
+Needed set for a terminal (everything else visible gets deselected):
+    • symbols of open positions / pending orders of the logged-in account
+    • open-position symbols of every follower known to the shared account
+      state (acct:state, see account_state.py), logged in or not
+    • symbols touched (resolved for a trade, traded by a master) within
+      MW_KEEP_SECONDS, shared across processes in Redis:
+          ZSET mw:needed:{md5(terminal path)}  member=symbol score=last use
+
+Executor sweeps its own terminal and every HFT grid worker sweeps its
+terminal when idle, every MW_SWEEP_INTERVAL seconds, under that terminal's
+lock. At most MW_MAX_DESELECT symbols per sweep. The terminal itself refuses
+to hide symbols that still have positions.
+
+    MW_KEEP_SECONDS    default 21600 (6h)
+    MW_SWEEP_INTERVAL  default 300
+    MW_MAX_DESELECT    default 200
+"""
+import os
+import time
+import hashlib
+import threading
+
+KEEP_SECONDS = float(os.getenv("MW_KEEP_SECONDS", "21600"))
+SWEEP_INTERVAL = float(os.getenv("MW_SWEEP_INTERVAL", "300"))
+MAX_DESELECT = int(os.getenv("MW_MAX_DESELECT", "200"))
+
+
+def terminal_key(terminal_path):
+    seed = os.path.normpath(str(terminal_path or "default")).lower().strip()
+    return hashlib.md5(seed.encode()).hexdigest()
+
+
+class MarketWatch:
+    def __init__(self, redis_client=None, keep_seconds=KEEP_SECONDS, account_state=None):
+        self.redis = redis_client
+        self.keep = keep_seconds
+        self.account_state = account_state # AccountStateCache: other followers' open-position symbols
+        self.swept = {}  # terminal key -> last sweep (epoch)
+        self.used = {}  # terminal key -> {symbol: last use}
+        self.lock = threading.Lock()
+
+    def touch(self, terminal_path, *symbols):
+        """Marks symbols as in use on this terminal (keeps them in Market Watch)."""
+        symbols = [s for s in symbols if s]
+        if not symbols: return
+        key, now = terminal_key(terminal_path), time.time()
+        with self.lock:
+            used = self.used.setdefault(key, {})
+            for s in symbols: used[s] = now
+        if self.redis:
+            try: self.redis.zadd(f"mw:needed:{key}", {s: now for s in symbols})
+            except: pass
+
+    def needed(self, terminal_path, mt5):
+        key, cutoff = terminal_key(terminal_path), time.time() - self.keep
+        with self.lock:
+            used = self.used.setdefault(key, {})
+            for s in [s for s, ts in used.items() if ts < cutoff]: del used[s]
+            keep = set(used)
+        if self.redis:
+            try:
+                rkey = f"mw:needed:{key}"
+                self.redis.zremrangebyscore(rkey, 0, cutoff)
+                keep.update(self.redis.zrangebyscore(rkey, cutoff, "+inf"))
+            except: pass
+        for getter in (mt5.positions_get, mt5.orders_get):
+            try: keep.update(p.symbol for p in (getter() or []))
+            except: pass
+        if self.account_state is not None:
+            try: keep.update(self.account_state.open_symbols(self.keep))
+            except: pass
+        return keep
+
+    def due(self, terminal_path, interval=SWEEP_INTERVAL):
+        """True (and stamps the sweep) when terminal_path was not swept within interval."""
+        key, now = terminal_key(terminal_path), time.time()
+        with self.lock:
+            if now - self.swept.get(key, 0) < interval: return False
+            self.swept[key] = now
+        return True
+
+    def sweep(self, terminal_path, mt5):
+        """Deselects visible symbols nobody needs. Caller must hold the terminal lock."""
+        t0 = time.time()
+        try:
+            symbols = mt5.symbols_get()
+        except: symbols = None
+        if not symbols: return 0
+        visible = [s.name for s in symbols if getattr(s, "visible", False)]
+        keep = self.needed(terminal_path, mt5)
+        stale = [n for n in visible if n not in keep][:MAX_DESELECT]
+        removed = sum(1 for n in stale if mt5.symbol_select(n, False))
+        if stale:
+            print(f"[MW] 🧹 Market Watch: {len(visible)} visible, {len(keep)} needed, "
+                  f"deselected {removed}/{len(stale)} in {(time.time() - t0) * 1000:.0f}ms")
+        return removed
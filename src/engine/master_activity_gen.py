@@ -0,0 +1,239 @@
+"""
+🎛️ SYNTHETIC MASTER ACTIVITY GENERATOR (Broadcaster Poll-Loop Profiling)
+
+Runs the REAL broadcaster.follow_signals loop against a simulated master account
+and drives that account server-side (like a human / EA trading in the terminal)
+with configurable rates:
+
+    --positions      steady-state open positions (seeded before the loop starts)
+    --open-rate      new positions per second
+    --partial-rate   partial closes per second
+    --modify-rate    SL/TP modifies per second (random positions)
+    --trail          positions with a trailing stop moved every --trail-interval
+    --close-rate     full closes per second
+
+Reports broadcaster CPU per poll, polls/s, signals emitted/s and detection delay
+(master action -> send_signal) per action, to size masters per host.
+
+Needs a local Redis (the loop publishes / flushes state exactly like production).
+
+    python master_activity_gen.py --positions 300 --trail 50 --duration 60
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+
+os.environ["MT5_BACKEND"] = "SIM"
+import mt5_sim
+
+MASTER_LOGIN = 9100001
+SYMBOLS = ["EURUSD", "GBPUSD", "USDJPY", "XAUUSD", "BTCUSD", "US30"]
+
+
+def percentiles(values):
+    if not values: return {"count": 0}
+    vals = sorted(values)
+    n = len(vals)
+    def pick(p): return round(vals[min(n - 1, int(round(p / 100.0 * (n - 1))))], 3)
+    return {"count": n, "p50": pick(50), "p95": pick(95), "p99": pick(99), "max": round(vals[-1], 3)}
+
+
+class MasterActivity:
+    """Server-side trader for one simulated master account."""
+    def __init__(self, login, rng):
+        self.login = login
+        self.rng = rng
+        self.pending = {}  # (ticket, action) -> [action times] awaiting a signal
+        self.lock = threading.Lock()
+
+    def _mark(self, ticket, action):
+        with self.lock:
+            self.pending.setdefault((str(ticket), action), []).append(time.time())
+
+    def positions(self):
+        return list(mt5_sim.ACCOUNTS[self.login]["positions"].values())
+
+    def open(self, mark=True):
+        symbol = self.rng.choice(SYMBOLS)
+        spec = mt5_sim.SERVERS[mt5_sim.ACCOUNTS[self.login]["server"]]["symbols"][symbol]
+        vol = round(spec["volume_step"] * self.rng.randint(10, 50), 2)
+        res = mt5_sim.account_trade(self.login, {
+            "action": mt5_sim.TRADE_ACTION_DEAL, "symbol": symbol, "volume": vol,
+            "type": self.rng.choice([mt5_sim.ORDER_TYPE_BUY, mt5_sim.ORDER_TYPE_SELL]),
+            "type_filling": mt5_sim.ORDER_FILLING_IOC, "magic": 0})
+        if mark and res and res.retcode == mt5_sim.TRADE_RETCODE_DONE:
+            self._mark(res.order, "OPEN")
+
+    def close(self, partial):
+        pos = self.positions()
+        if not pos: return
+        p = self.rng.choice(pos)
+        spec = mt5_sim.SERVERS[mt5_sim.ACCOUNTS[self.login]["server"]]["symbols"][p["symbol"]]
+        vol = p["volume"]
+        if partial:
+            vol = round(max(spec["volume_step"], round(p["volume"] / 2 / spec["volume_step"]) * spec["volume_step"]), 2)
+            if vol >= p["volume"]: return
+        opposite = mt5_sim.ORDER_TYPE_SELL if p["type"] == mt5_sim.ORDER_TYPE_BUY else mt5_sim.ORDER_TYPE_BUY
+        res = mt5_sim.account_trade(self.login, {
+            "action": mt5_sim.TRADE_ACTION_DEAL, "symbol": p["symbol"], "volume": vol, "type": opposite,
+            "position": p["ticket"], "type_filling": mt5_sim.ORDER_FILLING_IOC})
+        if res and res.retcode == mt5_sim.TRADE_RETCODE_DONE:
+            self._mark(p["ticket"], "CLOSE")
+
+    def modify(self, p=None):
+        if p is None:
+            pos = self.positions()
+            if not pos: return
+            p = self.rng.choice(pos)
+        spec = mt5_sim.SERVERS[mt5_sim.ACCOUNTS[self.login]["server"]]["symbols"][p["symbol"]]
+        dist = spec["bid"] * 0.002
+        direction = 1 if p["type"] == mt5_sim.ORDER_TYPE_BUY else -1
+        sl = round(spec["bid"] - direction * dist * self.rng.uniform(0.5, 1.5), spec["digits"])
+        res = mt5_sim.account_trade(self.login, {
+            "action": mt5_sim.TRADE_ACTION_SLTP, "position": p["ticket"], "sl": sl, "tp": p["tp"]})
+        if res and res.retcode == mt5_sim.TRADE_RETCODE_DONE:
+            self._mark(p["ticket"], "MODIFY")
+
+    def match(self, payload, t_signal):
+        """Signal emitted: pop every pending action it covers, return delays (ms)."""
+        with self.lock:
+            times = self.pending.pop((str(payload.get("ticket")), payload.get("action")), [])
+        return [(t_signal - t) * 1000 for t in times]
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    mt5_sim.install()
+    mt5_sim.configure(ipc_latency=args.ipc_ms / 1000.0, login_latency=0.0, fill_latency=0.0, jitter=0.0)
+    mt5_sim.add_account(MASTER_LOGIN, password="sim", server=mt5_sim.CONFIG["default_server"], balance=1e7, leverage=500)
+
+    gen = MasterActivity(MASTER_LOGIN, rng)
+    for _ in range(args.positions):
+        gen.open(mark=False)  # Seeded before the loop starts -> absorbed by the initial sync
+
+    saved = sys.argv
+    sys.argv = ["broadcaster.py", "--user-id", args.master_id]
+    try:
+        import broadcaster
+    finally:
+        sys.argv = saved
+
+    # 🔑 Offline credentials (API lookup replaced by the simulated account)
+    broadcaster.fetch_credentials = lambda: (MASTER_LOGIN, "sim", mt5_sim.CONFIG["default_server"])
+
+    signals = []
+    delays = {"OPEN": [], "CLOSE": [], "MODIFY": []}
+    orig_send = broadcaster.send_signal
+
+    def send_signal(payload):
+        t = time.time()
+        action = payload.get("action")
+        delays.setdefault(action, []).extend(gen.match(payload, t))
+        signals.append((t, action))
+        if not args.no_publish:
+            orig_send(payload)
+    broadcaster.send_signal = send_signal
+
+    # 🧮 Per-thread accounting: polls (terminal_info is called once per iteration) + IPC calls
+    bc = {"ident": None, "polls": 0, "calls": 0}
+    orig_terminal_info, orig_ipc = mt5_sim.terminal_info, mt5_sim._ipc
+
+    def terminal_info():
+        if threading.get_ident() == bc["ident"]: bc["polls"] += 1
+        return orig_terminal_info()
+
+    def _ipc(name):
+        if threading.get_ident() == bc["ident"]: bc["calls"] += 1
+        orig_ipc(name)
+    mt5_sim.terminal_info, mt5_sim._ipc = terminal_info, _ipc
+
+    if args.quiet:
+        sys.stdout = open(os.devnull, "w")  # Report goes to sys.__stdout__
+
+    def loop():
+        bc["ident"] = threading.get_ident()
+        broadcaster.initialize_mt5()
+        broadcaster.follow_signals()
+
+    t = threading.Thread(target=loop, daemon=True)
+    t.start()
+    while bc["ident"] is None: time.sleep(0.01)
+    clock = time.pthread_getcpuclockid(bc["ident"])
+
+    # ⏳ Warm-up (initial sync) then measure
+    time.sleep(args.warmup)
+    cpu0, polls0, calls0, sig0 = time.clock_gettime(clock), bc["polls"], bc["calls"], len(signals)
+    for k in delays: delays[k].clear()
+    t_start = time.time()
+    next_trail = t_start
+    tick = 0.01
+
+    print(f"[GEN] 🎛️ Driving master {MASTER_LOGIN}: {args.positions} pos, open={args.open_rate}/s "
+          f"partial={args.partial_rate}/s modify={args.modify_rate}/s close={args.close_rate}/s trail={args.trail}", file=sys.__stdout__)
+    while time.time() - t_start < args.duration:
+        for rate, fn in ((args.open_rate, gen.open), (args.partial_rate, lambda: gen.close(True)),
+                         (args.modify_rate, gen.modify), (args.close_rate, lambda: gen.close(False))):
+            if rate > 0 and rng.random() < rate * tick:
+                fn()
+        if args.trail and time.time() >= next_trail:
+            for p in gen.positions()[:args.trail]:
+                gen.modify(p)
+            next_trail += args.trail_interval
+        time.sleep(tick)
+
+    elapsed = time.time() - t_start
+    cpu = time.clock_gettime(clock) - cpu0
+    polls = max(1, bc["polls"] - polls0)
+    emitted = len(signals) - sig0
+    report = {
+        "created": datetime.now().isoformat(),
+        "config": vars(args),
+        "duration_s": round(elapsed, 2),
+        "polls": polls,
+        "polls_per_s": round(polls / elapsed, 2),
+        "cpu_ms_per_poll": round(cpu / polls * 1000, 3),
+        "cpu_util_pct": round(cpu / elapsed * 100, 1),
+        "mt5_calls_per_poll": round((bc["calls"] - calls0) / polls, 2),
+        "signals": emitted,
+        "signals_per_s": round(emitted / elapsed, 2),
+        "detection_delay_ms": {k: percentiles(v) for k, v in delays.items()},
+        "undetected": sum(len(v) for v in gen.pending.values()),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hydra Master Activity Generator (Broadcaster Profiling)')
+    parser.add_argument('--master-id', type=str, default="sim-master-gen")
+    parser.add_argument('--positions', type=int, default=100)
+    parser.add_argument('--open-rate', type=float, default=0.5)
+    parser.add_argument('--partial-rate', type=float, default=0.2)
+    parser.add_argument('--modify-rate', type=float, default=1.0)
+    parser.add_argument('--close-rate', type=float, default=0.5)
+    parser.add_argument('--trail', type=int, default=0, help='Positions with a trailing stop')
+    parser.add_argument('--trail-interval', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=60.0)
+    parser.add_argument('--warmup', type=float, default=3.0)
+    parser.add_argument('--ipc-ms', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-publish', action='store_true', help='Do not call the real send_signal (Redis/webhook)')
+    parser.add_argument('--quiet', action='store_true', help='Swallow broadcaster console output')
+    parser.add_argument('--out', type=str, default="")
+    args = parser.parse_args()
+
+    report = run(args)
+    print(json.dumps(report, indent=2), file=sys.__stdout__)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[GEN] 💾 Saved {args.out}", file=sys.__stdout__)
+    os._exit(0)  # follow_signals never returns
+
+
+if __name__ == "__main__":
+    main()
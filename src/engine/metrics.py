@@ -0,0 +1,200 @@
+"""
+📈 ENGINE METRICS (Prometheus text format, stdlib only)
+
+Counters / gauges / histograms shared by executor.py, hft_executor.py,
+broadcaster.py, dispatcher.py and worker_service.py. Each long-running process
+serves them on a local HTTP endpoint when METRICS_PORT is set:
+
+    METRICS_PORT=9101 python executor.py --mode TURBO
+    curl http://127.0.0.1:9101/metrics
+
+Every sample carries a `component` label (executor / broadcaster / dispatcher /
+worker) so one Prometheus job can scrape them all.
+
+    METRICS_PORT   Port to serve on (unset / 0 = collect only, no endpoint)
+    METRICS_HOST   Bind address (default 127.0.0.1)
+"""
+import os
+import time
+import threading
+
+# Seconds. Covers Redis round trips (sub-ms) up to stuck terminal locks / logins.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+COMPONENT = [os.getenv("METRICS_COMPONENT", "engine")]
+REGISTRY = {}     # name -> metric (registration order is exposition order)
+_LOCK = threading.Lock()
+_SERVER = [None]
+
+
+def _fmt_labels(names, values, extra=None):
+    pairs = [("component", COMPONENT[0])] + list(zip(names, values)) + list(extra or [])
+    body = ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name, doc, labels=()):
+        self.name, self.doc, self.labels = name, doc, tuple(labels)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with _LOCK:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        for key, v in sorted(self.values.items()):
+            out.append(f"{self.name}{_fmt_labels(self.labels, key)} {v}")
+        return out
+
+
+class Gauge:
+    """set() / inc() a value, or pass fn to read it at scrape time (e.g. queue depth)."""
+    def __init__(self, name, doc, labels=(), fn=None):
+        self.name, self.doc, self.labels, self.fn = name, doc, tuple(labels), fn
+        self.values = {}
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with _LOCK:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with _LOCK:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} gauge"]
+        values = dict(self.values)
+        if self.fn:
+            try: values[()] = self.fn()
+            except: pass
+        for key, v in sorted(values.items()):
+            out.append(f"{self.name}{_fmt_labels(self.labels, key)} {v}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.doc, self.labels = name, doc, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, seconds, **labels):
+        key = tuple(str(labels.get(l, "")) for l in self.labels)
+        with _LOCK:
+            st = self.values.get(key)
+            if st is None:
+                st = [0] * (len(self.buckets) + 2)
+                self.values[key] = st
+            for i, b in enumerate(self.buckets):
+                if seconds <= b: st[i] += 1
+            st[-2] += seconds
+            st[-1] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for key, st in sorted(self.values.items()):
+            for i, b in enumerate(self.buckets):
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, [('le', b)])} {st[i]}")
+            out.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, [('le', '+Inf')])} {st[-1]}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {round(st[-2], 6)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {st[-1]}")
+        return out
+
+
+class _Timer:
+    def __init__(self, hist, labels):
+        self.hist, self.labels = hist, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+def _register(metric):
+    existing = REGISTRY.get(metric.name)
+    if existing: return existing  # Modules may be imported by several entry points
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+def counter(name, doc, labels=()):
+    return _register(Counter(name, doc, labels))
+
+
+def gauge(name, doc, labels=(), fn=None):
+    return _register(Gauge(name, doc, labels, fn))
+
+
+def histogram(name, doc, labels=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, doc, labels, buckets))
+
+
+def render():
+    lines = []
+    for metric in list(REGISTRY.values()):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ==========================================
+# 📊 SHARED ENGINE METRICS
+# ==========================================
+SIGNALS_RECEIVED = counter("hydra_signals_received_total", "Signals taken off Redis by a consumer", ["action"])
+SIGNALS_STALE = counter("hydra_signals_stale_dropped_total", "Signals dropped by the staleness guard")
+SIGNALS_EMITTED = counter("hydra_signals_emitted_total", "Signals published by the broadcaster", ["action"])
+POLL_SECONDS = histogram("hydra_broadcaster_poll_seconds", "follow_signals iteration time (excluding sleep)")
+LOGIN_SWITCH = histogram("hydra_login_switch_seconds", "mt5.login account switch incl. post-login sync", ["result"])
+ORDER_SEND = histogram("hydra_order_send_seconds", "mt5.order_send round trip", ["retcode"])
+ORDER_RETCODES = counter("hydra_order_retcodes_total", "order_send results per broker server (attempt=first/retry/fast)", ["server", "retcode", "attempt"])
+MT5_LOCK_HOLD = histogram("hydra_mt5_lock_hold_seconds", "MT5_GLOBAL_LOCK hold time per WorkerPool job (execute stage; action=SESSION: whole composite)", ["action"])
+LOCK_WAIT = histogram("hydra_terminal_lock_wait_seconds", "Time spent acquiring the terminal lock", ["acquired"])
+REDIS_CALL = histogram("hydra_redis_call_seconds", "Redis call latency", ["op"])
+DB_CALL = histogram("hydra_db_call_seconds", "Postgres query latency", ["op"])
+HTTP_CALL = histogram("hydra_http_call_seconds", "HTTP call latency to the web app", ["endpoint", "status"])
+RECONCILE = histogram("hydra_reconcile_seconds", "reconcile_initial_state duration")
+BATCH_SECONDS = histogram("hydra_batch_seconds", "Follower batch execution time (signal -> all jobs done)")
+
+
+def serve(component, port=None):
+    """Starts the /metrics endpoint for this process (no-op unless METRICS_PORT / port is set)."""
+    COMPONENT[0] = component
+    port = int(port or os.getenv("METRICS_PORT", "0") or 0)
+    if not port or _SERVER[0]: return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a): pass
+
+    try:
+        server = ThreadingHTTPServer((os.getenv("METRICS_HOST", "127.0.0.1"), port), Handler)
+    except Exception as e:
+        print(f"[METRICS] ⚠️ Could not bind :{port} ({e}). Metrics endpoint disabled.")
+        return None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _SERVER[0] = server
+    print(f"[METRICS] 📈 {component} metrics on http://{os.getenv('METRICS_HOST', '127.0.0.1')}:{port}/metrics")
+    return server
@@ -1,5 +1,6 @@
 
-import MetaTrader5 as mt5
+import mt5_backend
+mt5 = mt5_backend.load() # 🔌 MetaTrader5 / mt5_sim (MT5_BACKEND), opt-in profiler (MT5_PROFILE)
 import time
 import threading
 import json
@@ -27,6 +28,10 @@ REDIS_HOST = 'localhost'
 REDIS_PORT = 6379
 redis_client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
 
+# 📇 SHARED ACCOUNT STATE (Executors size lots from this before switching logins)
+from account_state import AccountStateCache
+ACCOUNT_STATE = AccountStateCache(redis_client)
+
 
 # 🗺️ USER MAPPING CACHE: Login -> UserId
 # Used to sync stats to the correct user.
@@ -150,6 +155,7 @@ class MonitorWorker(threading.Thread):
                     
                     if current_login > 0:
                         # print(f"[MONITOR #{self.worker_id}] Active Login: {current_login}")
+                        ACCOUNT_STATE.publish(info, "monitor")
                         
                         # 3. Resolve User ID
                         user_id = self.resolve_user(current_login)
@@ -158,6 +164,7 @@ class MonitorWorker(threading.Thread):
                         if time.time() - self.last_sync > 1.0:
                              positions = mt5.positions_get()
                              if positions is None: positions = []
+                             ACCOUNT_STATE.publish(info, "monitor", symbols=[p.symbol for p in positions]) # 🧹 Kept in Market Watch
                              
                              # ⚡ SYNC TO BACKEND (PnL Connection)
                              if user_id:
@@ -0,0 +1,22 @@
+"""
+🔌 MT5 BACKEND SELECTION (one place for every engine module)
+
+    import mt5_backend
+    mt5 = mt5_backend.load()
+
+    MT5_BACKEND=SIM   mt5_sim (simulated terminal, Linux load testing), else MetaTrader5
+    MT5_PROFILE=1     wrapped by mt5_profiler (IPC call profiler, one proxy per process)
+"""
+import os
+
+
+def load():
+    """The mt5 module this process should use (selected from the environment at import time)."""
+    if os.getenv("MT5_BACKEND", "").upper() == "SIM":
+        import mt5_sim as mt5 # 🧪 Simulated Terminal (Linux Load Testing)
+    else:
+        import MetaTrader5 as mt5
+    if os.getenv("MT5_PROFILE") == "1":
+        import mt5_profiler
+        mt5 = mt5_profiler.wrap(mt5) # 🔬 IPC Call Profiler (Opt-in)
+    return mt5
@@ -0,0 +1,220 @@
+"""
+🔬 MT5 IPC CALL PROFILER (Opt-in)
+
+Every MetaTrader5 call is an IPC round trip to the terminal. This wraps the
+`mt5` module handed out by mt5_backend.load() (every engine service) and records,
+per API and per call site (file:function:line):
+    calls, None/False results, total / max latency and a latency histogram (ms buckets)
+
+Enable:
+    MT5_PROFILE=1 python executor.py --mode TURBO ...
+
+Options (env):
+    MT5_PROFILE_OUT       JSON dump path (default mt5_profile_<pid>.json)
+    MT5_PROFILE_INTERVAL  Seconds between dumps (default 30, 0 = only at exit)
+    MT5_PROFILE_PORT      Serve the live snapshot on http://127.0.0.1:<port>/ (?reset=1 clears)
+
+Summarize a dump:
+    python mt5_profiler.py mt5_profile_1234.json --top 20
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import threading
+from datetime import datetime
+
+# Latency buckets (ms upper bounds), last bucket is +Inf
+BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+_LOCK = threading.Lock()
+_STATS = {}        # (api, site) -> [calls, total_ms, max_ms, errors, histogram]
+_PROXIES = {}      # id(module) -> proxy
+_STARTED = [time.time()]
+_RUNNING = [False]
+
+
+def _site(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def _record(api, site, ms, failed):
+    with _LOCK:
+        st = _STATS.get((api, site))
+        if st is None:
+            st = [0, 0.0, 0.0, 0, [0] * (len(BUCKETS_MS) + 1)]
+            _STATS[(api, site)] = st
+        st[0] += 1
+        st[1] += ms
+        if ms > st[2]: st[2] = ms
+        if failed: st[3] += 1
+        i = 0
+        while i < len(BUCKETS_MS) and ms > BUCKETS_MS[i]: i += 1
+        st[4][i] += 1
+
+
+class ProfiledMT5:
+    """Stands in for the `mt5` module: constants pass through, callables are timed."""
+    def __init__(self, module):
+        self.__dict__["_module"] = module
+        self.__dict__["_wrappers"] = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if not callable(attr) or isinstance(attr, type) or name.startswith("_"):
+            return attr
+        wrapper = self._wrappers.get(name)
+        if wrapper is None:
+            module = self._module
+
+            def wrapper(*args, **kwargs):
+                site = _site(sys._getframe(1))
+                t0 = time.perf_counter()
+                result = None
+                try:
+                    # Resolve at call time so harness patches on the module still apply
+                    result = getattr(module, name)(*args, **kwargs)
+                    return result
+                finally:
+                    _record(name, site, (time.perf_counter() - t0) * 1000, result is None or result is False)
+
+            wrapper.__name__ = name
+            self._wrappers[name] = wrapper
+        return wrapper
+
+    def __setattr__(self, name, value):
+        setattr(self._module, name, value)
+
+
+def wrap(module):
+    """Returns the profiled proxy for `module` (one per module per process) and starts the dumper."""
+    proxy = _PROXIES.get(id(module))
+    if proxy is None:
+        proxy = ProfiledMT5(module)
+        _PROXIES[id(module)] = proxy
+    start()
+    return proxy
+
+
+# ==========================================
+# 📊 SNAPSHOTS
+# ==========================================
+def snapshot():
+    with _LOCK:
+        items = [(k, [v[0], v[1], v[2], v[3], list(v[4])]) for k, v in _STATS.items()]
+    apis = {}
+    for (api, site), (calls, total, mx, errors, hist) in items:
+        a = apis.setdefault(api, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "errors": 0,
+                                  "histogram": [0] * (len(BUCKETS_MS) + 1), "sites": {}})
+        a["calls"] += calls
+        a["total_ms"] += total
+        a["max_ms"] = max(a["max_ms"], mx)
+        a["errors"] += errors
+        a["histogram"] = [x + y for x, y in zip(a["histogram"], hist)]
+        a["sites"][site] = {"calls": calls, "total_ms": round(total, 3), "avg_ms": round(total / calls, 4),
+                            "max_ms": round(mx, 3), "errors": errors}
+    for a in apis.values():
+        a["avg_ms"] = round(a["total_ms"] / a["calls"], 4) if a["calls"] else 0.0
+        a["total_ms"] = round(a["total_ms"], 3)
+        a["max_ms"] = round(a["max_ms"], 3)
+    elapsed = time.time() - _STARTED[0]
+    return {
+        "pid": os.getpid(),
+        "process": os.path.basename(sys.argv[0]) if sys.argv else "",
+        "created": datetime.now().isoformat(),
+        "elapsed_s": round(elapsed, 2),
+        "buckets_ms": BUCKETS_MS + ["+Inf"],
+        "total_calls": sum(a["calls"] for a in apis.values()),
+        "total_ms": round(sum(a["total_ms"] for a in apis.values()), 3),
+        "apis": apis,
+    }
+
+
+def reset():
+    with _LOCK:
+        _STATS.clear()
+    _STARTED[0] = time.time()
+
+
+def dump(path=None):
+    path = path or os.getenv("MT5_PROFILE_OUT", f"mt5_profile_{os.getpid()}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def _serve(port):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(snapshot(), indent=2).encode()
+            if "reset=1" in self.path: reset()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a): pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[PROFILE] 🔬 Live MT5 call profile on http://127.0.0.1:{port}/")
+
+
+def start():
+    if _RUNNING[0]: return
+    _RUNNING[0] = True
+    interval = float(os.getenv("MT5_PROFILE_INTERVAL", "30"))
+
+    def _loop():
+        while True:
+            time.sleep(interval)
+            try: dump()
+            except: pass
+
+    if interval > 0:
+        threading.Thread(target=_loop, daemon=True).start()
+    port = int(os.getenv("MT5_PROFILE_PORT", "0") or 0)
+    if port:
+        try: _serve(port)
+        except Exception as e: print(f"[PROFILE] ⚠️ Live endpoint failed: {e}")
+
+    def _final():
+        try: dump()
+        except: pass
+    atexit.register(_final)
+
+
+# ==========================================
+# 🖨️ REPORT (CLI)
+# ==========================================
+def main():
+    parser = argparse.ArgumentParser(description='Hydra MT5 IPC Profile Report')
+    parser.add_argument('file', type=str, help='JSON dump written by MT5_PROFILE=1')
+    parser.add_argument('--top', type=int, default=15, help='Call sites to list')
+    args = parser.parse_args()
+
+    with open(args.file) as f:
+        data = json.load(f)
+    elapsed = max(data.get("elapsed_s", 0), 1e-9)
+    print(f"[PROFILE] 🔬 {data.get('process')} pid={data.get('pid')} | {data['total_calls']} calls "
+          f"({data['total_calls'] / elapsed:.1f}/s) | {data['total_ms'] / 1000:.2f}s in MT5 over {elapsed:.0f}s")
+
+    print(f"\n{'api':<24}{'calls':>10}{'/s':>9}{'avg ms':>10}{'max ms':>10}{'total s':>10}")
+    for api, a in sorted(data["apis"].items(), key=lambda x: -x[1]["total_ms"]):
+        print(f"{api:<24}{a['calls']:>10}{a['calls'] / elapsed:>9.1f}{a['avg_ms']:>10}{a['max_ms']:>10}{a['total_ms'] / 1000:>10.2f}")
+
+    sites = [(api, site, s) for api, a in data["apis"].items() for site, s in a["sites"].items()]
+    print(f"\n{'call site':<52}{'api':<20}{'calls':>10}{'total s':>10}")
+    for api, site, s in sorted(sites, key=lambda x: -x[2]["total_ms"])[:args.top]:
+        print(f"{site:<52}{api:<20}{s['calls']:>10}{s['total_ms'] / 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
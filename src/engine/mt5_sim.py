@@ -0,0 +1,834 @@
+"""
+🧪 SIMULATED METATRADER 5 TERMINAL (Linux Load Testing)
+
+Drop-in replacement for the `MetaTrader5` binding covering the API surface the
+engine uses. Lets the copy pipeline (WorkerPool, follow_signals, run_executor)
+run on Linux build boxes without Wine / real terminals.
+
+Usage:
+    MT5_BACKEND=SIM python executor.py --mode TURBO ...
+  or from a harness:
+    import mt5_sim; mt5_sim.install()   # before importing engine modules
+
+Semantics modelled:
+  - Many terminals (keyed by path), ONE logged-in account per terminal.
+  - The binding is process-global: initialize(path) re-points the process.
+  - Many accounts / servers, each with its own symbol catalog (suffixes).
+  - Hedging (default) or netting accounts, partial closes, SL/TP modify.
+  - Configurable IPC / login-switch / fill latencies (+ jitter).
+  - Optional cross-process terminals (MT5_SIM_SHARED_DIR): the logged-in account
+    of each terminal lives in a file, so broadcaster / executor / verify running
+    as separate processes fight over one login like on a real shared terminal.
+"""
+import os
+import sys
+import time
+import random
+import fnmatch
+import hashlib
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+# ==========================================
+# 📜 CONSTANTS (Mirrors MetaTrader5 package)
+# ==========================================
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+
+TRADE_ACTION_DEAL = 1
+TRADE_ACTION_PENDING = 5
+TRADE_ACTION_SLTP = 6
+TRADE_ACTION_MODIFY = 7
+TRADE_ACTION_REMOVE = 8
+TRADE_ACTION_CLOSE_BY = 10
+
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+ORDER_FILLING_RETURN = 2
+
+ORDER_TIME_GTC = 0
+ORDER_TIME_DAY = 1
+
+SYMBOL_FILLING_FOK = 1
+SYMBOL_FILLING_IOC = 2
+
+SYMBOL_TRADE_MODE_DISABLED = 0
+SYMBOL_TRADE_MODE_LONGONLY = 1
+SYMBOL_TRADE_MODE_SHORTONLY = 2
+SYMBOL_TRADE_MODE_CLOSEONLY = 3
+SYMBOL_TRADE_MODE_FULL = 4
+
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_TYPE_BALANCE = 2
+
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+DEAL_ENTRY_INOUT = 2
+DEAL_ENTRY_OUT_BY = 3
+
+ACCOUNT_MARGIN_MODE_RETAIL_NETTING = 0
+ACCOUNT_MARGIN_MODE_EXCHANGE = 1
+ACCOUNT_MARGIN_MODE_RETAIL_HEDGING = 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_ERROR = 10011
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_TRADE_DISABLED = 10017
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_POSITION_CLOSED = 10036
+TRADE_RETCODE_INVALID_FILL = 10030
+TRADE_RETCODE_CONNECTION = 10031
+
+RES_S_OK = 1
+RES_E_FAIL = -1
+RES_E_INVALID_PARAMS = -2
+RES_E_NOT_FOUND = -4
+RES_E_AUTH_FAILED = -6
+RES_E_INTERNAL_FAIL_CONNECT = -10004
+RES_E_INTERNAL_FAIL_TIMEOUT = -10005
+
+# ==========================================
+# 📦 RECORD TYPES (namedtuples, like the binding)
+# ==========================================
+TerminalInfo = namedtuple("TerminalInfo", [
+    "connected", "trade_allowed", "tradeapi_disabled", "ping_last", "build",
+    "name", "company", "path", "data_path", "commondata_path"])
+
+AccountInfo = namedtuple("AccountInfo", [
+    "login", "trade_mode", "leverage", "limit_orders", "margin_so_mode", "trade_allowed",
+    "trade_expert", "margin_mode", "currency_digits", "fifo_close", "balance", "credit",
+    "profit", "equity", "margin", "margin_free", "margin_level", "margin_so_call",
+    "margin_so_so", "name", "server", "currency", "company"])
+
+SymbolInfo = namedtuple("SymbolInfo", [
+    "name", "path", "description", "visible", "select", "digits", "point", "spread",
+    "trade_contract_size", "trade_tick_size", "trade_tick_value", "trade_mode",
+    "trade_stops_level", "filling_mode", "expiration_time", "volume_min", "volume_max",
+    "volume_step", "bid", "ask", "currency_base", "currency_profit", "currency_margin",
+    "margin_initial"])
+
+Tick = namedtuple("Tick", ["time", "bid", "ask", "last", "volume", "time_msc", "flags", "volume_real"])
+
+TradePosition = namedtuple("TradePosition", [
+    "ticket", "time", "time_msc", "time_update", "time_update_msc", "type", "magic",
+    "identifier", "reason", "volume", "price_open", "sl", "tp", "price_current", "swap",
+    "profit", "symbol", "comment", "external_id"])
+
+TradeDeal = namedtuple("TradeDeal", [
+    "ticket", "order", "time", "time_msc", "type", "entry", "magic", "position_id", "reason",
+    "volume", "price", "commission", "swap", "profit", "fee", "symbol", "comment", "external_id"])
+
+OrderSendResult = namedtuple("OrderSendResult", [
+    "retcode", "deal", "order", "volume", "price", "bid", "ask", "comment", "request_id",
+    "retcode_external", "request"])
+
+# ==========================================
+# ⚙️ CONFIGURATION (Env overridable)
+# ==========================================
+CONFIG = {
+    "ipc_latency": float(os.getenv("MT5_SIM_IPC_MS", "0.3")) / 1000.0,      # Per API call round trip
+    "login_latency": float(os.getenv("MT5_SIM_LOGIN_MS", "250")) / 1000.0,  # Account switch
+    "fill_latency": float(os.getenv("MT5_SIM_FILL_MS", "15")) / 1000.0,     # order_send to broker
+    "init_latency": float(os.getenv("MT5_SIM_INIT_MS", "5")) / 1000.0,      # initialize(path) attach
+    "jitter": float(os.getenv("MT5_SIM_JITTER", "0.2")),                    # +/- fraction on every latency
+    "requote_rate": float(os.getenv("MT5_SIM_REQUOTE_RATE", "0.0")),        # Probability of REQUOTE on DEAL
+    "auto_provision": os.getenv("MT5_SIM_AUTO_ACCOUNTS", "1") == "1",       # Unknown logins are created on login()
+    "default_server": os.getenv("MT5_SIM_SERVER", "SimBroker-Demo"),
+    "default_suffix": os.getenv("MT5_SIM_SUFFIX", ""),
+    "default_balance": float(os.getenv("MT5_SIM_BALANCE", "10000")),
+    "default_leverage": int(os.getenv("MT5_SIM_LEVERAGE", "500")),
+    "shared_dir": os.getenv("MT5_SIM_SHARED_DIR", ""),                     # Cross-process terminal login state
+}
+
+# Base catalog: name -> (bid, spread_points, digits, contract_size, vol_min, vol_max, vol_step)
+BASE_SYMBOLS = {
+    "EURUSD": (1.0850, 10, 5, 100000, 0.01, 100.0, 0.01),
+    "GBPUSD": (1.2700, 12, 5, 100000, 0.01, 100.0, 0.01),
+    "USDJPY": (150.20, 12, 3, 100000, 0.01, 100.0, 0.01),
+    "AUDUSD": (0.6550, 12, 5, 100000, 0.01, 100.0, 0.01),
+    "USDCAD": (1.3600, 15, 5, 100000, 0.01, 100.0, 0.01),
+    "XAUUSD": (2350.00, 20, 2, 100, 0.01, 50.0, 0.01),
+    "XAGUSD": (28.500, 30, 3, 5000, 0.01, 50.0, 0.01),
+    "BTCUSD": (65000.00, 2000, 2, 1, 0.01, 20.0, 0.01),
+    "ETHUSD": (3200.00, 300, 2, 1, 0.1, 100.0, 0.1),
+    "US30": (39000.0, 30, 1, 1, 0.1, 100.0, 0.1),
+    "US500": (5200.00, 50, 2, 1, 0.1, 100.0, 0.1),
+    "USTEC": (18200.00, 100, 2, 1, 0.1, 100.0, 0.1),
+}
+
+# ==========================================
+# 🧠 SIMULATOR STATE (Process-global, like the real binding)
+# ==========================================
+_STATE_LOCK = threading.RLock()
+_TICKET_SEQ = [50000000]
+
+SERVERS = {}     # server -> {"suffix": str, "symbols": {name: spec dict}}
+ACCOUNTS = {}    # login -> account dict
+TERMINALS = {}   # path -> {"login": int, "market_watch": set, "connected": bool}
+
+_ACTIVE = {"path": None, "login": 0}  # Terminal this process is attached to + last login it requested
+_LAST_ERROR = [(RES_S_OK, "Success")]
+CALL_COUNTS = {}                   # api name -> calls (cheap IPC accounting)
+EVENTS = {}                        # login_switch / foreign_order_send (terminal-level side effects)
+
+
+def _next_ticket():
+    _TICKET_SEQ[0] += 1
+    return _TICKET_SEQ[0]
+
+
+def _sleep(base):
+    if base <= 0: return
+    j = CONFIG["jitter"]
+    if j > 0:
+        base = base * random.uniform(1.0 - j, 1.0 + j)
+    time.sleep(base)
+
+
+def _ipc(name):
+    """Every binding call is a round trip to the terminal process."""
+    CALL_COUNTS[name] = CALL_COUNTS.get(name, 0) + 1
+    _sleep(CONFIG["ipc_latency"])
+
+
+def _event(name):
+    EVENTS[name] = EVENTS.get(name, 0) + 1
+
+
+def _set_error(code, desc):
+    _LAST_ERROR[0] = (code, desc)
+
+
+def _to_ts(value):
+    if value is None: return None
+    if isinstance(value, datetime): return value.timestamp()
+    return float(value)
+
+
+# ==========================================
+# 🛠️ SETUP HELPERS (Harness API, not part of MetaTrader5)
+# ==========================================
+def configure(**kwargs):
+    """Override latency / behaviour knobs, e.g. configure(login_latency=0.1, jitter=0)."""
+    for k, v in kwargs.items():
+        if k not in CONFIG:
+            raise KeyError(f"Unknown sim option: {k}")
+        CONFIG[k] = v
+
+
+def add_server(server, suffix="", symbols=None):
+    """Registers a broker server. Symbol names get `suffix` appended (e.g. Exness 'm')."""
+    with _STATE_LOCK:
+        catalog = {}
+        for base, spec in (symbols or BASE_SYMBOLS).items():
+            bid, spread, digits, contract, vmin, vmax, vstep = spec
+            name = f"{base}{suffix}"
+            catalog[name] = {
+                "name": name, "base": base, "bid": bid, "spread": spread, "digits": digits,
+                "point": 10 ** -digits, "contract_size": contract,
+                "volume_min": vmin, "volume_max": vmax, "volume_step": vstep,
+                "trade_mode": SYMBOL_TRADE_MODE_FULL,
+                "filling_mode": SYMBOL_FILLING_FOK | SYMBOL_FILLING_IOC,
+                "last_move": time.time(),
+            }
+        SERVERS[server] = {"suffix": suffix, "symbols": catalog}
+        return catalog
+
+
+def add_account(login, password="", server=None, balance=None, leverage=None,
+                currency="USD", margin_mode=ACCOUNT_MARGIN_MODE_RETAIL_HEDGING,
+                rotate_on_partial=False, name=None):
+    """Registers a trading account. rotate_on_partial models brokers that re-ticket partial closes."""
+    server = server or CONFIG["default_server"]
+    with _STATE_LOCK:
+        if server not in SERVERS:
+            add_server(server, suffix=CONFIG["default_suffix"])
+        acc = {
+            "login": int(login), "password": password, "server": server,
+            "balance": float(balance if balance is not None else CONFIG["default_balance"]),
+            "leverage": int(leverage or CONFIG["default_leverage"]),
+            "currency": currency, "margin_mode": margin_mode,
+            "rotate_on_partial": rotate_on_partial,
+            "name": name or f"Sim {login}",
+            "positions": {},   # ticket -> position dict
+            "deals": [],       # TradeDeal list (chronological)
+        }
+        ACCOUNTS[int(login)] = acc
+        return acc
+
+
+def set_symbol(server, name, **fields):
+    """Patch a symbol spec (e.g. trade_mode=SYMBOL_TRADE_MODE_DISABLED, filling_mode=SYMBOL_FILLING_FOK)."""
+    with _STATE_LOCK:
+        SERVERS[server]["symbols"][name].update(fields)
+
+
+def set_price(server, name, bid):
+    with _STATE_LOCK:
+        spec = SERVERS[server]["symbols"][name]
+        spec["bid"] = round(float(bid), spec["digits"])
+        spec["last_move"] = time.time()
+
+
+def reset():
+    """Wipes all terminals, accounts and servers (between benchmark runs)."""
+    with _STATE_LOCK:
+        SERVERS.clear()
+        ACCOUNTS.clear()
+        TERMINALS.clear()
+        CALL_COUNTS.clear()
+        EVENTS.clear()
+        _ACTIVE["path"] = None
+        _ACTIVE["login"] = 0
+        _set_error(RES_S_OK, "Success")
+
+
+def stats():
+    return dict(CALL_COUNTS)
+
+
+def events():
+    return dict(EVENTS)
+
+
+def install():
+    """Registers this module as `MetaTrader5` so `import MetaTrader5 as mt5` resolves to the sim."""
+    sys.modules["MetaTrader5"] = sys.modules[__name__]
+    return sys.modules[__name__]
+
+
+# ==========================================
+# 🔌 INTERNAL LOOKUPS
+# ==========================================
+def _terminal():
+    path = _ACTIVE["path"]
+    if path is None: return None
+    term = TERMINALS.get(path)
+    if not term or not term["connected"]: return None
+    return term
+
+
+def _shared_login_file(term):
+    seed = os.path.normpath(str(term["path"])).lower().strip()
+    return os.path.join(CONFIG["shared_dir"], hashlib.md5(seed.encode()).hexdigest() + ".login")
+
+
+def _term_login(term):
+    """Account logged into `term`. In shared mode another process may have switched it."""
+    if not CONFIG["shared_dir"]: return term["login"]
+    import fcntl
+    try:
+        with open(_shared_login_file(term), "r") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            raw = f.read().strip()
+        return int(raw) if raw else 0
+    except FileNotFoundError:
+        return 0
+
+
+def _set_term_login(term, login):
+    term["login"] = login
+    if not CONFIG["shared_dir"]: return
+    import fcntl
+    with open(_shared_login_file(term), "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.seek(0)
+        f.truncate()
+        f.write(str(login))
+
+
+def _account():
+    term = _terminal()
+    if not term: return None
+    current = _term_login(term)
+    if not current: return None
+    acc = ACCOUNTS.get(current)
+    if acc is None and CONFIG["shared_dir"] and CONFIG["auto_provision"]:
+        acc = add_account(current)  # Logged in by another process
+    return acc
+
+
+def _catalog():
+    acc = _account()
+    server = acc["server"] if acc else CONFIG["default_server"]
+    if server not in SERVERS:
+        add_server(server, suffix=CONFIG["default_suffix"])
+    return SERVERS[server]["symbols"]
+
+
+def _quote(spec):
+    """Light random walk so prices move between polls (max once per 100ms)."""
+    now = time.time()
+    if now - spec["last_move"] > 0.1:
+        spec["bid"] = round(spec["bid"] * (1.0 + random.gauss(0, 0.00005)), spec["digits"])
+        spec["last_move"] = now
+    bid = spec["bid"]
+    ask = round(bid + spec["spread"] * spec["point"], spec["digits"])
+    return bid, ask
+
+
+def _profit(pos, spec, bid, ask):
+    current = bid if pos["type"] == ORDER_TYPE_BUY else ask
+    direction = 1 if pos["type"] == ORDER_TYPE_BUY else -1
+    return round((current - pos["price_open"]) * direction * pos["volume"] * spec["contract_size"], 2), current
+
+
+def _margin(spec, volume, price, leverage):
+    return round(volume * spec["contract_size"] * price / max(leverage, 1), 2)
+
+
+def _account_snapshot(acc):
+    catalog = SERVERS[acc["server"]]["symbols"]
+    profit = 0.0
+    margin = 0.0
+    for pos in acc["positions"].values():
+        spec = catalog.get(pos["symbol"])
+        if not spec: continue
+        bid, ask = _quote(spec)
+        p, _ = _profit(pos, spec, bid, ask)
+        profit += p
+        margin += _margin(spec, pos["volume"], pos["price_open"], acc["leverage"])
+    equity = acc["balance"] + profit
+    return round(profit, 2), round(equity, 2), round(margin, 2)
+
+
+def _position_tuple(pos, acc):
+    spec = SERVERS[acc["server"]]["symbols"].get(pos["symbol"])
+    profit, current = (0.0, pos["price_open"])
+    if spec:
+        bid, ask = _quote(spec)
+        profit, current = _profit(pos, spec, bid, ask)
+    return TradePosition(
+        ticket=pos["ticket"], time=int(pos["time"]), time_msc=int(pos["time"] * 1000),
+        time_update=int(pos["time_update"]), time_update_msc=int(pos["time_update"] * 1000),
+        type=pos["type"], magic=pos["magic"], identifier=pos["ticket"], reason=3,
+        volume=pos["volume"], price_open=pos["price_open"], sl=pos["sl"], tp=pos["tp"],
+        price_current=current, swap=0.0, profit=profit, symbol=pos["symbol"],
+        comment=pos["comment"], external_id="")
+
+
+def _symbol_tuple(spec, term):
+    bid, ask = _quote(spec)
+    selected = bool(term and spec["name"] in term["market_watch"])
+    return SymbolInfo(
+        name=spec["name"], path=f"Sim\\{spec['base']}", description=spec["base"],
+        visible=selected, select=selected, digits=spec["digits"], point=spec["point"],
+        spread=spec["spread"], trade_contract_size=spec["contract_size"],
+        trade_tick_size=spec["point"], trade_tick_value=spec["contract_size"] * spec["point"],
+        trade_mode=spec["trade_mode"], trade_stops_level=0, filling_mode=spec["filling_mode"],
+        expiration_time=0, volume_min=spec["volume_min"], volume_max=spec["volume_max"],
+        volume_step=spec["volume_step"], bid=bid, ask=ask,
+        currency_base=spec["base"][:3], currency_profit=spec["base"][3:6] or "USD",
+        currency_margin=spec["base"][:3], margin_initial=0.0)
+
+
+# ==========================================
+# 🔌 METATRADER5 API SURFACE
+# ==========================================
+def version():
+    _ipc("version")
+    return (500, 4000, "Sim")
+
+
+def last_error():
+    return _LAST_ERROR[0]
+
+
+def initialize(path=None, login=None, password=None, server=None, timeout=None, portable=False):
+    """Attaches the process to terminal `path`. The terminal keeps its own login across re-attach."""
+    _ipc("initialize")
+    path = os.path.normpath(path) if path else "default"
+    with _STATE_LOCK:
+        term = TERMINALS.get(path)
+        if term is None:
+            term = {"login": 0, "market_watch": set(), "connected": True, "path": path}
+            TERMINALS[path] = term
+        term["connected"] = True
+        switching = _ACTIVE["path"] != path
+        _ACTIVE["path"] = path
+    if switching:
+        _sleep(CONFIG["init_latency"])
+    _set_error(RES_S_OK, "Success")
+    if login:
+        return globals()["login"](login, password=password or "", server=server or "")
+    return True
+
+
+def shutdown():
+    """Detaches the binding. Like the real terminal, the logged-in account survives."""
+    _ipc("shutdown")
+    with _STATE_LOCK:
+        _ACTIVE["path"] = None
+    return True
+
+
+def login(login, password="", server="", timeout=60000):
+    _ipc("login")
+    term = _terminal()
+    if term is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return False
+    login = int(login)
+    with _STATE_LOCK:
+        acc = ACCOUNTS.get(login)
+        if acc is None:
+            if not CONFIG["auto_provision"]:
+                _set_error(RES_E_AUTH_FAILED, "Authorization failed")
+                return False
+            acc = add_account(login, password=password, server=server or None)
+        if acc["password"] and password != acc["password"]:
+            _set_error(RES_E_AUTH_FAILED, "Authorization failed")
+            return False
+        if server and server != acc["server"]:
+            _set_error(RES_E_AUTH_FAILED, "Authorization failed")
+            return False
+    # 🐢 Account switch: terminal reconnects to the trade server
+    current = _term_login(term)
+    if current != login:
+        _event("login_switch")
+        _sleep(CONFIG["login_latency"])
+    with _STATE_LOCK:
+        if current != login:
+            # Market Watch is per terminal profile; server change invalidates names
+            prev = ACCOUNTS.get(current)
+            if not prev or prev["server"] != acc["server"]:
+                term["market_watch"] = set()
+        _set_term_login(term, login)
+        _ACTIVE["login"] = login
+    _set_error(RES_S_OK, "Success")
+    return True
+
+
+def terminal_info():
+    _ipc("terminal_info")
+    term = _terminal()
+    if term is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    return TerminalInfo(
+        connected=True, trade_allowed=True, tradeapi_disabled=False, ping_last=int(CONFIG["fill_latency"] * 1e6),
+        build=4000, name="MetaTrader 5 (Sim)", company="Sim", path=os.path.dirname(term["path"]),
+        data_path=term["path"], commondata_path=term["path"])
+
+
+def account_info():
+    _ipc("account_info")
+    acc = _account()
+    if acc is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    with _STATE_LOCK:
+        profit, equity, margin = _account_snapshot(acc)
+    free = round(equity - margin, 2)
+    level = round(equity / margin * 100.0, 2) if margin > 0 else 0.0
+    return AccountInfo(
+        login=acc["login"], trade_mode=0, leverage=acc["leverage"], limit_orders=200,
+        margin_so_mode=0, trade_allowed=True, trade_expert=True, margin_mode=acc["margin_mode"],
+        currency_digits=2, fifo_close=False, balance=round(acc["balance"], 2), credit=0.0,
+        profit=profit, equity=equity, margin=margin, margin_free=free, margin_level=level,
+        margin_so_call=50.0, margin_so_so=30.0, name=acc["name"], server=acc["server"],
+        currency=acc["currency"], company="Sim")
+
+
+def symbols_total():
+    _ipc("symbols_total")
+    return len(_catalog())
+
+
+def symbols_get(group=None):
+    """Supports the binding's group syntax: "*EUR*,*USD*,!*JPY*"."""
+    _ipc("symbols_get")
+    term = _terminal()
+    with _STATE_LOCK:
+        specs = list(_catalog().values())
+        if group:
+            include = [g for g in group.split(",") if g and not g.startswith("!")]
+            exclude = [g[1:] for g in group.split(",") if g.startswith("!")]
+            specs = [s for s in specs
+                     if (not include or any(fnmatch.fnmatchcase(s["name"], g) for g in include))
+                     and not any(fnmatch.fnmatchcase(s["name"], g) for g in exclude)]
+        return tuple(_symbol_tuple(s, term) for s in specs)
+
+
+def symbol_select(symbol, enable=True):
+    _ipc("symbol_select")
+    term = _terminal()
+    if term is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return False
+    with _STATE_LOCK:
+        if symbol not in _catalog():
+            _set_error(RES_E_NOT_FOUND, "Symbol not found")
+            return False
+        if enable:
+            term["market_watch"].add(symbol)
+        else:
+            # Terminal refuses to hide symbols with open positions
+            acc = _account()
+            if acc and any(p["symbol"] == symbol for p in acc["positions"].values()):
+                return False
+            term["market_watch"].discard(symbol)
+    return True
+
+
+def symbol_info(symbol):
+    _ipc("symbol_info")
+    term = _terminal()
+    if term is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    with _STATE_LOCK:
+        spec = _catalog().get(symbol)
+        if not spec:
+            _set_error(RES_E_NOT_FOUND, "Symbol not found")
+            return None
+        return _symbol_tuple(spec, term)
+
+
+def symbol_info_tick(symbol):
+    """Like the terminal, ticks only stream for symbols in Market Watch."""
+    _ipc("symbol_info_tick")
+    term = _terminal()
+    if term is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    with _STATE_LOCK:
+        spec = _catalog().get(symbol)
+        if not spec or symbol not in term["market_watch"]:
+            _set_error(RES_E_NOT_FOUND, "Symbol not found")
+            return None
+        bid, ask = _quote(spec)
+    now = time.time()
+    return Tick(time=int(now), bid=bid, ask=ask, last=0.0, volume=0, time_msc=int(now * 1000), flags=6, volume_real=0.0)
+
+
+def positions_total():
+    _ipc("positions_total")
+    acc = _account()
+    return len(acc["positions"]) if acc else 0
+
+
+def positions_get(symbol=None, group=None, ticket=None):
+    _ipc("positions_get")
+    acc = _account()
+    if acc is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    with _STATE_LOCK:
+        out = []
+        for pos in acc["positions"].values():
+            if ticket is not None and pos["ticket"] != int(ticket): continue
+            if symbol is not None and pos["symbol"] != symbol: continue
+            if group is not None and not fnmatch.fnmatchcase(pos["symbol"], group): continue
+            out.append(_position_tuple(pos, acc))
+        return tuple(out)
+
+
+def orders_total():
+    _ipc("orders_total")
+    return 0
+
+
+def orders_get(symbol=None, group=None, ticket=None):
+    _ipc("orders_get")
+    return () if _account() else None
+
+
+def history_deals_total(date_from, date_to):
+    return len(history_deals_get(date_from, date_to) or ())
+
+
+def history_deals_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    _ipc("history_deals_get")
+    acc = _account()
+    if acc is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    t_from, t_to = _to_ts(date_from), _to_ts(date_to)
+    with _STATE_LOCK:
+        out = []
+        for d in acc["deals"]:
+            if ticket is not None:
+                if d.ticket != int(ticket): continue
+            elif position is not None:
+                if d.position_id != int(position): continue
+            else:
+                if t_from is not None and d.time < int(t_from): continue
+                if t_to is not None and d.time > t_to: continue
+                if group is not None and not fnmatch.fnmatchcase(d.symbol, group): continue
+            out.append(d)
+        return tuple(out)
+
+
+def history_orders_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    _ipc("history_orders_get")
+    return () if _account() else None
+
+
+def order_calc_margin(action, symbol, volume, price):
+    _ipc("order_calc_margin")
+    acc = _account()
+    if acc is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    spec = _catalog().get(symbol)
+    if not spec:
+        _set_error(RES_E_NOT_FOUND, "Symbol not found")
+        return None
+    return _margin(spec, float(volume), float(price), acc["leverage"])
+
+
+def order_calc_profit(action, symbol, volume, price_open, price_close):
+    _ipc("order_calc_profit")
+    spec = _catalog().get(symbol)
+    if not spec: return None
+    direction = 1 if action == ORDER_TYPE_BUY else -1
+    return round((price_close - price_open) * direction * volume * spec["contract_size"], 2)
+
+
+def _result(retcode, request, comment, deal=0, order=0, volume=0.0, price=0.0, bid=0.0, ask=0.0):
+    return OrderSendResult(retcode=retcode, deal=deal, order=order, volume=volume, price=price,
+                           bid=bid, ask=ask, comment=comment, request_id=0, retcode_external=0,
+                           request=request)
+
+
+def _record_deal(acc, order, pos, deal_type, entry, volume, price, profit, comment, now):
+    deal = TradeDeal(
+        ticket=_next_ticket(), order=order, time=int(now), time_msc=int(now * 1000), type=deal_type,
+        entry=entry, magic=pos["magic"], position_id=pos["ticket"], reason=3, volume=volume,
+        price=price, commission=0.0, swap=0.0, profit=profit, fee=0.0, symbol=pos["symbol"],
+        comment=comment, external_id="")
+    acc["deals"].append(deal)
+    return deal
+
+
+def order_send(request):
+    """Executes TRADE_ACTION_DEAL (open / close by `position`) and TRADE_ACTION_SLTP."""
+    _ipc("order_send")
+    acc = _account()
+    if acc is None:
+        _set_error(RES_E_INTERNAL_FAIL_CONNECT, "No IPC connection")
+        return None
+    if _ACTIVE["login"] and acc["login"] != _ACTIVE["login"]:
+        _event("foreign_order_send")  # Another process switched the account under us
+    _sleep(CONFIG["fill_latency"])
+    return _execute(acc, request)
+
+
+def account_trade(login, request):
+    """
+    Harness API: trade an account server-side (manual trader / SL-TP hit),
+    without touching any terminal attachment, IPC counters or latencies.
+    """
+    acc = ACCOUNTS.get(int(login))
+    if acc is None: return None
+    return _execute(acc, request)
+
+
+def _execute(acc, request):
+    action = request.get("action")
+    with _STATE_LOCK:
+        if action == TRADE_ACTION_SLTP:
+            pos = acc["positions"].get(int(request.get("position", 0) or 0))
+            if not pos:
+                return _result(TRADE_RETCODE_POSITION_CLOSED, request, "Position doesn't exist")
+            pos["sl"] = float(request.get("sl", pos["sl"]) or 0.0)
+            pos["tp"] = float(request.get("tp", pos["tp"]) or 0.0)
+            pos["time_update"] = time.time()
+            return _result(TRADE_RETCODE_DONE, request, "Request executed")
+
+        if action != TRADE_ACTION_DEAL:
+            return _result(TRADE_RETCODE_INVALID, request, "Unsupported action")
+
+        symbol = request.get("symbol")
+        spec = SERVERS[acc["server"]]["symbols"].get(symbol)
+        if not spec:
+            return _result(TRADE_RETCODE_INVALID, request, "Invalid symbol")
+        if spec["trade_mode"] == SYMBOL_TRADE_MODE_DISABLED:
+            return _result(TRADE_RETCODE_MARKET_CLOSED, request, "Market closed")
+
+        filling = request.get("type_filling", ORDER_FILLING_FOK)
+        allowed = spec["filling_mode"]
+        if (filling == ORDER_FILLING_IOC and not allowed & SYMBOL_FILLING_IOC) or \
+           (filling == ORDER_FILLING_FOK and not allowed & SYMBOL_FILLING_FOK):
+            return _result(TRADE_RETCODE_INVALID_FILL, request, "Unsupported filling mode")
+
+        volume = float(request.get("volume", 0.0))
+        step = spec["volume_step"]
+        if volume < spec["volume_min"] - 1e-9 or volume > spec["volume_max"] + 1e-9 or \
+           abs(round(volume / step) * step - volume) > 1e-7:
+            return _result(TRADE_RETCODE_INVALID_VOLUME, request, "Invalid volume")
+
+        bid, ask = _quote(spec)
+        if CONFIG["requote_rate"] > 0 and random.random() < CONFIG["requote_rate"]:
+            return _result(TRADE_RETCODE_REQUOTE, request, "Requote", bid=bid, ask=ask)
+
+        order_type = request.get("type", ORDER_TYPE_BUY)
+        fill_price = ask if order_type == ORDER_TYPE_BUY else bid
+        deal_type = DEAL_TYPE_BUY if order_type == ORDER_TYPE_BUY else DEAL_TYPE_SELL
+        now = time.time()
+        order_ticket = _next_ticket()
+        comment = str(request.get("comment", ""))[:31]
+
+        target = int(request.get("position", 0) or 0)
+        if not target and acc["margin_mode"] == ACCOUNT_MARGIN_MODE_RETAIL_NETTING:
+            # Netting: one position per symbol, opposite deals reduce it
+            for p in acc["positions"].values():
+                if p["symbol"] == symbol:
+                    if p["type"] != order_type: target = p["ticket"]
+                    else:
+                        p["price_open"] = round((p["price_open"] * p["volume"] + fill_price * volume) / (p["volume"] + volume), spec["digits"])
+                        p["volume"] = round(p["volume"] + volume, 2)
+                        p["time_update"] = now
+                        deal = _record_deal(acc, order_ticket, p, deal_type, DEAL_ENTRY_IN, volume, fill_price, 0.0, comment, now)
+                        return _result(TRADE_RETCODE_DONE, request, "Request executed", deal.ticket, order_ticket, volume, fill_price, bid, ask)
+                    break
+
+        if target:
+            # 📉 CLOSE / PARTIAL CLOSE
+            pos = acc["positions"].get(target)
+            if not pos:
+                return _result(TRADE_RETCODE_POSITION_CLOSED, request, "Position doesn't exist")
+            if order_type == pos["type"]:
+                return _result(TRADE_RETCODE_INVALID, request, "Invalid close direction")
+            close_vol = min(volume, pos["volume"])
+            close_price = bid if pos["type"] == ORDER_TYPE_BUY else ask
+            direction = 1 if pos["type"] == ORDER_TYPE_BUY else -1
+            profit = round((close_price - pos["price_open"]) * direction * close_vol * spec["contract_size"], 2)
+            acc["balance"] += profit
+            deal = _record_deal(acc, order_ticket, pos, deal_type, DEAL_ENTRY_OUT, close_vol, close_price, profit, comment, now)
+            remaining = round(pos["volume"] - close_vol, 8)
+            del acc["positions"][pos["ticket"]]
+            if remaining > 1e-9:
+                pos["volume"] = remaining
+                pos["time_update"] = now
+                if acc["rotate_on_partial"]:
+                    # 🔄 Broker re-tickets the remainder (what the rotation scan looks for)
+                    pos["ticket"] = _next_ticket()
+                acc["positions"][pos["ticket"]] = pos
+            return _result(TRADE_RETCODE_DONE, request, "Request executed", deal.ticket, order_ticket, close_vol, close_price, bid, ask)
+
+        # 📈 OPEN
+        _, equity, margin = _account_snapshot(acc)
+        need = _margin(spec, volume, fill_price, acc["leverage"])
+        if need > equity - margin:
+            return _result(TRADE_RETCODE_NO_MONEY, request, "No money", bid=bid, ask=ask)
+        pos = {
+            "ticket": order_ticket, "time": now, "time_update": now, "type": order_type,
+            "magic": int(request.get("magic", 0)), "volume": volume, "price_open": fill_price,
+            "sl": float(request.get("sl", 0.0) or 0.0), "tp": float(request.get("tp", 0.0) or 0.0),
+            "symbol": symbol, "comment": comment,
+        }
+        acc["positions"][order_ticket] = pos
+        deal = _record_deal(acc, order_ticket, pos, deal_type, DEAL_ENTRY_IN, volume, fill_price, 0.0, comment, now)
+        return _result(TRADE_RETCODE_DONE, request, "Request executed", deal.ticket, order_ticket, volume, fill_price, bid, ask)
@@ -0,0 +1,138 @@
+"""
+🧮 BATCH ORDER-PLAN COMPILER (signal fan-out)
+
+Per follower, worker_loop used to compute after login and under the terminal
+lock: FIXED / EQUITY lot, allocation basis, step rounding + clamping, margin
+feasibility, inverted SL/TP distances, digit rounding and the comment tag.
+None of it needs the terminal once specs, margin rates and account snapshots
+are cached, so compile_open() does it for the whole roster in one pass
+(NumPy when installed, plain Python otherwise - same math, same rounding).
+
+compile_open() returns {login: plan}; the slave configs are never modified (callers
+reuse them, and overlapping batches may share them). submit_jobs puts each plan on its TradeJob:
+    {"symbol", "volume", "type_invert", "sl_dist", "tp_dist", "digits", "comment", "feasible", "reason"}
+  feasible=False  -> follower is reported SKIPPED without touching the terminal
+  no plan         -> missing spec / equity / margin rate: worker computes it as before
+
+Only OPEN signals are planned. Prices are applied at send time (finalize()).
+"""
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # Pure-Python fallback (identical results)
+
+SNAPSHOT_MAX_AGE = 60.0  # Account snapshots older than this are not trusted for planning
+
+
+def comment_tag(session_id, master_ticket):
+    """Order comment of a copy (planned orders and WorkerPool._prepare). Reconcile parses it back to the master ticket."""
+    return f"CPY:S{session_id}:{master_ticket}" if session_id and int(session_id) > 0 else f"CPY:{master_ticket}"
+
+
+def _lots_py(m_lot, master_eq, rows):
+    """rows: [risk, equity_mode, allocation, equity, step, vmin, vmax] -> lots (pre-margin)."""
+    out = []
+    for risk, eq_mode, alloc, equity, step, vmin, vmax in rows:
+        mult = risk / 100.0
+        if eq_mode and master_eq > 0 and (equity > 0 or alloc > 0):
+            basis = alloc if alloc > 0 else equity
+            raw = m_lot * (basis / master_eq) * mult
+        else:
+            raw = m_lot * mult
+        if step > 0: raw = round(raw / step) * step
+        out.append(max(vmin, min(raw, vmax)))
+    return out
+
+
+def _lots_np(m_lot, master_eq, rows):
+    a = np.asarray(rows, dtype=float)
+    risk, eq_mode, alloc, equity, step, vmin, vmax = a.T
+    mult = risk / 100.0
+    use_eq = (eq_mode > 0) & (master_eq > 0) & ((equity > 0) | (alloc > 0))
+    basis = np.where(alloc > 0, alloc, equity)
+    ratio = basis / master_eq if master_eq > 0 else np.zeros_like(basis)
+    raw = np.where(use_eq, m_lot * ratio * mult, m_lot * mult)
+    safe_step = np.where(step > 0, step, 1.0)
+    raw = np.where(step > 0, np.round(raw / safe_step) * safe_step, raw)
+    return np.maximum(vmin, np.minimum(raw, vmax)).tolist()
+
+
+def compile_open(signal, slaves, resolve_symbol, get_spec, get_account, margin_model):
+    """
+    Plans every follower that can be planned from cache. Returns {login: plan} (empty for non-OPEN signals).
+    resolve_symbol(server, raw) -> symbol | None     (cache only, no IPC)
+    get_spec(server, symbol)    -> SymbolSpec | None (cache only, no IPC)
+    get_account(login)          -> {"equity", "margin_free", "leverage", "ts"} | None
+    """
+    if signal.get('action', 'OPEN') != 'OPEN': return {}
+    raw_symbol = signal.get('symbol')
+    m_lot = float(signal.get('volume', 0.01))
+    master_eq = float(signal.get('master_equity', 0.0))
+    m_entry = float(signal.get('price', 0.0) or 0.0)
+    sl_raw = float(signal.get('sl', 0.0) or 0.0)
+    tp_raw = float(signal.get('tp', 0.0) or 0.0)
+    dist_sl = abs(m_entry - sl_raw) if sl_raw > 0 else 0.0
+    dist_tp = abs(m_entry - tp_raw) if tp_raw > 0 else 0.0
+    now = time.time()
+
+    # 1. Gather rows (pure cache lookups)
+    todo, rows = [], []
+    for s in slaves:
+        server = s.get('server')
+        symbol = resolve_symbol(server, raw_symbol) if raw_symbol else None
+        spec = get_spec(server, symbol) if symbol else None
+        acct = get_account(int(s.get('login', 0) or 0))
+        if not spec or not acct or now - acct.get('ts', 0) > SNAPSHOT_MAX_AGE: continue
+        eq_mode = 1.0 if s.get('copy_mode', 'FIXED') == 'EQUITY' else 0.0
+        todo.append((s, symbol, spec, acct))
+        rows.append([float(s.get('risk_factor', 100.0)), eq_mode, float(s.get('allocation', 0.0)),
+                     float(acct.get('equity', 0.0)), spec.volume_step or 0.0, spec.volume_min, spec.volume_max])
+    if not rows: return {}
+
+    # 2. Lot math for the whole roster in one pass
+    lots = (_lots_np if np is not None else _lots_py)(m_lot, master_eq, rows)
+
+    # 3. Margin feasibility from the learned model (grouped by symbol / server, no IPC)
+    groups = {}
+    for i, (s, symbol, spec, acct) in enumerate(todo):
+        groups.setdefault((s.get('server'), symbol), []).append(i)
+    verdicts = [None] * len(todo)
+    for (server, symbol), idx in groups.items():
+        price = m_entry  # Master entry as price estimate; margin rates tolerate small drift
+        res = margin_model.affordable(server, symbol, price, [
+            (todo[i][3].get('leverage', 0), todo[i][3].get('margin_free', 0.0), lots[i], todo[i][2].volume_min) for i in idx])
+        for i, v in zip(idx, res): verdicts[i] = v
+
+    plans = {}
+    for i, (s, symbol, spec, acct) in enumerate(todo):
+        verdict = verdicts[i]
+        if verdict is None: continue  # Margin rate not learned yet -> worker decides
+        feasible = verdict > 0
+        plans[int(s.get('login', 0) or 0)] = {
+            "symbol": symbol,
+            "volume": round(verdict, 2),
+            "type_invert": bool(s.get('invert_copy', False)),
+            "sl_dist": dist_sl,
+            "tp_dist": dist_tp,
+            "digits": spec.digits if spec.digits is not None else 5,
+            "comment": comment_tag(s.get('session_id', 0), signal.get('ticket')),
+            "feasible": feasible,
+            "reason": "" if feasible else "SKIPPED: Margin/Risk Limit Reached (planned)",
+        }
+    return plans
+
+
+def finalize(plan, is_buy, price, sl_raw, tp_raw):
+    """SL/TP at send time. Inverted copies mirror the master's ranges around OUR price."""
+    if not plan["type_invert"]:
+        return sl_raw, tp_raw
+    d, dist_sl, dist_tp = plan["digits"], plan["sl_dist"], plan["tp_dist"]
+    if is_buy:
+        sl = round(price - dist_tp, d) if dist_tp > 0 else 0.0
+        tp = round(price + dist_sl, d) if dist_sl > 0 else 0.0
+    else:
+        sl = round(price + dist_tp, d) if dist_tp > 0 else 0.0
+        tp = round(price - dist_sl, d) if dist_sl > 0 else 0.0
+    return sl, tp
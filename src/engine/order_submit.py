@@ -0,0 +1,160 @@
+"""
+📮 ORDER SUBMISSION PIPELINE (filling mode / session state / requote retry)
+
+Copy paths used to send ORDER_FILLING_IOC at a fixed price and treat every
+non-DONE retcode as final. Brokers that only allow FOK / RETURN rejected every
+copy (INVALID_FILL), and a requote left the follower to the 15s reconcile
+catch-up.
+
+    res = SUBMITTER.send(mt5, request, server)   # drop-in for mt5.order_send(request)
+
+Per (server, symbol), read from symbol_info at most every SUBMIT_STATE_TTL:
+    filling_mode  -> type_filling from the allowed set (IOC > FOK > RETURN)
+    trade_mode    -> opens only: DISABLED / CLOSEONLY fail fast, LONG/SHORTONLY the other side
+A MARKET_CLOSED / TRADE_DISABLED retcode on an OPEN marks the symbol closed
+for new positions for SUBMIT_CLOSED_BACKOFF seconds, so the rest of the batch
+fails fast without IPC. Closes (and SL/TP changes) are always sent: close-only
+and session-edge symbols still accept them.
+
+Immediate retries (same lock, at most once each):
+    REQUOTE / PRICE_CHANGED / PRICE_OFF -> fresh tick, resend
+    INVALID_FILL                        -> re-read symbol_info, next allowed filling mode
+
+Fast failures return an order_send-shaped result, so callers keep their
+`res.retcode != TRADE_RETCODE_DONE` branches. Retcodes are counted per server
+(metrics.ORDER_RETCODES, SUBMITTER.stats).
+
+    SUBMIT_STATE_TTL        default 60
+    SUBMIT_CLOSED_BACKOFF   default 30
+"""
+import os
+import time
+import threading
+from collections import namedtuple
+
+import metrics
+
+STATE_TTL = float(os.getenv("SUBMIT_STATE_TTL", "60"))
+CLOSED_BACKOFF = float(os.getenv("SUBMIT_CLOSED_BACKOFF", "30"))
+
+# MQL5 enum values (identical in MetaTrader5 and mt5_sim)
+TRADE_ACTION_DEAL = 1
+ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN = 0, 1, 2
+SYMBOL_FILLING_FOK, SYMBOL_FILLING_IOC = 1, 2
+SYMBOL_TRADE_MODE_DISABLED, SYMBOL_TRADE_MODE_LONGONLY, SYMBOL_TRADE_MODE_SHORTONLY, \
+    SYMBOL_TRADE_MODE_CLOSEONLY, SYMBOL_TRADE_MODE_FULL = 0, 1, 2, 3, 4
+RETCODE_REQUOTE = 10004
+RETCODE_DONE, RETCODE_DONE_PARTIAL = 10009, 10010
+RETCODE_TRADE_DISABLED, RETCODE_MARKET_CLOSED = 10017, 10018
+RETCODE_PRICE_CHANGED, RETCODE_PRICE_OFF = 10020, 10021
+RETCODE_INVALID_FILL = 10030
+
+REPRICE_RETCODES = (RETCODE_REQUOTE, RETCODE_PRICE_CHANGED, RETCODE_PRICE_OFF)
+CLOSED_RETCODES = (RETCODE_MARKET_CLOSED, RETCODE_TRADE_DISABLED)
+
+Rejected = namedtuple("Rejected", ["retcode", "deal", "order", "volume", "price", "bid", "ask", "comment",
+                                   "request_id", "retcode_external", "request"])
+
+
+def filling_for(filling_mode, skip=()):
+    """ORDER_FILLING_* for a symbol's SYMBOL_FILLING_* bitmask (None if everything is in skip)."""
+    for flag, mode in ((SYMBOL_FILLING_IOC, ORDER_FILLING_IOC), (SYMBOL_FILLING_FOK, ORDER_FILLING_FOK)):
+        if filling_mode & flag and mode not in skip: return mode
+    return ORDER_FILLING_RETURN if ORDER_FILLING_RETURN not in skip else None
+
+
+class OrderSubmitter:
+    def __init__(self, state_ttl=STATE_TTL, closed_backoff=CLOSED_BACKOFF):
+        self.state_ttl = state_ttl
+        self.closed_backoff = closed_backoff
+        self.state = {}   # (server, symbol) -> [filling_mode, trade_mode, fetched_at]
+        self.fill = {}    # (server, symbol) -> ORDER_FILLING_* learned from an INVALID_FILL retry
+        self.closed = {}  # (server, symbol) -> closed until (epoch)
+        self.stats = {}   # server -> {retcode: count}
+        self.lock = threading.Lock()
+
+    def _state(self, mt5, key, refresh=False):
+        st = self.state.get(key)
+        if st and not refresh and time.time() - st[2] < self.state_ttl: return st
+        try: info = mt5.symbol_info(key[1])
+        except: info = None
+        if info is None: return st
+        st = [getattr(info, "filling_mode", 0) or 0, getattr(info, "trade_mode", SYMBOL_TRADE_MODE_FULL), time.time()]
+        with self.lock:
+            self.state[key] = st
+        return st
+
+    def _precheck(self, key, st, request):
+        """(retcode, comment) when a NEW position cannot fill, else None. No IPC. Closes are never rejected."""
+        if request.get("position"): return None # Close of an existing position: always sent
+        if self.closed.get(key, 0) > time.time():
+            return RETCODE_MARKET_CLOSED, "Market closed (cached)"
+        if not st: return None
+        mode = st[1]
+        buy = request.get("type") == ORDER_TYPE_BUY
+        if mode == SYMBOL_TRADE_MODE_DISABLED:
+            return RETCODE_TRADE_DISABLED, "Trade disabled for symbol"
+        if mode == SYMBOL_TRADE_MODE_CLOSEONLY:
+            return RETCODE_TRADE_DISABLED, "Symbol is close-only"
+        if mode == SYMBOL_TRADE_MODE_LONGONLY and not buy:
+            return RETCODE_TRADE_DISABLED, "Symbol is long-only"
+        if mode == SYMBOL_TRADE_MODE_SHORTONLY and buy:
+            return RETCODE_TRADE_DISABLED, "Symbol is short-only"
+        return None
+
+    def _count(self, server, retcode, attempt):
+        server = server or ""
+        with self.lock:
+            per = self.stats.setdefault(server, {})
+            per[retcode] = per.get(retcode, 0) + 1
+        metrics.ORDER_RETCODES.inc(server=server, retcode=retcode, attempt=attempt)
+
+    def _send(self, mt5, request, server, attempt):
+        res = mt5.order_send(request)
+        self._count(server, getattr(res, "retcode", "none"), attempt)
+        return res
+
+    def send(self, mt5, request, server=None):
+        """mt5.order_send(request) with filling-mode selection, fail-fast and one immediate retry."""
+        symbol = request.get("symbol")
+        if request.get("action") != TRADE_ACTION_DEAL or not symbol:
+            return self._send(mt5, request, server, "first")
+
+        key = (server or "", symbol)
+        st = self._state(mt5, key)
+        reject = self._precheck(key, st, request)
+        if reject:
+            self._count(server, reject[0], "fast")
+            return Rejected(reject[0], 0, 0, 0.0, 0.0, 0.0, 0.0, reject[1], 0, 0, request)
+
+        mode = self.fill.get(key)
+        if mode is None and st: mode = filling_for(st[0])
+        if mode is not None: request["type_filling"] = mode
+
+        res = self._send(mt5, request, server, "first")
+        code = getattr(res, "retcode", None)
+
+        if code in REPRICE_RETCODES:
+            tick = mt5.symbol_info_tick(symbol)
+            if tick and "price" in request:
+                request["price"] = tick.ask if request.get("type") == ORDER_TYPE_BUY else tick.bid
+            res = self._send(mt5, request, server, "retry")
+            code = getattr(res, "retcode", None)
+
+        elif code == RETCODE_INVALID_FILL:
+            st = self._state(mt5, key, refresh=True)
+            nxt = filling_for(st[0] if st else 0, skip=(request.get("type_filling"),))
+            if nxt is not None:
+                request["type_filling"] = nxt
+                res = self._send(mt5, request, server, "retry")
+                code = getattr(res, "retcode", None)
+                if code in (RETCODE_DONE, RETCODE_DONE_PARTIAL):
+                    with self.lock:
+                        self.fill[key] = nxt
+
+        if code in CLOSED_RETCODES and not request.get("position"):
+            with self.lock:
+                self.closed[key] = time.time() + self.closed_backoff
+            print(f"[SUBMIT] 🚫 {symbol}@{server or 'terminal'} closed ({code}). Failing fast for {self.closed_backoff:.0f}s")
+        return res
@@ -0,0 +1,300 @@
+"""
+📼 SIGNAL FLIGHT RECORDER & REPLAY ENGINE
+
+RECORD (production, read-only):
+    Tails `stream:signals` (written by broadcaster.send_signal) and snapshots
+    `state:master:*:tickets` + `history:master:*:closed` into a gzip JSONL file.
+
+    python signal_recorder.py record --redis-url redis://prod:6379 --out monday_open.jsonl.gz --duration 3600
+    python signal_recorder.py record --backfill --out last_stream.jsonl.gz       # include existing stream entries
+
+REPLAY (local Redis, executor in TURBO mode with MT5_BACKEND=SIM):
+    Re-publishes signals to `signals:master:{id}` with their original spacing
+    (1x, 10x or max) and restores master state snapshots, re-stamping timestamps
+    so the executor's 60s staleness guard does not drop them.
+
+    Start the executor with AUTH_URL pointing at the capture port so execution
+    reports land here (optionally forwarded to the real app):
+        AUTH_URL=http://localhost:3900 MT5_BACKEND=SIM python executor.py --mode TURBO
+        python signal_recorder.py replay --file monday_open.jsonl.gz --speed 10 --capture-port 3900
+
+    Report: fill lag per signal (publish -> execution webhook) and the number of
+    catch-up OPENs / ghost CLOSEs (reports for tickets the replay never signalled).
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import redis
+import requests
+
+STREAM_KEY = "stream:signals"
+STATE_PATTERN = "state:master:*:tickets"
+CLOSED_PATTERN = "history:master:*:closed"
+
+
+def percentiles(values):
+    if not values: return {"count": 0}
+    vals = sorted(values)
+    n = len(vals)
+    def pick(p): return round(vals[min(n - 1, int(round(p / 100.0 * (n - 1))))], 3)
+    return {"count": n, "p50": pick(50), "p95": pick(95), "p99": pick(99), "max": round(vals[-1], 3)}
+
+
+def stream_id_time(entry_id):
+    """Stream IDs are '<ms>-<seq>': the server-side append time."""
+    return int(str(entry_id).split("-")[0]) / 1000.0
+
+
+# ==========================================
+# 🔴 RECORDER
+# ==========================================
+def record(args):
+    r = redis.from_url(args.redis_url, decode_responses=True)
+    r.ping()
+    last_id = "0-0" if args.backfill else "$"
+    out = gzip.open(args.out, "wt", encoding="utf-8")
+    out.write(json.dumps({"kind": "meta", "t": time.time(), "source": args.redis_url, "version": 1}) + "\n")
+
+    seen_state = {}
+    seen_closed = {}
+    signals = snapshots = 0
+    started = time.time()
+    last_snap = 0.0
+
+    print(f"[RECORD] 🔴 Recording {STREAM_KEY} + master state -> {args.out} (Ctrl+C to stop)")
+    try:
+        while True:
+            if args.duration and time.time() - started > args.duration: break
+
+            # 1. 📡 SIGNALS (Blocking tail)
+            entries = r.xread({STREAM_KEY: last_id}, block=int(args.state_interval * 1000), count=500)
+            for _, items in entries or []:
+                for entry_id, fields in items:
+                    last_id = entry_id
+                    out.write(json.dumps({
+                        "kind": "signal", "t": stream_id_time(entry_id), "id": entry_id,
+                        "payload": fields.get("payload"),
+                    }) + "\n")
+                    signals += 1
+
+            # 2. 📸 MASTER STATE SNAPSHOTS (Only on change)
+            now = time.time()
+            if now - last_snap >= args.state_interval:
+                last_snap = now
+                for key in r.scan_iter(match=STATE_PATTERN, count=500):
+                    val = r.get(key)
+                    if val and seen_state.get(key) != val:
+                        seen_state[key] = val
+                        out.write(json.dumps({"kind": "state", "t": now, "key": key, "value": val}) + "\n")
+                        snapshots += 1
+                for key in r.scan_iter(match=CLOSED_PATTERN, count=500):
+                    members = sorted(r.smembers(key))
+                    if seen_closed.get(key) != members:
+                        seen_closed[key] = members
+                        out.write(json.dumps({"kind": "closed", "t": now, "key": key, "members": members}) + "\n")
+                        snapshots += 1
+                out.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        out.close()
+    print(f"[RECORD] 💾 Saved {signals} signals + {snapshots} snapshots to {args.out}")
+
+
+# ==========================================
+# 🎯 EXECUTION REPORT CAPTURE (Stand-in for AUTH_URL)
+# ==========================================
+class ReportSink:
+    def __init__(self, forward_url=None):
+        self.forward_url = forward_url
+        self.reports = []  # (recv_time, payload)
+        self.lock = threading.Lock()
+
+    def serve(self, port):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+                recv = time.time()
+                if self.path.startswith("/api/webhook/execution"):
+                    try:
+                        with sink.lock:
+                            sink.reports.append((recv, json.loads(body)))
+                    except: pass
+                status, resp = 200, b'{"success":true}'
+                if sink.forward_url:
+                    try:
+                        fwd = requests.post(f"{sink.forward_url}{self.path}", data=body, timeout=5,
+                                            headers={k: v for k, v in self.headers.items() if k.lower() != "host"})
+                        status, resp = fwd.status_code, fwd.content
+                    except: pass
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(resp)
+
+            def log_message(self, *a): pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[REPLAY] 🎯 Capturing execution reports on http://127.0.0.1:{port}/api/webhook/execution")
+        return server
+
+
+# ==========================================
+# ▶️ REPLAYER
+# ==========================================
+def load_records(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        recs = [json.loads(line) for line in f if line.strip()]
+    return sorted([x for x in recs if x.get("kind") != "meta"], key=lambda x: x["t"])
+
+
+def restamp_state(value, now):
+    try:
+        data = json.loads(value)
+        data["timestamp"] = now
+        return json.dumps(data)
+    except: return value
+
+
+def remap_key(key, remap):
+    for old, new in remap.items():
+        key = key.replace(f"master:{old}:", f"master:{new}:")
+    return key
+
+
+def replay(args):
+    r = redis.from_url(args.redis_url, decode_responses=True)
+    r.ping()
+    remap = dict(m.split("=", 1) for m in (args.remap_master or []))
+    records = load_records(args.file)
+    if not records:
+        print("[REPLAY] ⚠️ Empty recording.")
+        return
+
+    sink = ReportSink(args.forward) if args.capture_port else None
+    if sink: sink.serve(args.capture_port)
+
+    speed = 0.0 if str(args.speed).lower() == "max" else float(args.speed)
+    rec_t0 = records[0]["t"]
+    wall_t0 = time.time()
+    published = {}  # (masterTicket, action) -> first publish time
+    sent = 0
+
+    print(f"[REPLAY] ▶️ {len(records)} records over {records[-1]['t'] - rec_t0:.1f}s recorded time at {args.speed}x")
+    for rec in records:
+        if speed > 0:
+            due = wall_t0 + (rec["t"] - rec_t0) / speed
+            delay = due - time.time()
+            if delay > 0: time.sleep(delay)
+
+        now = time.time()
+        if rec["kind"] == "signal":
+            try:
+                payload = json.loads(rec["payload"])
+            except: continue
+            mid = str(payload.get("masterId"))
+            payload["masterId"] = remap.get(mid, mid)
+            payload["recorded_timestamp"] = payload.get("timestamp")
+            payload["timestamp"] = now  # 🛡️ Survive the executor's 60s staleness guard
+            json_payload = json.dumps(payload)
+            r.publish(f"signals:master:{payload['masterId']}", json_payload)
+            r.xadd(STREAM_KEY, {"payload": json_payload, "timestamp": str(now)})
+            published.setdefault((str(payload.get("ticket")), payload.get("action", "OPEN")), now)
+            sent += 1
+        elif rec["kind"] == "state":
+            key = remap_key(rec["key"], remap)
+            r.set(key, restamp_state(rec["value"], now), ex=60)
+            r.set(key.replace(":tickets", ":ready"), "1", ex=300)
+        elif rec["kind"] == "closed":
+            key = remap_key(rec["key"], remap)
+            if rec["members"]:
+                r.sadd(key, *rec["members"])
+                r.expire(key, 172800)
+
+    replay_done = time.time()
+    print(f"[REPLAY] ✅ Published {sent} signals in {replay_done - wall_t0:.1f}s. Settling {args.settle}s for reports...")
+    if not sink: return
+    time.sleep(args.settle)
+
+    # 📊 JOIN REPORTS TO SIGNALS
+    lag_by_signal = {}
+    catchup_opens = ghost_closes = failed = 0
+    with sink.lock:
+        reports = list(sink.reports)
+    for recv, rep in reports:
+        key = (str(rep.get("masterTicket")), rep.get("action", "OPEN"))
+        if rep.get("status") != "FILLED": failed += 1
+        t_pub = published.get(key)
+        if t_pub is None or recv < t_pub:
+            # Reconcile acted on a ticket we never signalled for that action
+            if key[1] == "OPEN": catchup_opens += 1
+            else: ghost_closes += 1
+            continue
+        lag_by_signal.setdefault(key, []).append((recv - t_pub) * 1000)
+
+    all_lags = [x for v in lag_by_signal.values() for x in v]
+    result = {
+        "file": args.file,
+        "speed": args.speed,
+        "replayed_at": datetime.fromtimestamp(wall_t0).isoformat(),
+        "signals_published": sent,
+        "reports": len(reports),
+        "failed_reports": failed,
+        "catchup_opens": catchup_opens,
+        "ghost_closes": ghost_closes,
+        "signals_without_fill": sum(1 for k in published if k not in lag_by_signal),
+        "fill_lag_ms": percentiles(all_lags),
+        "per_signal": [{"ticket": k[0], "action": k[1], "fills": len(v), **percentiles(v)} for k, v in sorted(lag_by_signal.items())],
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"[REPLAY] 💾 Saved {args.out}")
+    lag = result["fill_lag_ms"]
+    print(f"[REPLAY] 📊 Reports={len(reports)} CatchUp={catchup_opens} Ghost={ghost_closes} "
+          f"Lag p50={lag.get('p50')}ms p95={lag.get('p95')}ms p99={lag.get('p99')}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hydra Signal Flight Recorder / Replay')
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    rec = sub.add_parser("record", help="Capture stream:signals + master state")
+    rec.add_argument('--redis-url', type=str, default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    rec.add_argument('--out', type=str, required=True, help='Output .jsonl.gz')
+    rec.add_argument('--duration', type=float, default=0, help='Seconds to record (0 = until Ctrl+C)')
+    rec.add_argument('--state-interval', type=float, default=1.0, help='Seconds between state snapshots')
+    rec.add_argument('--backfill', action='store_true', help='Start from the oldest stream entry')
+
+    rep = sub.add_parser("replay", help="Replay a recording into a LOCAL Redis")
+    rep.add_argument('--file', type=str, required=True)
+    rep.add_argument('--redis-url', type=str, default=os.getenv("REPLAY_REDIS_URL", "redis://localhost:6379"))
+    rep.add_argument('--speed', type=str, default="1", help='1, 10 or max')
+    rep.add_argument('--capture-port', type=int, default=0, help='Serve AUTH_URL stand-in to capture execution reports')
+    rep.add_argument('--forward', type=str, default="", help='Forward captured webhooks to this app URL')
+    rep.add_argument('--settle', type=float, default=30.0, help='Seconds to wait for trailing reports')
+    rep.add_argument('--remap-master', action='append', help='OLD_ID=LOCAL_ID (repeatable)')
+    rep.add_argument('--out', type=str, default="", help='Save replay report JSON')
+
+    args = parser.parse_args()
+    if args.cmd == "record":
+        record(args)
+    else:
+        if "localhost" not in args.redis_url and "127.0.0.1" not in args.redis_url:
+            print("[REPLAY] 🛑 Refusing to replay into a non-local Redis.")
+            sys.exit(1)
+        replay(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+🗂️ SYMBOL RESOLUTION CACHE (per broker server)
+
+normalize_symbol (executor.py) / ensure_symbol (hft_executor.py) probe
+mt5.symbol_select over suffixes x synonyms x futures months. A miss costs
+thousands of IPC calls and it repeats for every follower of every signal.
+
+Entries are keyed by (broker server, raw symbol):
+    positive  raw -> broker symbol   (SYMBOL_CACHE_TTL, default 6h)
+    negative  raw -> not tradable    (SYMBOL_CACHE_NEG_TTL, default 5m)
+
+Layers: in-process dict (shared by all WorkerPool threads) -> Redis hash
+`symcache:{ns}:{server}` (shared by every process + survives restarts).
+
+A positive hit is re-checked with ONE symbol_select (also keeps it in Market
+Watch). If that fails the entry is dropped everywhere and the full probe runs.
+"""
+import os
+import json
+import time
+import threading
+
+SYMBOL_CACHE_TTL = float(os.getenv("SYMBOL_CACHE_TTL", str(6 * 3600)))
+SYMBOL_CACHE_NEG_TTL = float(os.getenv("SYMBOL_CACHE_NEG_TTL", "300"))
+REDIS_PREFIX = "symcache"
+
+
+class SymbolCache:
+    def __init__(self, namespace, redis_client=None, ttl=SYMBOL_CACHE_TTL, neg_ttl=SYMBOL_CACHE_NEG_TTL):
+        self.namespace = namespace
+        self.redis = redis_client
+        self.ttl = ttl
+        self.neg_ttl = neg_ttl
+        self.entries = {}  # (server, raw) -> (symbol or None, expires_at)
+        self.lock = threading.Lock()
+        self.stats = {"hit": 0, "neg_hit": 0, "miss": 0, "invalidated": 0, "redis_hit": 0}
+
+    def _key(self, server):
+        return f"{REDIS_PREFIX}:{self.namespace}:{server or 'unknown'}"
+
+    def get(self, server, raw):
+        """Returns (found, symbol). found=False means no valid entry."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get((server, raw))
+        if entry and entry[1] > now:
+            return True, entry[0]
+
+        if self.redis:
+            try:
+                blob = self.redis.hget(self._key(server), raw)
+                if blob:
+                    data = json.loads(blob)
+                    if data.get("exp", 0) > now:
+                        with self.lock:
+                            self.entries[(server, raw)] = (data.get("s"), data["exp"])
+                            self.stats["redis_hit"] += 1
+                        return True, data.get("s")
+            except: pass
+        return False, None
+
+    def put(self, server, raw, symbol):
+        exp = time.time() + (self.ttl if symbol else self.neg_ttl)
+        with self.lock:
+            self.entries[(server, raw)] = (symbol, exp)
+        if self.redis:
+            try:
+                key = self._key(server)
+                self.redis.hset(key, raw, json.dumps({"s": symbol, "exp": exp}))
+                self.redis.expire(key, int(self.ttl))  # Housekeeping; per-entry expiry lives in "exp"
+            except: pass
+
+    def invalidate(self, server, raw):
+        with self.lock:
+            self.entries.pop((server, raw), None)
+            self.stats["invalidated"] += 1
+        if self.redis:
+            try: self.redis.hdel(self._key(server), raw)
+            except: pass
+
+    def resolve(self, server, raw, resolver, select):
+        """
+        Cached front for resolver(raw) -> symbol | None.
+        select(symbol, True) validates positive hits (mt5.symbol_select).
+        """
+        if not raw: return None
+        found, symbol = self.get(server, raw)
+        if found:
+            if symbol is None:
+                self.stats["neg_hit"] += 1
+                return None
+            if select(symbol, True):
+                self.stats["hit"] += 1
+                return symbol
+            # Cached symbol no longer selectable (delisted / rolled contract) -> re-probe
+            print(f"[SYMBOLS] ♻️ Cached {raw} -> {symbol} failed to select on {server}. Re-resolving...")
+            self.invalidate(server, raw)
+
+        self.stats["miss"] += 1
+        symbol = resolver(raw)
+        self.put(server, raw, symbol)
+        return symbol
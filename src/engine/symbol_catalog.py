@@ -0,0 +1,189 @@
+"""
+📚 SYMBOL CATALOG INDEX (symbols_get once per server)
+
+Instead of guessing names and calling symbol_select until one sticks, load the
+broker's full catalog with ONE mt5.symbols_get() and resolve with dict lookups:
+
+    names     EURUSD.M            -> "EURUSD.m"              (exact, case-insensitive)
+    roots     EURUSD              -> ["EURUSD.m", "EURUSD.pro"]  (known suffix stripped)
+    futures   GC                  -> [(2025-12, "GCZ5"), (2026-02, "GCG6"), ...]  (by expiry)
+    synonyms  GOLD                -> ["GOLD", "XAUUSD", "GC", ...]
+
+Resolution order (first hit wins, no IPC):
+    1. exact name      2. name + known suffix (SUFFIXES order)      3. any variant of the root
+    4. stripped bases (suffix/prefix removed) via 1-3
+    5. synonym group members via 1-3, then their front-month future
+    6. front-month future of the base, then FUTURES_ROOTS
+    7. (optional) fuzzy containment, shortest name first
+
+Front month = earliest contract expiring this month or later (expiration_time
+when the broker sets it, otherwise derived from the month code + year).
+The caller does the single symbol_select on the result.
+"""
+import re
+import time
+import threading
+from datetime import datetime
+
+MONTH_CODES = "FGHJKMNQUVXZ"
+FUTURE_RE = re.compile(r"^(.{2,}?)([FGHJKMNQUVXZ])(\d{1,2})$")  # root >= 2 chars (DJ30 is not D-Apr-2030)
+
+CATALOG_TTL = 3600          # Full reload interval (listings / contract rolls)
+CATALOG_MIN_REFRESH = 60    # On a miss, reload if the catalog is older than this
+
+
+def _year(digits, now):
+    if len(digits) == 2: return 2000 + int(digits)
+    # 1-digit (CME style GCZ5): nearest decade that is not in the past
+    year = (now.year // 10) * 10 + int(digits)
+    return year + 10 if year < now.year - 1 else year
+
+
+class SymbolCatalog:
+    def __init__(self, symbols, suffixes, prefixes, synonym_groups, futures_roots, now=None):
+        now = now or datetime.now()
+        self.suffixes = [s.upper() for s in suffixes if s]
+        self.prefixes = [p.upper() for p in prefixes if p]
+        self.futures_roots = {k.upper(): list(v) for k, v in futures_roots.items()}
+        self.names = {}     # UPPER name -> broker name
+        self.roots = {}     # UPPER root -> [broker names]
+        self.futures = {}   # UPPER futures root -> [((year, month), broker name)] sorted
+        self.synonyms = {}  # UPPER member -> [UPPER members] (group order)
+        self.loaded_at = time.time()
+        self.front_key = (now.year, now.month)
+
+        for group in synonym_groups:
+            members = [m.upper() for m in group]
+            for m in members:
+                self.synonyms.setdefault(m, members)
+
+        for sym in symbols:
+            name = getattr(sym, "name", sym)
+            up = name.upper()
+            self.names.setdefault(up, name)
+            # Catalog names are only suffix-stripped (prefix-stripping MES / MGC would alias ES / GC)
+            for root in self._strip(up, prefixes=False):
+                self.roots.setdefault(root, []).append(name)
+                m = FUTURE_RE.match(root)
+                if not m: continue
+                expiry = (_year(m.group(3), now), MONTH_CODES.index(m.group(2)) + 1)
+                exp_ts = getattr(sym, "expiration_time", 0) or 0
+                if exp_ts > 0:
+                    dt = datetime.fromtimestamp(exp_ts)
+                    expiry = (dt.year, dt.month)
+                self.futures.setdefault(m.group(1), []).append((expiry, name))
+
+        for contracts in self.futures.values():
+            contracts.sort()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _strip(self, up, prefixes=True):
+        """Roots of a name: itself, minus the longest known suffix, minus a known prefix."""
+        roots = [up]
+        suffix = max((s for s in self.suffixes if up.endswith(s) and len(up) > len(s)), key=len, default=None)
+        if suffix: roots.append(up[:-len(suffix)])
+        for p in (self.prefixes if prefixes else []):
+            for r in list(roots):
+                if r.startswith(p) and len(r) > len(p):
+                    roots.append(r[len(p):])
+                    break
+        return list(dict.fromkeys(roots))
+
+    # ---- lookups (no IPC) ----
+    def variant(self, base):
+        base = base.upper()
+        if base in self.names: return self.names[base]
+        for s in self.suffixes:
+            name = self.names.get(base + s)
+            if name: return name
+        names = self.roots.get(base)
+        return names[0] if names else None
+
+    def front_month(self, root):
+        contracts = self.futures.get(root.upper())
+        if not contracts: return None
+        for expiry, name in contracts:
+            if expiry >= self.front_key: return name
+        return contracts[-1][1]
+
+    def synonym_group(self, base):
+        base = base.upper()
+        if base in self.synonyms: return self.synonyms[base]
+        # Prefix match (e.g. US30Cash -> US30 group). Short members (Z, ES) would over-match.
+        for member, group in self.synonyms.items():
+            if len(member) >= 3 and base.startswith(member): return group
+        return None
+
+    def resolve(self, raw, fuzzy=False):
+        if not raw: return None
+        clean = raw.strip().upper()
+        bases = self._strip(clean)
+
+        for base in bases:
+            found = self.variant(base)
+            if found: return found
+
+        for base in bases:
+            group = self.synonym_group(base)
+            if not group: continue
+            for synonym in group:
+                found = self.variant(synonym)
+                if found: return found
+            for synonym in group:
+                found = self.front_month(synonym)
+                if found: return found
+
+        for base in bases:
+            found = self.front_month(base)
+            if found: return found
+            for root in self.futures_roots.get(base, []):
+                found = self.front_month(root)
+                if found: return found
+
+        if fuzzy:
+            key = min(bases, key=len)
+            if len(key) < 3: key = clean
+            if len(key) >= 3:
+                matches = sorted((n for up, n in self.names.items() if key in up), key=lambda n: (len(n), n))
+                if matches: return matches[0]
+        return None
+
+
+class CatalogRegistry:
+    """One SymbolCatalog per broker server, shared by every thread of the process."""
+    def __init__(self, suffixes, prefixes, synonym_groups, futures_roots, ttl=CATALOG_TTL):
+        self.tables = (suffixes, prefixes, synonym_groups, futures_roots)
+        self.ttl = ttl
+        self.catalogs = {}
+        self.lock = threading.Lock()
+
+    def get(self, server, symbols_get, max_age=None):
+        """Returns the server's catalog, (re)loading it via symbols_get(). None if the load fails."""
+        max_age = self.ttl if max_age is None else max_age
+        with self.lock:
+            cat = self.catalogs.get(server)
+            if cat and time.time() - cat.loaded_at < max_age: return cat
+            try:
+                t0 = time.time()
+                symbols = symbols_get()
+            except Exception as e:
+                print(f"[SYMBOLS] ⚠️ symbols_get failed for {server}: {e}")
+                symbols = None
+            if not symbols: return cat
+            cat = SymbolCatalog(symbols, *self.tables)
+            self.catalogs[server] = cat
+            print(f"[SYMBOLS] 📚 Indexed {len(cat)} symbols for {server or 'terminal'} "
+                  f"({len(cat.futures)} futures roots) in {(time.time() - t0) * 1000:.0f}ms")
+            return cat
+
+    def resolve(self, server, raw, symbols_get, fuzzy=False):
+        """(found_in_catalog_or_None, catalog_loaded). Reloads once on a miss if the index is stale."""
+        cat = self.get(server, symbols_get)
+        if cat is None: return None, False
+        found = cat.resolve(raw, fuzzy)
+        if not found and time.time() - cat.loaded_at > CATALOG_MIN_REFRESH:
+            cat = self.get(server, symbols_get, max_age=0) or cat
+            found = cat.resolve(raw, fuzzy)
+        return found, True
@@ -0,0 +1,104 @@
+"""
+📐 SYMBOL SPEC REGISTRY (cluster-wide, keyed by (server, symbol))
+
+calculate_safe_lot / normalize_trade_params / the close-volume math only need
+the STATIC part of symbol_info (lot limits, digits, point, contract size...).
+Those change a few times a year, yet every trade paid a full symbol_info IPC.
+
+    spec = SPECS.get(server, symbol, mt5.symbol_info)   # memory -> Redis -> terminal
+    spec.volume_min, spec.volume_step, spec.digits, spec.point, ...
+
+Layers:
+    memory   dict of slotted SymbolSpec records (no IPC, shared by all threads)
+    Redis    HASH specs:{server}  field=symbol  value=JSON row (first process to see it publishes)
+    terminal fetch(symbol) -> symbol_info, only on a miss or when older than SPEC_REFRESH
+
+Field names match MT5's SymbolInfo, so a spec drops in where sym_info was used
+for static fields. Live prices (bid/ask) still come from symbol_info_tick.
+
+    SPEC_REFRESH   Seconds before a spec is re-read from the terminal (default 21600 = 6h)
+"""
+import os
+import json
+import time
+import threading
+
+SPEC_REFRESH = float(os.getenv("SPEC_REFRESH", "21600"))
+REDIS_PREFIX = "specs"
+
+
+class SymbolSpec:
+    __slots__ = ("name", "digits", "point", "volume_min", "volume_max", "volume_step",
+                 "trade_contract_size", "trade_tick_size", "trade_tick_value", "trade_stops_level",
+                 "filling_mode", "trade_mode", "currency_margin", "currency_profit", "fetched_at")
+
+    def __init__(self, *row):
+        for field, value in zip(self.__slots__, row):
+            setattr(self, field, value)
+
+    @classmethod
+    def from_info(cls, info):
+        row = [getattr(info, f, None) for f in cls.__slots__[:-1]]
+        return cls(*row, time.time())
+
+    def to_row(self):
+        return [getattr(self, f) for f in self.__slots__]
+
+    def __repr__(self):
+        return f"SymbolSpec({self.name} min={self.volume_min} step={self.volume_step} digits={self.digits})"
+
+
+class SpecRegistry:
+    def __init__(self, redis_client=None, refresh=SPEC_REFRESH):
+        self.redis = redis_client
+        self.refresh = refresh
+        self.specs = {}  # (server, symbol) -> SymbolSpec
+        self.lock = threading.Lock()
+        self.stats = {"memory": 0, "redis": 0, "terminal": 0}
+
+    def get(self, server, symbol, fetch=None):
+        """
+        Spec for (server, symbol). `fetch` (mt5.symbol_info) is only called on a
+        miss / stale entry. server None/"" = keep it process-local (not published).
+        """
+        if not symbol: return None
+        key = (server or "", symbol)
+        now = time.time()
+        spec = self.specs.get(key)
+        if spec and now - spec.fetched_at < self.refresh:
+            self.stats["memory"] += 1
+            return spec
+
+        if server and self.redis and not spec:
+            try:
+                blob = self.redis.hget(f"{REDIS_PREFIX}:{server}", symbol)
+                if blob:
+                    remote = SymbolSpec(*json.loads(blob))
+                    if now - remote.fetched_at < self.refresh:
+                        with self.lock:
+                            self.specs[key] = remote
+                        self.stats["redis"] += 1
+                        return remote
+            except: pass
+
+        if fetch is None: return spec  # Stale beats nothing
+        info = fetch(symbol)
+        if not info: return spec
+        fresh = SymbolSpec.from_info(info)
+        self.put(server, fresh)
+        self.stats["terminal"] += 1
+        return fresh
+
+    def put(self, server, spec):
+        with self.lock:
+            self.specs[(server or "", spec.name)] = spec
+        if server and self.redis:
+            try: self.redis.hset(f"{REDIS_PREFIX}:{server}", spec.name, json.dumps(spec.to_row()))
+            except: pass
+
+    def invalidate(self, server, symbol):
+        with self.lock:
+            self.specs.pop((server or "", symbol), None)
+        if server and self.redis:
+            try: self.redis.hdel(f"{REDIS_PREFIX}:{server}", symbol)
+            except: pass
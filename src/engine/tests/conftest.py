@@ -0,0 +1,28 @@
+"""
+🧪 ENGINE TESTS (run against the simulated terminal, no MetaTrader5 / Windows needed)
+
+    cd src/engine && python -m pytest -q tests
+"""
+import os
+import sys
+
+os.environ.setdefault("MT5_BACKEND", "SIM") # 🧪 Before any engine import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import mt5_sim
+
+TERMINAL = "C:/MT5_Instance_05/terminal64.exe"
+LOGIN = 7000001
+
+
+@pytest.fixture
+def sim():
+    """Fresh sim, zero latency, attached to one grid terminal and logged in as LOGIN."""
+    mt5_sim.reset()
+    mt5_sim.configure(ipc_latency=0.0, login_latency=0.0, fill_latency=0.0, init_latency=0.0,
+                      jitter=0.0, requote_rate=0.0)
+    assert mt5_sim.initialize(path=TERMINAL)
+    assert mt5_sim.login(LOGIN, password="x", server=mt5_sim.CONFIG["default_server"])
+    yield mt5_sim
+    mt5_sim.reset()
@@ -0,0 +1,32 @@
+from margin_model import MarginModel
+
+SERVER = "SimBroker-Demo"
+
+
+def test_margin_is_linear_in_lots():
+    m = MarginModel()
+    m.observe(SERVER, "EURUSD", 500, 1.0, 1.0850, 217.0)
+    assert abs(m.estimate(SERVER, "EURUSD", 500, 0.5, 1.0850) - 108.5) < 1e-9
+    assert m.estimate(SERVER, "EURUSD", 100, 0.5, 1.0850) is None # Other leverage: cold
+    assert m.estimate(SERVER, "EURUSD", 500, 0.5, 1.2) is None # Beyond MARGIN_MODEL_DRIFT
+
+
+def test_margin_falls_back_to_terminal_and_learns(sim):
+    m = MarginModel()
+    calc = lambda lots: sim.order_calc_margin(sim.ORDER_TYPE_BUY, "EURUSD", lots, 1.0850)
+    first = m.margin(SERVER, "EURUSD", 500, 1.0, 1.0850, calc)
+    second = m.margin(SERVER, "EURUSD", 500, 2.0, 1.0850, calc)
+    assert m.stats == {"local": 1, "terminal": 1}
+    assert abs(second - 2 * first) < 1e-6
+
+
+def test_affordable_downgrades_or_skips():
+    m = MarginModel()
+    m.observe(SERVER, "EURUSD", 500, 1.0, 1.0850, 200.0)
+    out = m.affordable(SERVER, "EURUSD", 1.0850, [
+        (500, 1000.0, 1.0, 0.01), # Fits
+        (500, 100.0, 1.0, 0.01),  # Only the min lot fits
+        (500, 1.0, 1.0, 0.01),    # Nothing fits
+        (100, 1000.0, 1.0, 0.01), # Model cold for this leverage
+    ])
+    assert out == [1.0, 0.01, 0.0, None]
@@ -0,0 +1,62 @@
+import time
+from types import SimpleNamespace
+
+from conftest import TERMINAL
+from account_state import AccountStateCache
+from market_watch import MarketWatch
+
+
+def _info(login):
+    return SimpleNamespace(login=login, equity=1000.0, balance=1000.0, margin=0.0, margin_free=1000.0,
+                           leverage=500, server="SimBroker-Demo", currency="USD", margin_mode=2)
+
+
+def _visible(mt5):
+    return {s.name for s in mt5.symbols_get() if s.visible}
+
+
+def _select(mt5, *symbols):
+    for s in symbols: assert mt5.symbol_select(s, True)
+
+
+def test_sweep_keeps_other_followers_open_symbols(sim):
+    state = AccountStateCache()
+    state.publish(_info(7000002), "test", symbols=["GBPUSD"]) # Logged out, still holds GBPUSD
+    mw = MarketWatch(account_state=state)
+    _select(sim, "EURUSD", "GBPUSD", "XAUUSD")
+    mw.sweep(TERMINAL, sim)
+    assert _visible(sim) == {"GBPUSD"}
+
+
+def test_sweep_keeps_logged_in_positions_and_touched(sim):
+    mw = MarketWatch()
+    _select(sim, "EURUSD", "USDJPY", "XAUUSD")
+    tick = sim.symbol_info_tick("USDJPY")
+    res = sim.order_send({"action": sim.TRADE_ACTION_DEAL, "symbol": "USDJPY", "volume": 0.1,
+                          "type": sim.ORDER_TYPE_BUY, "price": tick.ask})
+    assert res.retcode == sim.TRADE_RETCODE_DONE
+    mw.touch(TERMINAL, "EURUSD")
+    mw.sweep(TERMINAL, sim)
+    assert _visible(sim) == {"EURUSD", "USDJPY"}
+
+
+def test_stale_account_state_is_not_kept(sim):
+    state = AccountStateCache()
+    state.publish(_info(7000002), "test", symbols=["GBPUSD"])
+    state.states[7000002]["ts"] = time.time() - 120
+    mw = MarketWatch(keep_seconds=60, account_state=state)
+    assert "GBPUSD" not in mw.needed(TERMINAL, sim)
+
+
+def test_publish_without_symbols_keeps_previous():
+    state = AccountStateCache()
+    state.publish(_info(7000002), "worker", symbols=["EURUSD", "EURUSD", "GBPUSD"])
+    state.publish(_info(7000002), "worker") # account_info only, no positions read
+    assert state.open_symbols() == {"EURUSD", "GBPUSD"}
+
+
+def test_due_stamps_per_terminal():
+    mw = MarketWatch()
+    assert mw.due(TERMINAL, interval=60)
+    assert not mw.due(TERMINAL, interval=60)
+    assert mw.due("C:/MT5_Instance_06/terminal64.exe", interval=60)
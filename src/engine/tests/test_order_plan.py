@@ -0,0 +1,51 @@
+import time
+from types import SimpleNamespace
+
+import order_plan
+from margin_model import MarginModel
+
+SERVER = "SimBroker-Demo"
+SPEC = SimpleNamespace(volume_step=0.01, volume_min=0.01, volume_max=100.0, digits=5)
+
+
+def _compile(signal, slaves, accounts):
+    m = MarginModel()
+    m.observe(SERVER, "EURUSD", 500, 1.0, 1.0850, 200.0)
+    return order_plan.compile_open(signal, slaves, lambda server, raw: raw, lambda server, symbol: SPEC, accounts.get, m)
+
+
+def test_compile_open_plans_from_cache():
+    accounts = {
+        1: {"equity": 10000.0, "margin_free": 10000.0, "leverage": 500, "ts": time.time()},
+        2: {"equity": 500.0, "margin_free": 1.0, "leverage": 500, "ts": time.time()},
+        3: {"equity": 10000.0, "margin_free": 10000.0, "leverage": 500, "ts": time.time() - 3600},
+    }
+    slaves = [
+        {"login": 1, "server": SERVER, "copy_mode": "EQUITY", "risk_factor": 100.0, "allocation": 0.0, "invert_copy": True},
+        {"login": 2, "server": SERVER, "copy_mode": "FIXED", "risk_factor": 200.0, "allocation": 0.0},
+        {"login": 3, "server": SERVER, "copy_mode": "FIXED", "risk_factor": 100.0, "allocation": 0.0},
+    ]
+    signal = {"action": "OPEN", "ticket": "42", "symbol": "EURUSD", "volume": 0.1, "master_equity": 5000.0,
+              "type": "BUY", "price": 1.0850, "sl": 1.0800, "tp": 1.0950}
+    before = [dict(s) for s in slaves]
+    plans = _compile(signal, slaves, accounts)
+
+    assert slaves == before # Caller's configs are never written to
+    assert sorted(plans) == [1, 2]
+    assert plans[1]["volume"] == 0.2 # 0.1 x (10000 / 5000)
+    assert plans[1]["type_invert"] and plans[1]["comment"] == "CPY:42"
+    assert not plans[2]["feasible"] # Even 0.01 lots needs 2.0 margin
+    assert 3 not in plans # Stale snapshot: worker decides
+
+
+def test_compile_open_plans_nothing_for_other_actions():
+    accounts = {1: {"equity": 10000.0, "margin_free": 10000.0, "leverage": 500, "ts": time.time()}}
+    slaves = [{"login": 1, "server": SERVER, "copy_mode": "FIXED", "risk_factor": 100.0}]
+    for action in ("CLOSE", "MODIFY"):
+        assert _compile({"action": action, "ticket": "42", "symbol": "EURUSD", "volume": 0.1}, slaves, accounts) == {}
+
+
+def test_finalize_mirrors_inverted_stops():
+    plan = {"type_invert": True, "digits": 5, "sl_dist": 0.0050, "tp_dist": 0.0100}
+    assert order_plan.finalize(plan, True, 1.0850, 1.0800, 1.0950) == (1.075, 1.09) # SL from the TP distance, TP from the SL distance
+    assert order_plan.finalize(dict(plan, type_invert=False), True, 1.0850, 1.08, 1.095) == (1.08, 1.095)
@@ -0,0 +1,67 @@
+from order_submit import OrderSubmitter, RETCODE_DONE, RETCODE_MARKET_CLOSED, RETCODE_TRADE_DISABLED
+
+SERVER = "SimBroker-Demo"
+
+
+def _open(mt5, symbol="EURUSD", type_=0):
+    mt5.symbol_select(symbol, True)
+    tick = mt5.symbol_info_tick(symbol)
+    return {"action": mt5.TRADE_ACTION_DEAL, "symbol": symbol, "volume": 0.1, "type": type_,
+            "price": tick.ask if type_ == 0 else tick.bid, "deviation": 20, "magic": 234000}
+
+
+def _close(mt5, pos):
+    req = _open(mt5, pos.symbol, 1 - pos.type)
+    req.update(volume=pos.volume, position=pos.ticket)
+    return req
+
+
+def _sends(mt5):
+    return mt5.stats().get("order_send", 0)
+
+
+def test_open_rejected_fast_when_close_only(sim):
+    sim.set_symbol(SERVER, "EURUSD", trade_mode=sim.SYMBOL_TRADE_MODE_CLOSEONLY)
+    sub = OrderSubmitter()
+    before = _sends(sim)
+    res = sub.send(sim, _open(sim), SERVER)
+    assert res.retcode == RETCODE_TRADE_DISABLED
+    assert _sends(sim) == before # No IPC
+
+
+def test_close_sent_when_close_only(sim):
+    sub = OrderSubmitter(state_ttl=0) # Re-read trade_mode on every send
+    assert sub.send(sim, _open(sim), SERVER).retcode == RETCODE_DONE
+    pos = sim.positions_get()[0]
+    sim.set_symbol(SERVER, "EURUSD", trade_mode=sim.SYMBOL_TRADE_MODE_CLOSEONLY)
+    res = sub.send(sim, _close(sim, pos), SERVER)
+    assert res.retcode == RETCODE_DONE
+    assert not sim.positions_get()
+
+
+def test_closed_backoff_applies_to_opens_only(sim):
+    sub = OrderSubmitter()
+    assert sub.send(sim, _open(sim), SERVER).retcode == RETCODE_DONE # Caches trade_mode FULL
+    pos = sim.positions_get()[0]
+
+    sim.set_symbol(SERVER, "EURUSD", trade_mode=sim.SYMBOL_TRADE_MODE_DISABLED)
+    assert sub.send(sim, _open(sim), SERVER).retcode == RETCODE_MARKET_CLOSED
+    assert (SERVER, "EURUSD") in sub.closed
+
+    sim.set_symbol(SERVER, "EURUSD", trade_mode=sim.SYMBOL_TRADE_MODE_FULL)
+    before = _sends(sim)
+    res = sub.send(sim, _open(sim), SERVER)
+    assert res.retcode == RETCODE_MARKET_CLOSED and _sends(sim) == before # Opens fail fast
+
+    res = sub.send(sim, _close(sim, pos), SERVER)
+    assert res.retcode == RETCODE_DONE # The close still goes out
+    assert not sim.positions_get()
+
+
+def test_failed_close_does_not_mark_symbol_closed(sim):
+    sub = OrderSubmitter()
+    assert sub.send(sim, _open(sim), SERVER).retcode == RETCODE_DONE
+    pos = sim.positions_get()[0]
+    sim.set_symbol(SERVER, "EURUSD", trade_mode=sim.SYMBOL_TRADE_MODE_DISABLED)
+    assert sub.send(sim, _close(sim, pos), SERVER).retcode == RETCODE_MARKET_CLOSED
+    assert (SERVER, "EURUSD") not in sub.closed
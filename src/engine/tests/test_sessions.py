@@ -0,0 +1,104 @@
+import sys
+import types
+
+try:
+    import redis # noqa: F401
+except ImportError:
+    # hft_executor builds its Redis pool at import; a client whose calls return None keeps
+    # the worker on its no-Redis paths (no ticket maps / shared state), which is all a session needs here.
+    class _NoRedis:
+        def __init__(self, *a, **kw): pass
+        def __getattr__(self, name): return lambda *a, **kw: None
+    _NoRedis.from_url = classmethod(lambda cls, *a, **kw: cls())
+    sys.modules["redis"] = types.SimpleNamespace(Redis=_NoRedis, ConnectionPool=_NoRedis, from_url=lambda *a, **kw: _NoRedis())
+
+import pytest
+import hashlib
+import os
+
+import hft_executor
+from conftest import TERMINAL, LOGIN
+from hft_executor import TradeJob, WorkerPool
+
+LOCK_KEY = "lock:terminal:" + hashlib.md5(os.path.normpath(TERMINAL).lower().strip().encode()).hexdigest()
+
+
+class _Keys:
+    """Just the string-key calls the worker makes (get / set nx ex / delete); everything else is a no-op."""
+    def __init__(self): self.data = {}
+    def get(self, key): return self.data.get(key)
+    def set(self, key, value, nx=False, ex=None, **kw):
+        if nx and key in self.data: return None
+        self.data[key] = value
+        return True
+    def delete(self, *keys):
+        for k in keys: self.data.pop(k, None)
+    def __getattr__(self, name): return lambda *a, **kw: None
+
+
+def _cfg(**kw):
+    cfg = {"login": LOGIN, "password": "x", "server": "SimBroker-Demo", "follower_id": "f1",
+           "copy_mode": "FIXED", "risk_factor": 100.0, "allocation": 0.0, "invert_copy": False}
+    cfg.update(kw)
+    return cfg
+
+
+def _open(ticket, symbol):
+    return {"masterId": "m1", "ticket": ticket, "action": "OPEN", "symbol": symbol, "type": "BUY",
+            "volume": 0.1, "master_equity": 10000.0}
+
+
+def test_expand_gives_each_action_its_own_config():
+    open_cfg = _cfg(risk_factor=50.0, copy_mode="EQUITY", allocation=250.0)
+    close_cfg = _cfg()
+    job = TradeJob.session(0, open_cfg, [
+        ({"action": "OPEN", "ticket": "1"}, open_cfg),
+        ({"action": "CLOSE", "ticket": "2", "pct": 1.0}, close_cfg),
+    ])
+    subs = job.expand()
+    assert [s.signal["action"] for s in subs] == ["OPEN", "CLOSE"]
+    assert subs[0].slave_config == open_cfg
+    assert subs[1].slave_config == close_cfg # No risk_factor / allocation leaks from the first action
+
+
+def test_expand_copies_configs_and_links_parent():
+    cfg = _cfg()
+    job = TradeJob.session(1, cfg, [({"action": "MODIFY"}, None), ({"action": "CLOSE"}, cfg)])
+    subs = job.expand()
+    assert subs[0].slave_config == cfg # None -> session config
+    subs[1].slave_config["risk_factor"] = 1.0
+    assert cfg["risk_factor"] == 100.0
+    assert [s.index for s in subs] == [0, 1]
+    assert all(s.parent is job and s.priority == 1 and s.login == LOGIN for s in subs)
+    assert job.pending == 2
+
+
+def _run_session(actions, session_cfg):
+    pool = WorkerPool([TERMINAL])
+    pool.start_pool()
+    try:
+        return pool.submit_sessions([(session_cfg, actions)]).wait(timeout=30)
+    finally:
+        pool.shutdown_event.set()
+
+
+def test_session_runs_actions_in_one_login(sim):
+    other = LOGIN + 1 # Terminal starts on LOGIN: the session has to switch once
+    logins = sim.stats().get("login", 0)
+    actions = [(_open("1", "EURUSD"), _cfg(login=other, risk_factor=50.0)), (_open("2", "GBPUSD"), _cfg(login=other))]
+    results = _run_session(actions, _cfg(login=other))
+    assert sorted((r["sessionLogin"], r["actionIndex"], r["status"]) for r in results) == \
+        [(other, 0, "success"), (other, 1, "success")]
+    assert sim.stats().get("login", 0) - logins == 1
+    volumes = {p.symbol: p.volume for p in sim.positions_get()}
+    assert volumes == {"EURUSD": 0.05, "GBPUSD": 0.1} # Each action sized with its own risk_factor
+
+
+@pytest.mark.parametrize("held, after", [("LOCKED_EXECUTOR", "LOCKED_EXECUTOR"), (None, None)])
+def test_worker_leaves_an_owned_terminal_lock_alone(sim, monkeypatch, held, after):
+    keys = _Keys()
+    if held: keys.data[LOCK_KEY] = held # Single terminal: executor's lock key == the worker's busy key
+    monkeypatch.setattr(hft_executor, "r_client_hft", keys)
+    results = _run_session([(_open("1", "EURUSD"), _cfg()), (_open("2", "GBPUSD"), _cfg())], _cfg())
+    assert [r["status"] for r in results] == ["success", "success"]
+    assert keys.data.get(LOCK_KEY) == after # Owner's lock kept (refreshable); our own busy mark cleared
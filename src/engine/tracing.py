@@ -0,0 +1,109 @@
+"""
+🧵 SIGNAL TRACING (Master detection -> follower execution report)
+
+One master trade fans out into one signal, N TradeJobs, N TradeResults and N
+execution webhooks. A trace joins them:
+
+    payload["trace"] = {"id": "<hex>", "t": {"scan": ts, "detect": ts, "publish": ts, ...}}
+
+Stage timestamps are wall-clock epoch seconds (time.time()) so stamps taken by
+the broadcaster, dispatcher, executor and workers line up on one host clock.
+Each follower job works on its own copy (child) of the signal's trace.
+
+Stages (in order, not all present on every path):
+    scan detect publish               broadcaster.py
+    dispatch route                    dispatcher.py
+    dequeue enqueue pickup            executor.py / hft_executor.py / worker_service.py
+    login_start login_end send_start send_end result report
+
+Span sink (JSONL, one line per consecutive stage pair):
+    TRACE_SINK=/var/log/hydra/spans.jsonl python executor.py --mode TURBO
+    {"trace_id": ..., "span": "pickup->login_start", "start": ..., "end": ..., "ms": ..., "follower": ...}
+Without TRACE_SINK, traces are still propagated (the webhook gets traceId) but nothing is written.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import threading
+
+TRACE_SINK = os.getenv("TRACE_SINK", "")
+
+_SINK_QUEUE = queue.Queue(maxsize=100000)
+_WRITER = [None]
+_WRITER_LOCK = threading.Lock()
+
+
+def start(payload, scan_ts=None):
+    """Stamps a new trace into a signal payload (broadcaster). Keeps an existing one."""
+    trace = payload.get("trace")
+    if not isinstance(trace, dict) or "id" not in trace:
+        trace = {"id": uuid.uuid4().hex, "t": {}}
+        if scan_ts: trace["t"]["scan"] = scan_ts
+        trace["t"]["detect"] = time.time()
+        payload["trace"] = trace
+    return trace
+
+
+def stamp(trace, stage, ts=None):
+    if isinstance(trace, dict):
+        trace.setdefault("t", {})[stage] = ts or time.time()
+    return trace
+
+
+def child(trace, **attrs):
+    """Per-follower copy of a signal trace (same id, own stage dict)."""
+    if not isinstance(trace, dict) or "id" not in trace:
+        trace = {"id": uuid.uuid4().hex, "t": {}}
+    out = {"id": trace["id"], "t": dict(trace.get("t", {}))}
+    out.update(attrs)
+    return out
+
+
+def trace_id(payload):
+    trace = payload.get("trace") if isinstance(payload, dict) else None
+    return trace.get("id") if isinstance(trace, dict) else None
+
+
+def spans(trace, first=None):
+    """Consecutive stage pairs, optionally starting with the span that ENDS at `first`."""
+    stages = sorted(trace.get("t", {}).items(), key=lambda x: x[1])
+    names = [s for s, _ in stages]
+    begin = names.index(first) if first in names else 1
+    out = []
+    for i in range(max(1, begin), len(stages)):
+        (a, ta), (b, tb) = stages[i - 1], stages[i]
+        out.append({"span": f"{a}->{b}", "start": ta, "end": tb, "ms": round((tb - ta) * 1000, 3)})
+    return out
+
+
+def emit(trace, first=None, **attrs):
+    """Queues span records for the stages this process stamped (from `first` on) to TRACE_SINK."""
+    if not TRACE_SINK or not isinstance(trace, dict): return
+    _ensure_writer()
+    for sp in spans(trace, first):
+        rec = {"trace_id": trace.get("id"), **sp, **attrs}
+        try:
+            _SINK_QUEUE.put_nowait(rec)
+        except queue.Full:
+            pass  # Never block the trading path on telemetry
+
+
+def _ensure_writer():
+    if _WRITER[0]: return
+    with _WRITER_LOCK:
+        if _WRITER[0]: return
+        t = threading.Thread(target=_writer_loop, daemon=True)
+        _WRITER[0] = t
+        t.start()
+
+
+def _writer_loop():
+    if os.path.dirname(TRACE_SINK): os.makedirs(os.path.dirname(TRACE_SINK), exist_ok=True)
+    with open(TRACE_SINK, "a", encoding="utf-8") as f:
+        while True:
+            rec = _SINK_QUEUE.get()
+            f.write(json.dumps(rec, default=str) + "\n")
+            if _SINK_QUEUE.empty(): f.flush()
+
@@ -1,4 +1,5 @@
-import MetaTrader5 as mt5
+import mt5_backend
+mt5 = mt5_backend.load() # 🔌 MetaTrader5 / mt5_sim (MT5_BACKEND), opt-in profiler (MT5_PROFILE)
 import argparse
 import json
 import sys
@@ -1,5 +1,6 @@
 
-import MetaTrader5 as mt5
+import mt5_backend
+mt5 = mt5_backend.load() # 🔌 MetaTrader5 / mt5_sim (MT5_BACKEND), opt-in profiler (MT5_PROFILE)
 import os
 import json
 import time
@@ -7,6 +8,12 @@ import redis
 import threading
 import queue
 from datetime import datetime
+import metrics # 📈 Prometheus-style telemetry
+import tracing # 🧵 Signal trace ids + stage timestamps
+from symbol_specs import SpecRegistry # 📐 Static symbol specs (shared via Redis)
+from margin_model import MarginModel # ⚖️ Learned margin-per-lot
+from order_submit import OrderSubmitter # 📮 Filling mode / session cache, requote retry
+from account_state import AccountStateCache # 📇 Shared equity / free margin per login
 
 # ⚙️ CONFIGURATION
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
@@ -20,6 +27,10 @@ WINE_SEMAPHORE = threading.Semaphore(MAX_CONCURRENT_WINE_OPS)
 
 # 📡 REDIS CONNECTION
 r_client = redis.from_url(REDIS_URL, decode_responses=True)
+SPECS = SpecRegistry(r_client)
+MARGIN_MODEL = MarginModel()
+SUBMITTER = OrderSubmitter()
+ACCOUNT_STATE = AccountStateCache(r_client)
 
 class BotWorker(threading.Thread):
     def __init__(self, bot_path):
@@ -52,7 +63,9 @@ class BotWorker(threading.Thread):
                     
                 _, payload_json = result
                 job = json.loads(payload_json)
-                self.process_batch(job)
+                metrics.SIGNALS_RECEIVED.inc(action=job.get('master_task', {}).get('action', 'OPEN'))
+                with metrics.BATCH_SECONDS.time():
+                    self.process_batch(job)
                 
             except Exception as e:
                 print(f"[ERROR] Worker {self.bot_path}: {e}")
@@ -61,6 +74,7 @@ class BotWorker(threading.Thread):
         mt5.shutdown()
 
     def process_batch(self, job):
+        t_pickup = time.time()
         master_task = job['master_task']
         followers = job['followers']
         signal = master_task['signal']
@@ -72,12 +86,17 @@ class BotWorker(threading.Thread):
         with WINE_SEMAPHORE:
             # 4. 🚀 BATCH EXECUTION LOOP
             for follower in followers:
+                trace = tracing.stamp(tracing.child(master_task.get('trace')), "pickup", t_pickup)
                 try:
-                    self.execute_trade(follower, signal, action)
+                    self.execute_trade(follower, signal, action, trace)
                 except Exception as e:
                     print(f"[ERROR] Exec Fail for {follower.get('login')}: {e}")
+                tracing.stamp(trace, "result")
+                tracing.emit(trace, "pickup", component="worker", bot=self.bot_path, login=follower.get('login'),
+                             follower=follower.get('id'), master_id=master_task.get('masterId'),
+                             ticket=master_task.get('ticket'), action=action)
 
-    def calculate_safe_lot(self, symbol, master_volume, risk_factor, action_type):
+    def calculate_safe_lot(self, symbol, master_volume, risk_factor, action_type, server=None):
         """
         🛡️ ANTIGRAVITY SAFETY ENGINE
         Calculates the safest proportional lot size based on:
@@ -88,7 +107,7 @@ class BotWorker(threading.Thread):
         import math
         
         # 1. Get Basics
-        symbol_info = mt5.symbol_info(symbol)
+        symbol_info = SPECS.get(server, symbol, mt5.symbol_info)
         if not symbol_info:
             print(f"   [WARN] Symbol {symbol} not found")
             return master_volume # Fallback
@@ -115,6 +134,7 @@ class BotWorker(threading.Thread):
         # Note: calculate_safe_lot is called inside execute_trade AFTER login switch.
         account_info = mt5.account_info()
         if not account_info: return target_vol
+        ACCOUNT_STATE.publish(account_info, "worker")
         
         free_margin = account_info.margin_free
         
@@ -123,7 +143,8 @@ class BotWorker(threading.Thread):
         price = tick.ask if action_type == mt5.ORDER_TYPE_BUY else tick.bid
         
         try:
-            required_margin = mt5.order_calc_margin(action_type, symbol, target_vol, price)
+            required_margin = MARGIN_MODEL.margin(server, symbol, account_info.leverage, target_vol, price,
+                                                  lambda lots: mt5.order_calc_margin(action_type, symbol, lots, price))
             
             if required_margin and required_margin > free_margin:
                 # 🚨 DANGER: Insufficient Funds
@@ -148,15 +169,20 @@ class BotWorker(threading.Thread):
 
         return target_vol
 
-    def execute_trade(self, follower, signal, action):
+    def execute_trade(self, follower, signal, action, trace=None):
         target_login = int(follower['login'])
         
         # A. Switch Account (if needed)
         curr = mt5.account_info()
         if not curr or curr.login != target_login:
+            t_switch = time.time()
+            tracing.stamp(trace, "login_start", t_switch)
             if not mt5.login(login=target_login, password=follower['password'], server=follower['server']):
+                metrics.LOGIN_SWITCH.observe(time.time() - t_switch, result="failed")
                 print(f"   [FAIL] Login {target_login}: {mt5.last_error()}")
                 return
+            metrics.LOGIN_SWITCH.observe(time.time() - t_switch, result="ok")
+            tracing.stamp(trace, "login_end")
 
         # B. Prepare Request
         symbol = signal.get('symbol')
@@ -168,7 +194,7 @@ class BotWorker(threading.Thread):
         
         # 🛡️ CALCULATE SAFE LOT
         if action == 'OPEN':
-            volume = self.calculate_safe_lot(symbol, master_vol, risk_factor, order_type)
+            volume = self.calculate_safe_lot(symbol, master_vol, risk_factor, order_type, follower.get('server'))
             if volume <= 0: return 
         else:
             # For Close, ideally we close what we have. 
@@ -187,7 +213,11 @@ class BotWorker(threading.Thread):
         }
         
         # C. Send Order
-        res = mt5.order_send(request)
+        t_send = time.time()
+        res = SUBMITTER.send(mt5, request, follower.get('server'))
+        metrics.ORDER_SEND.observe(time.time() - t_send, retcode=getattr(res, "retcode", "none"))
+        tracing.stamp(trace, "send_start", t_send)
+        tracing.stamp(trace, "send_end")
         if res.retcode != mt5.TRADE_RETCODE_DONE:
              print(f"   ❌ {target_login}: {res.comment}")
         else:
@@ -216,6 +246,7 @@ def start_worker_service():
                     bot_paths.append(full)
                  
     print(f"[SERVICE] Found {len(bot_paths)} Bots. Spawning threads...")
+    metrics.serve("worker")
     
     threads = []
     for path in bot_paths: